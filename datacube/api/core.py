@@ -2,18 +2,24 @@
 #
 # Copyright (c) 2015-2021 ODC Contributors
 # SPDX-License-Identifier: Apache-2.0
+import functools
 import uuid
+import threading
 import collections.abc
-from itertools import groupby
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby, product
 from typing import Set, Union, Optional, Dict, Tuple, cast
 import datetime
 
 import numpy
+import toolz  # type: ignore[import]
 import xarray
 from dask import array as da
+from dask.highlevelgraph import HighLevelGraph, Layer, MaterializedLayer
 
 from datacube.config import LocalConfig
 from datacube.storage import reproject_and_fuse, BandInfo
+from datacube.storage._fusers import check_fuser
 from datacube.utils import ignore_exceptions_if
 from datacube.utils import geometry
 from datacube.utils.dates import normalise_dt
@@ -26,6 +32,9 @@ from .query import Query, query_group_by, query_geopolygon
 from ..index import index_connect
 from ..drivers import new_datasource
 
+# Number of dataset extents reprojected together when filtering by polygon
+_EXTENT_BATCH_SIZE = 10000
+
 
 class TerminateCurrentLoad(Exception):  # noqa: N818
     """ This exception is raised by user code from `progress_cbk`
@@ -107,7 +116,8 @@ class Datacube(object):
 
         :param bool dataset_count:
             Return a "dataset_count" column containing the number of datasets
-            for each product. This can take several minutes on large datacubes.
+            for each product. This is quick for index drivers that keep product
+            summaries, but can take several minutes otherwise.
             Defaults to False.
 
         :return: A table or list of every product in the datacube.
@@ -125,19 +135,17 @@ class Datacube(object):
                 for pr in self.index.products.get_all()]
 
         # Optionally compute dataset count for each product and add to row/cols
-        # Product lists are sorted by product name to ensure 1:1 match
         if dataset_count:
 
-            # Load counts
-            counts = [(p.name, c) for p, c in self.index.datasets.count_by_product()]
+            # Load counts (products without datasets are left out)
+            counts = {p.name: c for p, c in self.index.datasets.count_by_product()}
 
-            # Sort both rows and counts by product name
+            # Sort rows by product name
             from operator import itemgetter
             rows = sorted(rows, key=itemgetter(0))
-            counts = sorted(counts, key=itemgetter(0))
 
-            # Add sorted count to each existing row
-            rows = [row + [count[1]] for row, count in zip(rows, counts)]
+            # Add count to each existing row
+            rows = [row + [counts.get(row[0], 0)] for row in rows]
             cols = cols + ['dataset_count']
 
         # If pandas not requested, return list of dicts
@@ -182,7 +190,8 @@ class Datacube(object):
     #: pylint: disable=too-many-arguments, too-many-locals
     def load(self, product=None, measurements=None, output_crs=None, resolution=None, resampling=None,
              skip_broken_datasets=False, dask_chunks=None, like=None, fuse_func=None, align=None,
-             datasets=None, dataset_predicate=None, progress_cbk=None, **query):
+             datasets=None, dataset_predicate=None, progress_cbk=None, io_threads=None,
+             use_overviews=True, overview_tol=None, **query):
         """
         Load data as an ``xarray.Dataset`` object.
         Each measurement will be a data variable in the :class:`xarray.Dataset`.
@@ -350,6 +359,10 @@ class Datacube(object):
             perform a specific combining step. This can be a dictionary if different
             fusers are needed per band.
 
+            Instead of a function, a name of a built-in fuser can be given: ``'copy'`` (default, first valid
+            observation), ``'last'``, ``'max'``, ``'min'``, ``'mean'`` (of valid observations) or ``'or'``
+            (bitwise OR, for bit-flag bands), see :func:`datacube.storage.available_fusers`.
+
         :param datasets:
             Optional. If this is a non-empty list of :class:`datacube.model.Dataset` objects, these will be loaded
             instead of performing a database lookup.
@@ -376,12 +389,61 @@ class Datacube(object):
             if supplied will be called for every file read with ``files_processed_so_far, total_files``. This is
             only applicable to non-lazy loads, ignored when using dask.
 
+        :param int io_threads:
+            Optional. Number of threads to use for reading data in non-lazy loads. When set to more than 1,
+            independent (time, measurement) slices are read and fused concurrently, sources within a slice are
+            still fused in the same order as for a serial load. Ignored when using dask.
+            Default is to read serially.
+
+        :param bool use_overviews:
+            Optional. When down-sampling, read from overviews of the source files where available.
+            Set to False to always read at full resolution, for example when overviews were computed with a
+            different resampling method. Default is True.
+
+        :param float overview_tol:
+            Optional. Tolerance for rounding the shrink factor up to the next integer or overview level,
+            e.g. with ``0.1`` a shrink factor of ``7.9`` reads from the 8x overview.
+            Default is ``1e-3``.
+
         :return:
             Requested data in a :class:`xarray.Dataset`
 
         :rtype:
             :class:`xarray.Dataset`
         """
+        prepared = self._prepare_load(product=product, measurements=measurements,
+                                      output_crs=output_crs, resolution=resolution, align=align,
+                                      like=like, datasets=datasets, dataset_predicate=dataset_predicate,
+                                      query=query)
+        if prepared is None:
+            return xarray.Dataset()
+
+        grouped, geobox, measurement_dicts, extra_dims = prepared
+
+        # `extra_dims` put last for backwards compability, but should really be the second position
+        # between `grouped` and `geobox`
+        result = self.load_data(grouped, geobox,
+                                measurement_dicts,
+                                resampling=resampling,
+                                fuse_func=fuse_func,
+                                dask_chunks=dask_chunks,
+                                skip_broken_datasets=skip_broken_datasets,
+                                progress_cbk=progress_cbk,
+                                extra_dims=extra_dims,
+                                io_threads=io_threads,
+                                use_overviews=use_overviews,
+                                overview_tol=overview_tol)
+
+        return result
+
+    def _prepare_load(self, product, measurements, output_crs, resolution, align,
+                      like, datasets, dataset_predicate, query):
+        """
+        Find and group datasets, and compute output geobox for :meth:`load` and :meth:`iter_load`.
+
+        :param dict query: search terms, extra dimension terms are removed from it
+        :return: ``(grouped, geobox, measurement_dicts, extra_dims)`` or ``None`` when there is nothing to load
+        """
         if product is None and datasets is None:
             raise ValueError("Must specify a product or supply datasets")
 
@@ -395,7 +457,7 @@ class Datacube(object):
             datasets = list(datasets)
 
         if len(datasets) == 0:
-            return xarray.Dataset()
+            return None
 
         ds, *_ = datasets
         datacube_product = ds.type
@@ -418,7 +480,7 @@ class Datacube(object):
             extra_dims = extra_dims[extra_dims_slice]
             # Check if empty
             if extra_dims.has_empty_dim():
-                return xarray.Dataset()
+                return None
 
             if load_hints:
                 if output_crs is None:
@@ -466,18 +528,86 @@ class Datacube(object):
 
         measurement_dicts = datacube_product.lookup_measurements(measurements)
 
-        # `extra_dims` put last for backwards compability, but should really be the second position
-        # between `grouped` and `geobox`
-        result = self.load_data(grouped, geobox,
-                                measurement_dicts,
-                                resampling=resampling,
-                                fuse_func=fuse_func,
-                                dask_chunks=dask_chunks,
-                                skip_broken_datasets=skip_broken_datasets,
-                                progress_cbk=progress_cbk,
-                                extra_dims=extra_dims)
+        return grouped, geobox, measurement_dicts, extra_dims
 
-        return result
+    def iter_load(self, product=None, measurements=None, batch=1, prefetch=1,
+                  output_crs=None, resolution=None, resampling=None, skip_broken_datasets=False,
+                  like=None, fuse_func=None, align=None, datasets=None, dataset_predicate=None,
+                  io_threads=None, use_overviews=True, overview_tol=None, **query):
+        """
+        Load data in batches along the time (or other ``group_by``) dimension.
+
+        This is a generator version of :meth:`load`, it yields an :class:`xarray.Dataset` for every
+        ``batch`` consecutive time slices, while reading the next ``prefetch`` batches in the
+        background. Memory use is bounded by ``batch * (prefetch + 2)`` time slices regardless of
+        the total number of time slices, without the need for dask.
+        ::
+
+            for xx in dc.iter_load(product='ls8_nbar_albers', batch=4, prefetch=1, **query):
+                process(xx)
+
+        Batches share the same output geobox, computed from all the datasets matching the query.
+
+        :param int batch: Number of time slices in each yielded :class:`xarray.Dataset`
+        :param int prefetch: Number of batches to read ahead in a background thread,
+                             0 means read every batch only when it is requested
+        :param io_threads: see :meth:`load`
+
+        All other parameters have the same meaning as for :meth:`load`, ``dask_chunks`` and
+        ``progress_cbk`` are not supported.
+
+        :return: Generator of :class:`xarray.Dataset`
+        """
+        if batch < 1:
+            raise ValueError("batch should be at least 1")
+        if prefetch < 0:
+            raise ValueError("prefetch should not be negative")
+        if 'dask_chunks' in query:
+            raise ValueError("iter_load doesn't support dask_chunks, use load instead")
+        if 'progress_cbk' in query:
+            raise TypeError("iter_load doesn't support progress_cbk")
+
+        prepared = self._prepare_load(product=product, measurements=measurements,
+                                      output_crs=output_crs, resolution=resolution, align=align,
+                                      like=like, datasets=datasets, dataset_predicate=dataset_predicate,
+                                      query=query)
+        if prepared is None:
+            return
+
+        grouped, geobox, measurement_dicts, extra_dims = prepared
+        yield from self._iter_load_batches(grouped, geobox, measurement_dicts,
+                                           batch=batch, prefetch=prefetch,
+                                           resampling=resampling,
+                                           fuse_func=fuse_func,
+                                           skip_broken_datasets=skip_broken_datasets,
+                                           extra_dims=extra_dims,
+                                           io_threads=io_threads,
+                                           use_overviews=use_overviews,
+                                           overview_tol=overview_tol)
+
+    @staticmethod
+    def _iter_load_batches(sources, geobox, measurements, batch=1, prefetch=1, **load_settings):
+        dim = sources.dims[0]
+        n = sources.shape[0]
+
+        def load_batch(i):
+            return Datacube.load_data(sources.isel({dim: slice(i, i + batch)}),
+                                      geobox, measurements, **load_settings)
+
+        pool = ThreadPoolExecutor(max_workers=1)
+        pending = collections.deque()
+        try:
+            for i in range(0, n, batch):
+                pending.append(pool.submit(load_batch, i))
+                if len(pending) > prefetch:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for f in pending:
+                f.cancel()
+            pool.shutdown(wait=True)
 
     def find_datasets(self, **search_terms):
         """
@@ -491,7 +621,8 @@ class Datacube(object):
         """
         return list(self.find_datasets_lazy(**search_terms))
 
-    def find_datasets_lazy(self, limit=None, ensure_location=False, dataset_predicate=None, **kwargs):
+    def find_datasets_lazy(self, limit=None, ensure_location=False, dataset_predicate=None, parallel=None,
+                           **kwargs):
         """
         Find datasets matching query.
 
@@ -499,6 +630,9 @@ class Datacube(object):
         :param ensure_location: only return datasets that have locations
         :param limit: if provided, limit the maximum number of datasets returned
         :param dataset_predicate: an optional predicate to filter datasets
+        :param parallel: if provided, split the search into this many time ranges, searched concurrently.
+                         Worthwhile for searches returning many thousands of datasets.
+                         See :meth:`datacube.index.abstract.AbstractDatasetResource.search_parallel`
         :return: iterator of datasets
         :rtype: __generator[:class:`datacube.model.Dataset`]
 
@@ -508,11 +642,19 @@ class Datacube(object):
         if not query.product:
             raise ValueError("must specify a product")
 
-        datasets = self.index.datasets.search(limit=limit,
-                                              **query.search_terms)
+        if parallel:
+            search = functools.partial(self.index.datasets.search_parallel, shards=parallel)
+        else:
+            search = self.index.datasets.search
+
+        if self.index.supports_spatial_indexes:
+            # Index intersects dataset extents with the query polygon itself
+            datasets = search(limit=limit, **query.search_terms_with_geopolygon)
+        else:
+            datasets = search(limit=limit, **query.search_terms)
 
-        if query.geopolygon is not None:
-            datasets = select_datasets_inside_polygon(datasets, query.geopolygon)
+            if query.geopolygon is not None:
+                datasets = select_datasets_inside_polygon(datasets, query.geopolygon)
 
         if ensure_location:
             datasets = (dataset for dataset in datasets if dataset.uris)
@@ -674,9 +816,10 @@ class Datacube(object):
         def chunk_datasets(dss, gbt):
             out = {}
             for ds in dss:
-                dsk[_tokenize_dataset(ds)] = ds
+                ds_token = _tokenize_dataset(ds)
+                dsk[ds_token] = ds
                 for idx in gbt.tiles(ds.extent):
-                    out.setdefault(idx, []).append(ds)
+                    out.setdefault(idx, []).append(ds_token)
             return out
 
         chunked_srcs = xr_apply(sources,
@@ -699,28 +842,29 @@ class Datacube(object):
     @staticmethod
     def _xr_load(sources, geobox, measurements,
                  skip_broken_datasets=False,
-                 progress_cbk=None, extra_dims=None):
+                 progress_cbk=None, extra_dims=None,
+                 io_threads=None, out=None):
 
         def mk_cbk(cbk):
             if cbk is None:
                 return None
             n = 0
             t_size = sum(len(x) for x in sources.values.ravel())
-            n_total = 0
-            for m in measurements:
-                if 'extra_dim' in m:
-                    index_subset = extra_dims.measurements_slice(m.extra_dim)
-                    n_total += t_size*len(m.extra_dim.get('measurement_map')[index_subset])
-                else:
-                    n_total += t_size
+            n_total = t_size*len(measurements)
+            lock = threading.Lock()
 
             def _cbk(*ignored):
                 nonlocal n
-                n += 1
-                return cbk(n, n_total)
+                with lock:
+                    n += 1
+                    return cbk(n, n_total)
             return _cbk
 
-        data = Datacube.create_storage(sources.coords, geobox, measurements, extra_dims=extra_dims)
+        if out is None:
+            data = Datacube.create_storage(sources.coords, geobox, measurements, extra_dims=extra_dims)
+        else:
+            _check_output_storage(out, sources, geobox, measurements)
+            data = out
         _cbk = mk_cbk(progress_cbk)
 
         # Create a list of read IO operations
@@ -728,34 +872,40 @@ class Datacube(object):
         for index, datasets in numpy.ndenumerate(sources.values):
             for m in measurements:
                 if 'extra_dim' in m:
-                    # When we want to support 3D native reads, we can start by replacing the for loop with
-                    # read_ios.append(((index + extra_dim_index), (datasets, m, index_subset)))
-                    index_subset = extra_dims.measurements_index(m.extra_dim)
-                    for result_index, extra_dim_index in enumerate(range(*index_subset)):
-                        read_ios.append(((index + (result_index,)), (datasets, m, extra_dim_index)))
+                    # Read all requested extra dimension indexes at once
+                    extra_dim_index = extra_dims.measurements_slice(m.extra_dim)
+                    read_ios.append((index, (datasets, m, extra_dim_index)))
                 else:
                     # Get extra_dim index if available
                     extra_dim_index = m.get('extra_dim_index', None)
                     read_ios.append((index, (datasets, m, extra_dim_index)))
 
-        # Perform the read IO operations
-        for index, (datasets, m, extra_dim_index) in read_ios:
+        def do_read_io(index, datasets, m, extra_dim_index):
             data_slice = data[m.name].values[index]
-            try:
-                _fuse_measurement(data_slice, datasets, geobox, m,
-                                  skip_broken_datasets=skip_broken_datasets,
-                                  progress_cbk=_cbk, extra_dim_index=extra_dim_index)
-            except (TerminateCurrentLoad, KeyboardInterrupt):
-                data.attrs['dc_partial_load'] = True
-                return data
+            if out is not None:
+                # Storage we allocated is already filled with nodata
+                data_slice.fill(m.nodata)
+            _fuse_measurement(data_slice, datasets, geobox, m,
+                              skip_broken_datasets=skip_broken_datasets,
+                              progress_cbk=_cbk, extra_dim_index=extra_dim_index)
+
+        # Perform the read IO operations
+        try:
+            if io_threads is not None and io_threads > 1:
+                _run_read_ios_concurrently(do_read_io, read_ios, io_threads)
+            else:
+                for index, (datasets, m, extra_dim_index) in read_ios:
+                    do_read_io(index, datasets, m, extra_dim_index)
+        except (TerminateCurrentLoad, KeyboardInterrupt):
+            data.attrs['dc_partial_load'] = True
 
         return data
 
     @staticmethod
     def load_data(sources, geobox, measurements, resampling=None,
                   fuse_func=None, dask_chunks=None, skip_broken_datasets=False,
-                  progress_cbk=None, extra_dims=None,
-                  **extra):
+                  progress_cbk=None, extra_dims=None, io_threads=None,
+                  out=None, use_overviews=True, overview_tol=None, **extra):
         """
         Load data from :meth:`group_datasets` into an :class:`xarray.Dataset`.
 
@@ -780,7 +930,8 @@ class Datacube(object):
             Default is to use ``nearest`` for all bands.
 
         :param fuse_func:
-            function to merge successive arrays as an output. Can be a dictionary just like resampling.
+            function to merge successive arrays as an output, or name of a built-in fuser (see :meth:`load`).
+            Can be a dictionary just like resampling.
 
         :param dict dask_chunks:
             If provided, the data will be loaded on demand using using :class:`dask.array.Array`.
@@ -798,13 +949,32 @@ class Datacube(object):
         :param ExtraDimensions extra_dims:
             A ExtraDimensions describing the any additional dimensions on top of (t, y, x)
 
+        :param int io_threads:
+            Number of threads used to read and fuse independent output slices concurrently.
+            Only applicable to non-lazy loads, ignored when using dask. Default is to read serially.
+
+        :param xarray.Dataset out:
+            Load into this dataset instead of allocating a new one, it should have the same structure
+            (variables, shapes and dtypes) as :meth:`create_storage` output for these ``sources``,
+            for example a slice of :attr:`datacube.storage.SharedStorage.dataset`.
+            Can not be used with ``dask_chunks``.
+
+        :param bool use_overviews:
+            When down-sampling, read from overviews of the source files where available (see :meth:`load`).
+
+        :param float overview_tol:
+            Tolerance for rounding the shrink factor up to the next integer or overview level (see :meth:`load`).
+
         :rtype: xarray.Dataset
 
         .. seealso:: :meth:`find_datasets` :meth:`group_datasets`
         """
-        measurements = per_band_load_data_settings(measurements, resampling=resampling, fuse_func=fuse_func)
+        measurements = per_band_load_data_settings(measurements, resampling=resampling, fuse_func=fuse_func,
+                                                   use_overviews=use_overviews, overview_tol=overview_tol)
 
         if dask_chunks is not None:
+            if out is not None:
+                raise ValueError("Can not load into existing storage when using dask")
             return Datacube._dask_load(sources, geobox, measurements, dask_chunks,
                                        skip_broken_datasets=skip_broken_datasets,
                                        extra_dims=extra_dims)
@@ -812,7 +982,9 @@ class Datacube(object):
             return Datacube._xr_load(sources, geobox, measurements,
                                      skip_broken_datasets=skip_broken_datasets,
                                      progress_cbk=progress_cbk,
-                                     extra_dims=extra_dims)
+                                     extra_dims=extra_dims,
+                                     io_threads=io_threads,
+                                     out=out)
 
     def __str__(self):
         return "Datacube<index={!r}>".format(self.index)
@@ -833,7 +1005,8 @@ class Datacube(object):
         self.close()
 
 
-def per_band_load_data_settings(measurements, resampling=None, fuse_func=None):
+def per_band_load_data_settings(measurements, resampling=None, fuse_func=None,
+                                use_overviews=True, overview_tol=None):
     def with_resampling(m, resampling, default=None):
         m = m.copy()
         m['resampling_method'] = resampling.get(m.name, default)
@@ -844,6 +1017,13 @@ def per_band_load_data_settings(measurements, resampling=None, fuse_func=None):
         m['fuser'] = fuser.get(m.name, default)
         return m
 
+    def with_read_settings(m):
+        m = m.copy()
+        m['use_overviews'] = use_overviews
+        if overview_tol is not None:
+            m['overview_tol'] = overview_tol
+        return m
+
     if isinstance(resampling, str):
         resampling = {'*': resampling}
 
@@ -858,9 +1038,14 @@ def per_band_load_data_settings(measurements, resampling=None, fuse_func=None):
                         for m in measurements]
 
     if fuse_func is not None:
+        for fuser in fuse_func.values():
+            check_fuser(fuser)
         measurements = [with_fuser(m, fuse_func, default=fuse_func.get('*'))
                         for m in measurements]
 
+    if not use_overviews or overview_tol is not None:
+        measurements = [with_read_settings(m) for m in measurements]
+
     return measurements
 
 
@@ -921,18 +1106,70 @@ def select_datasets_inside_polygon(datasets, polygon):
     # Check against the bounding box of the original scene, can throw away some portions
     assert polygon is not None
     query_crs = polygon.crs
-    for dataset in datasets:
-        if intersects(polygon, dataset.extent.to_crs(query_crs)):
-            yield dataset
+    # Reproject dataset extents in batches, datasets may be a lazy search
+    for batch in toolz.partition_all(_EXTENT_BATCH_SIZE, datasets):
+        extents = geometry.to_crs_many((dataset.extent for dataset in batch), query_crs)
+        for dataset, extent in zip(batch, extents):
+            if intersects(polygon, extent):
+                yield dataset
+
+
+def _run_read_ios_concurrently(do_read_io, read_ios, io_threads):
+    """
+    Run ``do_read_io(index, *args)`` for every ``(index, args)`` in ``read_ios`` on a pool of ``io_threads``.
+
+    Every read IO writes into its own slice of the output, so they can proceed independently. When one of
+    them fails (including ``TerminateCurrentLoad`` raised by a progress callback) outstanding reads are
+    cancelled, reads already in flight are allowed to finish and the first error is re-raised.
+    """
+    stop = threading.Event()
+
+    def _task(index, args):
+        if stop.is_set():
+            return
+        try:
+            do_read_io(index, *args)
+        except BaseException:
+            stop.set()
+            raise
+
+    pool = ThreadPoolExecutor(max_workers=io_threads)
+    futures = [pool.submit(_task, index, args) for index, args in read_ios]
+    try:
+        for f in futures:
+            f.result()
+    except BaseException:
+        stop.set()
+        for f in futures:
+            f.cancel()
+        raise
+    finally:
+        pool.shutdown(wait=True)
 
 
 def fuse_lazy(datasets, geobox, measurement, skip_broken_datasets=False, prepend_dims=0, extra_dim_index=None):
     prepend_shape = (1,) * prepend_dims
-    data = numpy.full(geobox.shape, measurement.nodata, dtype=measurement.dtype)
+    if isinstance(extra_dim_index, slice):
+        shape = (extra_dim_index.stop - extra_dim_index.start, *geobox.shape)
+    else:
+        shape = geobox.shape
+    data = numpy.full(shape, measurement.nodata, dtype=measurement.dtype)
     _fuse_measurement(data, datasets, geobox, measurement,
                       skip_broken_datasets=skip_broken_datasets,
                       extra_dim_index=extra_dim_index)
-    return data.reshape(prepend_shape + geobox.shape)
+    return data.reshape(prepend_shape + shape)
+
+
+def _check_output_storage(out, sources, geobox, measurements):
+    for m in measurements:
+        if m.name not in out.data_vars:
+            raise ValueError(f"Output storage is missing variable: {m.name}")
+        shape = out[m.name].shape
+        if shape[:sources.ndim] != sources.shape or shape[-2:] != geobox.shape:
+            raise ValueError(f"Output storage for {m.name} has wrong shape: {shape}")
+        dtype = out[m.name].dtype
+        if dtype != numpy.dtype(m.dtype):
+            raise ValueError(f"Output storage for {m.name} has wrong dtype: {dtype}, expected {m.dtype}")
 
 
 def _fuse_measurement(dest, datasets, geobox, measurement,
@@ -959,11 +1196,15 @@ def _fuse_measurement(dest, datasets, geobox, measurement,
                        fuse_func=measurement.get('fuser', None),
                        skip_broken_datasets=skip_broken_datasets,
                        progress_cbk=progress_cbk,
-                       extra_dim_index=extra_dim_index)
+                       extra_dim_index=extra_dim_index,
+                       prefill=False,
+                       use_overviews=measurement.get('use_overviews', True),
+                       overview_tol=measurement.get('overview_tol', 1e-3))
 
 
 def get_bounds(datasets, crs):
-    bbox = geometry.bbox_union(ds.extent.to_crs(crs).boundingbox for ds in datasets)
+    bbox = geometry.bbox_union(extent.boundingbox
+                               for extent in geometry.to_crs_many((ds.extent for ds in datasets), crs))
     return geometry.box(*bbox, crs=crs)
 
 
@@ -1012,7 +1253,132 @@ def _tokenize_dataset(dataset):
     return 'dataset-{}'.format(dataset.id.hex)
 
 
-# pylint: disable=too-many-locals
+def _fuse_lazy_tile(datasets, gbt, idx, measurement, skip_broken_datasets=False, prepend_dims=0,
+                    extra_dim_index=None):
+    return fuse_lazy(datasets, gbt[idx], measurement,
+                     skip_broken_datasets=skip_broken_datasets,
+                     prepend_dims=prepend_dims,
+                     extra_dim_index=extra_dim_index)
+
+
+class _LoadLayer(Layer):
+    """
+    Dask graph layer with load tasks of one measurement.
+
+    Keys are ``(name, *irr_index, [0,] iy, ix)``, 3D measurements are read in one block
+    along the extra dimension with ``extra_dim_index`` slice. ``chunked_srcs`` maps
+    tile index to a list of dataset keys for every output slice. Datasets, measurement
+    and :class:`GeoboxTiles` are not embedded in the tasks, tasks refer to them by keys
+    of the dependency layer instead, so they are serialised once per graph rather than
+    once per task. Tiles with no data are aliases to one of the (up to 4) empty chunks
+    of the dependency layer.
+
+    Tasks are only generated when needed: culling generates tasks of the requested
+    keys only, the whole layer is materialised on first item access otherwise.
+    """
+
+    def __init__(self, name, chunked_srcs, gbt, measurement_key, gbt_key, empties,
+                 skip_broken_datasets=False, extra_dim_index=None):
+        super().__init__()
+        self.name = name
+        self.chunked_srcs = chunked_srcs
+        self.gbt = gbt
+        self.measurement_key = measurement_key
+        self.gbt_key = gbt_key
+        self.empties = empties
+        self.skip_broken_datasets = skip_broken_datasets
+        self.extra_dim_index = extra_dim_index
+
+        self._extra_blocks = (0,) if isinstance(extra_dim_index, slice) else ()
+        self.shape = chunked_srcs.shape + (1,)*len(self._extra_blocks) + tuple(gbt.shape)
+        self._cached_dict = None
+
+    def _task(self, tiled_dss, idx):
+        dss = tiled_dss.get(idx, None)
+        if dss is None:
+            return self.empties[self.gbt.chunk_shape(idx)]
+
+        return (_fuse_lazy_tile,
+                dss,
+                self.gbt_key,
+                idx,
+                self.measurement_key,
+                self.skip_broken_datasets,
+                self.chunked_srcs.ndim,
+                self.extra_dim_index)
+
+    def _task_for_key(self, key):
+        index = self._check_key(key)
+        return self._task(self.chunked_srcs[index[:self.chunked_srcs.ndim]], index[-2:])
+
+    def _check_key(self, key):
+        if not isinstance(key, tuple) or len(key) != len(self.shape) + 1 or key[0] != self.name:
+            raise KeyError(key)
+        index = key[1:]
+        try:
+            if not all(0 <= i < n for i, n in zip(index, self.shape)):
+                raise KeyError(key)
+        except TypeError:
+            raise KeyError(key) from None
+        return index
+
+    @property
+    def _dict(self):
+        if self._cached_dict is not None:
+            return self._cached_dict
+
+        tile_idxs = list(product(*map(range, self.gbt.shape)))
+        dsk = {}
+        for irr_index, tiled_dss in numpy.ndenumerate(self.chunked_srcs):
+            key_prefix = (self.name, *irr_index, *self._extra_blocks)
+            for idx in tile_idxs:
+                dsk[key_prefix + idx] = self._task(tiled_dss, idx)
+
+        self._cached_dict = dsk
+        return dsk
+
+    def __getitem__(self, key):
+        return self._dict[key]
+
+    def __contains__(self, key):
+        try:
+            self._check_key(key)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        if self._cached_dict is not None:
+            return iter(self._cached_dict)
+        return ((self.name, *index) for index in product(*map(range, self.shape)))
+
+    def __len__(self):
+        return int(numpy.prod(self.shape))
+
+    def is_materialized(self):
+        return self._cached_dict is not None
+
+    def get_output_keys(self):
+        return set(self)
+
+    def _task_dependencies(self, task):
+        if isinstance(task, str):
+            return {task}
+        _, dss, *_ = task
+        return {*dss, self.gbt_key, self.measurement_key}
+
+    def get_dependencies(self, key, all_hlg_keys):
+        return self._task_dependencies(self[key])
+
+    def cull(self, keys, all_hlg_keys):
+        if len(keys) == len(self):
+            return self, {k: self.get_dependencies(k, all_hlg_keys) for k in self}
+
+        out = {k: self._task_for_key(k) for k in keys}
+        return (MaterializedLayer(out, annotations=self.annotations),
+                {k: self._task_dependencies(task) for k, task in out.items()})
+
+
 def _make_dask_array(chunked_srcs,
                      dsk,
                      gbt,
@@ -1024,73 +1390,50 @@ def _make_dask_array(chunked_srcs,
 
     token = uuid.uuid4().hex
     dsk_name = 'dc_load_{name}-{token}'.format(name=measurement.name, token=token)
+    deps_name = 'dc_load_deps_{name}-{token}'.format(name=measurement.name, token=token)
+    measurement_key = 'measurement_{name}-{token}'.format(name=measurement.name, token=token)
+    gbt_key = 'geobox_tiles-{token}'.format(token=token)
+
+    extra_dim_index = measurement.get('extra_dim_index', None)
+    extra_dim_shape = ()
+    if 'extra_dim' in measurement:
+        # Read all of the extra_dim subset in one go
+        extra_dim_index = extra_dims.measurements_slice(measurement.extra_dim)
+        extra_dim_shape = (extra_dim_index.stop - extra_dim_index.start,)
 
     needed_irr_chunks, grid_chunks = chunks[:-2], chunks[-2:]
-    actual_irr_chunks = (1,) * len(needed_irr_chunks)
+    actual_irr_chunks = (1,) * chunked_srcs.ndim + extra_dim_shape
+
+    dsk[measurement_key] = measurement
+    dsk[gbt_key] = gbt
 
     # we can have up to 4 empty chunk shapes: whole, right edge, bottom edge and
     # bottom right corner
     #  W R
     #  B BR
-    empties = {}  # type Dict[Tuple[int,int], str]
-
-    def _mk_empty(shape: Tuple[int, ...]) -> str:
-        name = empties.get(shape, None)
-        if name is not None:
-            return name
-
-        name = 'empty_{}x{}-{token}'.format(*shape, token=token)
-        dsk[name] = (numpy.full, actual_irr_chunks + shape, measurement.nodata, measurement.dtype)
-        empties[shape] = name
-
-        return name
-
-    for irr_index, tiled_dss in numpy.ndenumerate(chunked_srcs.values):
-        key_prefix = (dsk_name, *irr_index)
-
-        # all spatial chunks
-        for idx in numpy.ndindex(gbt.shape):
-            dss = tiled_dss.get(idx, None)
-
-            if dss is None:
-                val = _mk_empty(gbt.chunk_shape(idx))
-                # 3D case
-                if 'extra_dim' in measurement:
-                    index_subset = extra_dims.measurements_index(measurement.extra_dim)
-                    for result_index, extra_dim_index in numpy.ndenumerate(range(*index_subset)):
-                        dsk[key_prefix + result_index + idx] = val
-                else:
-                    dsk[key_prefix + idx] = val
-            else:
-                val = (fuse_lazy,
-                       [_tokenize_dataset(ds) for ds in dss],
-                       gbt[idx],
-                       measurement,
-                       skip_broken_datasets,
-                       len(needed_irr_chunks))
-
-                # 3D case
-                if 'extra_dim' in measurement:
-                    # Do extra_dim subsetting here
-                    index_subset = extra_dims.measurements_index(measurement.extra_dim)
-                    for result_index, extra_dim_index in enumerate(range(*index_subset)):
-                        dsk[key_prefix + (result_index,) + idx] = val + (extra_dim_index,)
-                else:
-                    # Get extra_dim index if available
-                    extra_dim_index = measurement.get('extra_dim_index', None)
-                    dsk[key_prefix + idx] = val + (extra_dim_index,)
+    empties = {}  # type: Dict[Tuple[int, ...], str]
+    for iy in {0, gbt.shape[0] - 1}:
+        for ix in {0, gbt.shape[1] - 1}:
+            shape = gbt.chunk_shape((iy, ix))
+            name = 'empty_{}x{}-{token}'.format(*shape, token=token)
+            dsk[name] = (numpy.full, actual_irr_chunks + shape, measurement.nodata, measurement.dtype)
+            empties[shape] = name
+
+    layer = _LoadLayer(dsk_name, chunked_srcs.values, gbt,
+                       measurement_key=measurement_key,
+                       gbt_key=gbt_key,
+                       empties=empties,
+                       skip_broken_datasets=skip_broken_datasets,
+                       extra_dim_index=extra_dim_index)
+    graph = HighLevelGraph({dsk_name: layer, deps_name: MaterializedLayer(dsk)},
+                           {dsk_name: {deps_name}, deps_name: set()})
 
     y_shapes = [grid_chunks[0]]*gbt.shape[0]
     x_shapes = [grid_chunks[1]]*gbt.shape[1]
 
     y_shapes[-1], x_shapes[-1] = gbt.chunk_shape(tuple(n-1 for n in gbt.shape))
 
-    extra_dim_shape = ()
-    if 'extra_dim' in measurement:
-        dim_name = measurement.extra_dim
-        extra_dim_shape += (len(extra_dims.measurements_values(dim_name)),)
-
-    data = da.Array(dsk, dsk_name,
+    data = da.Array(graph, dsk_name,
                     chunks=actual_irr_chunks + (tuple(y_shapes), tuple(x_shapes)),
                     dtype=measurement.dtype,
                     shape=(chunked_srcs.shape + extra_dim_shape + gbt.base.shape))
@@ -7,7 +7,7 @@ import xarray
 from collections import OrderedDict
 import pandas as pd
 
-from datacube.utils.geometry import intersects
+from datacube.utils.geometry import intersects, to_crs_many
 from .query import Query, query_group_by
 from .core import Datacube
 
@@ -203,8 +203,9 @@ class GridWorkflow(object):
             geobox = geobox.buffered(*tile_buffer) if tile_buffer else geobox
 
             datasets, query = self._find_datasets(geobox.extent, indexers)
-            for dataset in datasets:
-                if intersects(geobox.extent, dataset.extent.to_crs(self.grid_spec.crs)):
+            extents = to_crs_many((dataset.extent for dataset in datasets), self.grid_spec.crs)
+            for dataset, dataset_extent in zip(datasets, extents):
+                if intersects(geobox.extent, dataset_extent):
                     add_dataset_to_cells(cell_index, geobox, dataset)
             return cells
         else:
@@ -217,10 +218,10 @@ class GridWorkflow(object):
                     tile_index for tile_index, tile_geobox in
                     self.grid_spec.tiles_from_geopolygon(query.geopolygon, geobox_cache=geobox_cache))
 
-                for dataset in datasets:
+                extents = to_crs_many((dataset.extent for dataset in datasets), self.grid_spec.crs)
+                for dataset, dataset_extent in zip(datasets, extents):
                     # Go through our datasets and see which tiles each dataset produces, and whether they intersect
                     # our query geopolygon.
-                    dataset_extent = dataset.extent.to_crs(self.grid_spec.crs)
                     bbox = dataset_extent.boundingbox
                     bbox = bbox.buffered(*tile_buffer) if tile_buffer else bbox
 
@@ -137,9 +137,25 @@ class Query(object):
 
         :type: dict
         """
+        return self._search_terms(with_bounds=True)
+
+    @property
+    def search_terms_with_geopolygon(self):
+        """
+        Access the search terms as a dictionary, with ``geopolygon`` instead of
+        its ``lat``/``lon`` bounds. For indexes that support spatial search.
+
+        :type: dict
+        """
+        kwargs = self._search_terms(with_bounds=False)
+        if self.geopolygon:
+            kwargs['geopolygon'] = self.geopolygon
+        return kwargs
+
+    def _search_terms(self, with_bounds):
         kwargs = {}
         kwargs.update(self.search)
-        if self.geopolygon:
+        if self.geopolygon and with_bounds:
             geo_bb = geometry.lonlat_bounds(self.geopolygon, resolution=100_000)  # TODO: pick resolution better
             if geo_bb.bottom != geo_bb.top:
                 kwargs['lat'] = Range(geo_bb.bottom, geo_bb.top)
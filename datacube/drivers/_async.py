@@ -0,0 +1,132 @@
+# This file is part of the Open Data Cube, see https://opendatacube.org for more information
+#
+# Copyright (c) 2015-2020 ODC Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Async access to the postgres based index drivers.
+
+Queries are built by the same (synchronous) db api classes as usual, and run
+on an asyncpg connection through SQLAlchemy's asyncio extension. See
+:class:`AsyncDbAPI`.
+"""
+from typing import Any, Callable, Optional
+
+from psycopg2.extras import DateTimeTZRange, NumericRange, Range as PgRange
+from sqlalchemy import event
+from sqlalchemy.engine import Result
+from sqlalchemy.engine.url import URL as EngineUrl  # noqa: N811
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+
+def create_async_engine(url: EngineUrl,
+                        json_serializer: Callable[[Any], str],
+                        application_name: Optional[str] = None,
+                        pool_timeout: int = 60):
+    """
+    Async counterpart of the engine used by the postgres drivers, with its own connection pool.
+
+    :param url: Database url, the driver is replaced with asyncpg
+    """
+    if asyncpg is None:
+        raise ImportError('Async index access requires asyncpg, try: pip install datacube[async]')
+    from sqlalchemy.ext.asyncio import create_async_engine as _create_async_engine
+
+    engine = _create_async_engine(
+        url.set(drivername='postgresql+asyncpg'),
+        echo=False,
+        echo_pool=False,
+        # Same as the synchronous engine: READ-COMMITTED isolation level with autocommit on.
+        isolation_level='AUTOCOMMIT',
+        json_serializer=json_serializer,
+        pool_recycle=pool_timeout,
+        connect_args={'server_settings': {'application_name': application_name}} if application_name else {},
+    )
+
+    @event.listens_for(engine.sync_engine, 'before_cursor_execute', retval=True)
+    def to_asyncpg_ranges(conn, cursor, statement, parameters, context, executemany):
+        # Search expressions are built with psycopg2 range values
+        if executemany:
+            return statement, [_to_asyncpg_params(p) for p in parameters]
+        return statement, _to_asyncpg_params(parameters)
+
+    return engine
+
+
+def _to_asyncpg_params(parameters):
+    if isinstance(parameters, dict):
+        return {k: _to_asyncpg_value(v) for k, v in parameters.items()}
+    return type(parameters)(_to_asyncpg_value(v) for v in parameters)
+
+
+def _to_asyncpg_value(value):
+    if isinstance(value, PgRange):
+        return asyncpg.Range(value.lower, value.upper,
+                             lower_inc=value.lower_inc, upper_inc=value.upper_inc,
+                             empty=value.isempty)
+    return value
+
+
+def from_asyncpg_value(value):
+    """
+    Convert a value read with asyncpg to what psycopg2 would have returned.
+
+    (Only ranges differ for the types in the index)
+    """
+    if asyncpg is None or not isinstance(value, asyncpg.Range):
+        return value
+    range_class = DateTimeTZRange if hasattr(value.lower or value.upper, 'tzinfo') else NumericRange
+    if value.isempty:
+        return range_class(empty=True)
+    bounds = ('[' if value.lower_inc else '(') + (']' if value.upper_inc else ')')
+    return range_class(value.lower, value.upper, bounds=bounds)
+
+
+class AsyncDbAPI:
+    """
+    Async wrapper of a db api instance (``PostgresDbAPI`` or ``PostgisDbAPI``).
+
+    Every method of the db api is available as a coroutine. It runs with the
+    usual synchronous code on an async connection, so the event loop is not
+    blocked while waiting for the database. Query results are fetched before
+    returning, so use the synchronous api for streaming very large results.
+
+    .. code-block:: python
+
+       async with db.connect_async() as connection:
+           count = await connection.count_datasets(expressions)
+    """
+
+    def __init__(self, connection, api_class):
+        """
+        :param connection: :class:`sqlalchemy.ext.asyncio.AsyncConnection`
+        :param api_class: db api class to wrap
+        """
+        self._connection = connection
+        self._api_class = api_class
+
+    async def run(self, fn: Callable[[Any], Any]) -> Any:
+        """
+        Run synchronous code using the db api on this connection.
+
+        :param fn: Called with a db api instance
+        """
+        def run_sync(connection):
+            result = fn(self._api_class(connection))
+            if isinstance(result, Result):
+                return result.fetchall()
+            return result
+
+        return await self._connection.run_sync(run_sync)
+
+    def __getattr__(self, name: str):
+        if name.startswith('_') or not callable(getattr(self._api_class, name)):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self.run(lambda api: getattr(api, name)(*args, **kwargs))
+
+        return call
@@ -59,6 +59,12 @@ class GeoRasterReader(object, metaclass=ABCMeta):
     def nodata(self) -> Optional[Union[int, float]]:
         ...  # pragma: no cover
 
+    @property
+    def overviews(self) -> Optional[List[int]]:
+        """ Decimation factors of available overview levels, ``None`` if unknown.
+        """
+        return None
+
     @abstractmethod
     def read(self,
              window: Optional[RasterWindow] = None,
@@ -8,7 +8,7 @@ from abc import ABCMeta, abstractmethod
 from contextlib import contextmanager
 import numpy as np
 from affine import Affine
-from typing import Tuple, Iterator, Optional, Union
+from typing import Tuple, Iterator, List, Optional, Union
 
 
 RasterShape = Tuple[int, int]                 # pylint: disable=invalid-name
@@ -48,6 +48,12 @@ class GeoRasterReader(object, metaclass=ABCMeta):
     def nodata(self) -> Optional[Union[int, float]]:
         ...  # pragma: no cover
 
+    @property
+    def overviews(self) -> Optional[List[int]]:
+        """ Decimation factors of available overview levels, ``None`` if unknown.
+        """
+        return None
+
     @abstractmethod
     def read(self,
              window: Optional[RasterWindow] = None,
@@ -7,14 +7,17 @@ Core SQL schema settings.
 """
 
 import logging
+import weakref
 
 from datacube.drivers.postgis.sql import (INSTALL_TRIGGER_SQL_TEMPLATE,
                                           SCHEMA_NAME, TYPES_INIT_SQL,
                                           UPDATE_COLUMN_MIGRATE_SQL_TEMPLATE,
                                           ADDED_COLUMN_MIGRATE_SQL_TEMPLATE,
+                                          EXTENT_COLUMN_MIGRATE_SQL,
                                           UPDATE_TIMESTAMP_SQL,
                                           escape_pg_identifier,
-                                          pg_column_exists)
+                                          pg_column_exists,
+                                          pg_exists)
 from sqlalchemy import MetaData
 from sqlalchemy.engine import Engine
 from sqlalchemy.schema import CreateSchema
@@ -37,6 +40,14 @@ METADATA = MetaData(naming_convention=SQL_NAMING_CONVENTIONS, schema=SCHEMA_NAME
 
 _LOG = logging.getLogger(__name__)
 
+# Parts of the schema that older databases only get from `update_schema()`, found per engine
+_SCHEMA_CHECKS: 'weakref.WeakKeyDictionary[Engine, dict]' = weakref.WeakKeyDictionary()
+
+PRODUCT_SUMMARY_GRANTS_SQL = """
+grant insert, update, delete on {schema}.product_summary,
+                                {schema}.product_summary_day to odc_ingest;
+""".format(schema=SCHEMA_NAME)
+
 
 def install_timestamp_trigger(connection):
     from . import _schema
@@ -60,6 +71,16 @@ def install_added_column(connection):
     connection.execute(ADDED_COLUMN_MIGRATE_SQL_TEMPLATE.format(schema=SCHEMA_NAME, table=TABLE_NAME))
 
 
+def install_product_summary_tables(connection):
+    from . import _schema
+    _schema.PRODUCT_SUMMARY.create(connection, checkfirst=True)
+    _schema.PRODUCT_SUMMARY_DAY.create(connection, checkfirst=True)
+    if has_role(connection, 'odc_ingest'):
+        connection.execute(PRODUCT_SUMMARY_GRANTS_SQL)
+        connection.execute("grant select on {schema}.product_summary, {schema}.product_summary_day "
+                           "to odc_user".format(schema=SCHEMA_NAME))
+
+
 def schema_qualified(name):
     """
     >>> schema_qualified('dataset')
@@ -106,6 +127,7 @@ def ensure_db(engine, with_permissions=True):
                 c.execute('set role odc_admin')
             _LOG.info('Creating schema.')
             c.execute(CreateSchema(SCHEMA_NAME))
+            c.execute('create extension if not exists postgis')
             _LOG.info('Creating tables.')
             c.execute(TYPES_INIT_SQL)
             METADATA.create_all(c)
@@ -139,8 +161,12 @@ def ensure_db(engine, with_permissions=True):
         -- Allow creation of indexes, views
         grant create on schema {schema} to odc_manage;
         """.format(schema=SCHEMA_NAME))
+        # (Created by a schema update in older databases, see update_schema())
+        if pg_exists(c, schema_qualified('product_summary')):
+            c.execute(PRODUCT_SUMMARY_GRANTS_SQL)
 
     c.close()
+    _SCHEMA_CHECKS.pop(engine, None)
 
     return is_new
 
@@ -152,6 +178,25 @@ def database_exists(engine):
     return has_schema(engine, engine)
 
 
+def schema_has(connection, table, column=None) -> bool:
+    """
+    Does the database have this table (or column of it)?
+
+    For optional parts of the schema, that older databases only have after an
+    administrator runs ``datacube system init``. Only checked once per engine,
+    until the schema is updated.
+
+    :param table: schema qualified table name
+    """
+    checks = _SCHEMA_CHECKS.setdefault(connection.engine, {})
+    if (table, column) not in checks:
+        if column is None:
+            checks[(table, column)] = pg_exists(connection, table)
+        else:
+            checks[(table, column)] = pg_column_exists(connection, table, column)
+    return checks[(table, column)]
+
+
 def schema_is_latest(engine: Engine) -> bool:
     """
     Is the current schema up-to-date?
@@ -172,7 +217,8 @@ def schema_is_latest(engine: Engine) -> bool:
     #
     # ie. Does the 'archived' column exist? If so, we know the related schema was applied.
 
-    # No schema changes recently. Everything is perfect.
+    # No required schema changes. Dataset extents and product summary tables are used if they exist,
+    # see update_schema()
     return True
 
 
@@ -193,6 +239,7 @@ def update_schema(engine: Engine):
     #    function for some examples.
 
     # Post 1.8 DB Incremental Sync triggers
+    migrated = False
     if not pg_column_exists(engine, schema_qualified('dataset'), 'updated'):
         _LOG.info("Adding 'updated'/'added' fields and triggers to schema.")
         c = engine.connect()
@@ -201,8 +248,32 @@ def update_schema(engine: Engine):
         install_added_column(c)
         c.execute('commit')
         c.close()
-    else:
+        migrated = True
+
+    # Spatial index of dataset extents
+    if not pg_column_exists(engine, schema_qualified('dataset'), 'extent'):
+        _LOG.info("Adding spatially indexed 'extent' column to dataset table.")
+        c = engine.connect()
+        c.execute('begin')
+        c.execute(EXTENT_COLUMN_MIGRATE_SQL)
+        c.execute('commit')
+        c.close()
+        migrated = True
+
+    # Product summaries
+    if not pg_exists(engine, schema_qualified('product_summary')):
+        _LOG.info("Adding product summary tables.")
+        c = engine.connect()
+        c.execute('begin')
+        install_product_summary_tables(c)
+        c.execute('commit')
+        c.close()
+        _LOG.warning("Existing products are not summarised yet, run: datacube product rebuild-summary")
+        migrated = True
+
+    if not migrated:
         _LOG.info("No schema updates required.")
+    _SCHEMA_CHECKS.pop(engine, None)
 
 
 def _ensure_role(engine, name, inherits_from=None, add_user=False, create_db=False):
@@ -11,7 +11,7 @@ from decimal import Decimal
 
 from dateutil import tz
 from psycopg2.extras import NumericRange, DateTimeTZRange
-from sqlalchemy import cast, func, and_
+from sqlalchemy import cast, func, and_, literal, literal_column
 from sqlalchemy.dialects import postgresql as postgres
 from sqlalchemy.dialects.postgresql import INT4RANGE
 from sqlalchemy.dialects.postgresql import NUMRANGE, TSTZRANGE
@@ -20,8 +20,8 @@ from sqlalchemy.sql import ColumnElement
 from datacube import utils
 from datacube.model.fields import Expression, Field
 from datacube.model import Range
-from datacube.utils import get_doc_offset_safe
-from .sql import FLOAT8RANGE
+from datacube.utils import cached_property, get_doc_offset_safe
+from .sql import FLOAT8RANGE, RANGE_CONTAINS, RANGE_OVERLAPS, GEOMETRY
 
 from typing import Any, Callable, Tuple, Union
 
@@ -39,6 +39,12 @@ class PgField(Field):
         self.alchemy_column = alchemy_column
         self.indexed = indexed
 
+    def __getstate__(self):
+        # Cached alchemy_expression is rebuilt when needed
+        state = dict(self.__dict__)
+        state.pop('alchemy_expression', None)
+        return state
+
     @property
     def required_alchemy_table(self):
         return self.alchemy_column.table
@@ -47,6 +53,8 @@ class PgField(Field):
     def alchemy_expression(self):
         """
         Get an SQLAlchemy expression for accessing this field.
+
+        Subclasses cache it, it doesn't change and is used in every query on the field.
         :return:
         """
         raise NotImplementedError('alchemy expression')
@@ -91,7 +99,7 @@ class NativeField(PgField):
         self._expression = alchemy_expression
         self.affects_row_selection = affects_row_selection
 
-    @property
+    @cached_property
     def alchemy_expression(self):
         expression = self._expression if self._expression is not None else self.alchemy_column
         return expression.label(self.name)
@@ -190,7 +198,7 @@ class SimpleDocField(PgDocField):
             )
         self.aggregation = SELECTION_TYPES[selection]
 
-    @property
+    @cached_property
     def alchemy_expression(self):
         return self._alchemy_offset_value(self.offset, self.aggregation.pg_calc)
 
@@ -318,7 +326,7 @@ class RangeDocField(PgDocField):
     def postgres_index_type(self):
         return 'gist'
 
-    @property
+    @cached_property
     def alchemy_expression(self):
         return self.value_to_alchemy((self.lower.alchemy_expression, self.greater.alchemy_expression))
 
@@ -490,8 +498,8 @@ class RangeBetweenExpression(PgExpression):
 
     @property
     def alchemy_expression(self):
-        return self.field.alchemy_expression.overlaps(
-            self._range_class(self.low_value, self.high_value)
+        return self.field.alchemy_expression.operate(
+            RANGE_OVERLAPS, self._range_class(self.low_value, self.high_value)
         )
 
 
@@ -502,7 +510,7 @@ class RangeContainsExpression(PgExpression):
 
     @property
     def alchemy_expression(self):
-        return self.field.alchemy_expression.contains(self.value)
+        return self.field.alchemy_expression.operate(RANGE_CONTAINS, self.value)
 
 
 class EqualsExpression(PgExpression):
@@ -518,6 +526,20 @@ class EqualsExpression(PgExpression):
         return self.field.evaluate(ctx) == self.value
 
 
+class SpatialIntersectsExpression(PgExpression):
+    """
+    Geometry column intersects a polygon, the polygon can be in any CRS.
+    """
+
+    def __init__(self, field, geom):
+        super(SpatialIntersectsExpression, self).__init__(field)
+        self.geom = geom
+
+    @property
+    def alchemy_expression(self):
+        return func.ST_Intersects(self.field.alchemy_column, literal(self.geom, type_=GEOMETRY))
+
+
 def parse_fields(doc, table_column):
     """
     Parse a field spec document into objects.
@@ -596,6 +618,32 @@ def parse_fields(doc, table_column):
     return {name: _get_field(name, descriptor, table_column) for name, descriptor in doc.items()}
 
 
+# Sorts after every real time
+KEYSET_TIME_MAX = literal_column("'infinity'::timestamptz", type_=postgres.TIMESTAMP(timezone=True))
+
+
+def keyset_time_start(time_field):
+    """
+    Start of the time range of datasets (or the time, for a single value field)
+
+    :type time_field: PgDocField
+    """
+    start = time_field.lower if isinstance(time_field, RangeDocField) else time_field
+    return start.alchemy_expression
+
+
+def keyset_time_expression(time_field):
+    """
+    Sort key for paging through datasets in time order: the start of their time range.
+
+    Datasets without a time sort last. Each product has an index of it (with the dataset id),
+    see :func:`_dynamic.check_dynamic_fields`.
+
+    :type time_field: PgDocField
+    """
+    return func.coalesce(keyset_time_start(time_field), KEYSET_TIME_MAX)
+
+
 def _coalesce(*values):
     """
     Return first non-none value.
@@ -9,7 +9,8 @@ Tables for indexing the datasets which were ingested into the AGDC.
 import logging
 
 from sqlalchemy import ForeignKey, UniqueConstraint, PrimaryKeyConstraint, CheckConstraint, SmallInteger
-from sqlalchemy import Table, Column, Integer, String, DateTime
+from sqlalchemy import BigInteger, Boolean, Date, Float
+from sqlalchemy import Table, Column, Integer, String, DateTime, Index
 from sqlalchemy.dialects import postgresql as postgres
 from sqlalchemy.sql import func
 
@@ -83,10 +84,15 @@ DATASET = Table(
     Column('added', DateTime(timezone=True), server_default=func.now(), nullable=False),
     Column('added_by', sql.PGNAME, server_default=func.current_user(), nullable=False),
 
+    # Dataset footprint in lon/lat, for spatial searches. Null when the dataset has no extent.
+    Column('extent', sql.GEOMETRY, default=None, nullable=True),
+
     # Note that the `updated` column is not included here to maintain backwards-compatibility
     # with pre-1.8.3 datacubes (and it is not used by any internal ODC functionality yet anyway)
 )
 
+Index('ix_odc_dataset_extent', DATASET.c.extent, postgresql_using='gist')
+
 DATASET_LOCATION = Table(
     'dataset_location', _core.METADATA,
     Column('id', Integer, primary_key=True, autoincrement=True),
@@ -138,3 +144,41 @@ DATASET_SOURCE = Table(
     # This table is immutable and uses a migrations based `added` column to keep track of new
     # dataset locations being added. The added column defaults to `now()`
 )
+
+# Summary of the active datasets of each product, kept up to date as datasets are added, archived,
+# restored and purged. Products without a row haven't been summarised (yet): see ``rebuild_product_summary()``.
+PRODUCT_SUMMARY = Table(
+    'product_summary', _core.METADATA,
+    #   Typing note: sqlalchemy-stubs doesn't handle this legitimate calling pattern.
+    Column('product_ref', None, ForeignKey(PRODUCT.c.id), primary_key=True),  # type: ignore[call-overload]
+
+    Column('dataset_count', BigInteger, server_default='0', nullable=False),
+
+    # Bounds of the time, lat and lon search fields of the datasets.
+    Column('time_min', DateTime(timezone=True), nullable=True),
+    Column('time_max', DateTime(timezone=True), nullable=True),
+    Column('lat_min', Float, nullable=True),
+    Column('lat_max', Float, nullable=True),
+    Column('lon_min', Float, nullable=True),
+    Column('lon_max', Float, nullable=True),
+
+    # Bounds can only grow incrementally: set when a dataset on the bounds is removed, until the next rebuild.
+    Column('bounds_stale', Boolean, server_default='false', nullable=False),
+
+    # Whether any dataset has a time range that isn't within a single (UTC) day. If not, the
+    # per-day counts below are exact for day-aligned time slices.
+    Column('multi_day', Boolean, server_default='false', nullable=False),
+
+    Column('updated', DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+# Active dataset counts of each summarised product, by the (UTC) day their time range starts.
+PRODUCT_SUMMARY_DAY = Table(
+    'product_summary_day', _core.METADATA,
+    #   Typing note: sqlalchemy-stubs doesn't handle this legitimate calling pattern.
+    Column('product_ref', None, ForeignKey(PRODUCT_SUMMARY.c.product_ref), nullable=False),  # type: ignore[call-overload] # noqa: E501
+    Column('day', Date, nullable=False),
+    Column('dataset_count', BigInteger, nullable=False),
+
+    PrimaryKeyConstraint('product_ref', 'day'),
+)
@@ -6,15 +6,21 @@
 Custom types for postgres & sqlalchemy
 """
 
-from sqlalchemy import TIMESTAMP
+from sqlalchemy import TIMESTAMP, func
 from sqlalchemy.dialects.postgresql.ranges import RangeOperators
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql import sqltypes
+from sqlalchemy.types import UserDefinedType
 from sqlalchemy.sql.expression import Executable, ClauseElement
 from sqlalchemy.sql.functions import GenericFunction
+from sqlalchemy.sql.operators import custom_op
 
 SCHEMA_NAME = 'odc'
 
+# Dataset extents are stored in lon/lat
+EXTENT_CRS = 'EPSG:4326'
+EXTENT_SRID = 4326
+
 
 class CreateView(Executable, ClauseElement):
     inherit_cache = True
@@ -52,6 +58,13 @@ alter table {schema}.{table} add column if not exists added
 timestamptz default now();
 """
 
+EXTENT_COLUMN_MIGRATE_SQL = """
+create extension if not exists postgis;
+alter table {schema}.dataset add column if not exists extent
+geometry(Geometry, {srid}) default null;
+create index if not exists ix_odc_dataset_extent on {schema}.dataset using gist (extent);
+""".format(schema=SCHEMA_NAME, srid=EXTENT_SRID)
+
 INSTALL_TRIGGER_SQL_TEMPLATE = """
 drop trigger if exists row_update_time_{table} on {schema}.{table};
 create trigger row_update_time_{table}
@@ -73,6 +86,12 @@ create type {schema}.float8range as range (
 """.format(schema=SCHEMA_NAME)
 
 
+# Range operators, as in RangeOperators but created only once: custom_op hashes by identity,
+# so a new one for every query would make every query look different to the compiled query cache.
+RANGE_OVERLAPS = custom_op('&&', is_comparison=True)
+RANGE_CONTAINS = custom_op('@>', is_comparison=True)
+
+
 # pylint: disable=abstract-method
 class FLOAT8RANGE(RangeOperators, sqltypes.TypeEngine):
     __visit_name__ = 'FLOAT8RANGE'
@@ -89,13 +108,14 @@ class CommonTimestamp(GenericFunction):
     type = TIMESTAMP(timezone=True)
     package = 'odc'
     identifier = 'common_timestamp'
-    inherit_cache = False
+    inherit_cache = True
 
     name = 'common_timestamp'
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.packagenames = ['%s' % SCHEMA_NAME]
+        # Hashable, so that queries using the function can be cached
+        self.packagenames = (SCHEMA_NAME,)
 
 
 # pylint: disable=too-many-ancestors
@@ -103,13 +123,38 @@ class Float8Range(GenericFunction):
     type = FLOAT8RANGE  # type: ignore[assignment]
     package = 'odc'
     identifier = 'float8range'
-    inherit_cache = False
+    inherit_cache = True
 
     name = 'float8range'
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.packagenames = ['%s' % SCHEMA_NAME]
+        # Hashable, so that queries using the function can be cached
+        self.packagenames = (SCHEMA_NAME,)
+
+
+class GEOMETRY(UserDefinedType):
+    """
+    PostGIS geometry in EPSG:4326.
+
+    Values are :class:`datacube.utils.geometry.Geometry` in any CRS, they are
+    converted to lon/lat when sent to the database.
+    """
+    cache_ok = True
+
+    def get_col_spec(self, **kw):
+        return 'GEOMETRY(Geometry, %d)' % EXTENT_SRID
+
+    def bind_expression(self, bindvalue):
+        return func.ST_GeomFromText(bindvalue, EXTENT_SRID)
+
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None:
+                return None
+            return value.to_crs(EXTENT_CRS, wrapdateline=True).wkt
+
+        return process
 
 
 class PGNAME(sqltypes.Text):
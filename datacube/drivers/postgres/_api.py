@@ -17,20 +17,23 @@ import logging
 import uuid  # noqa: F401
 from sqlalchemy import cast
 from sqlalchemy import delete
-from sqlalchemy import select, text, bindparam, and_, or_, func, literal, distinct
-from sqlalchemy.dialects.postgresql import INTERVAL
+from sqlalchemy import select, text, bindparam, and_, or_, func, literal, literal_column, distinct, union_all
+from sqlalchemy import case, false, null, exists, tuple_, BigInteger, Date, Float
+from sqlalchemy.dialects.postgresql import INTERVAL, TIMESTAMP
 from sqlalchemy.dialects.postgresql import JSONB, insert
 from sqlalchemy.exc import IntegrityError
 from typing import Iterable, Tuple
 
-from datacube.index.exceptions import MissingRecordError
+from datacube.index.exceptions import MissingRecordError, IndexSetupError
 from datacube.index.fields import OrExpression
 from datacube.model import Range
 from . import _core
 from . import _dynamic as dynamic
 from ._fields import parse_fields, Expression, PgField, PgExpression  # noqa: F401
-from ._fields import NativeField, DateDocField, SimpleDocField
+from ._fields import NativeField, DateDocField, SimpleDocField, RangeDocField
+from ._fields import KEYSET_TIME_MAX, keyset_time_expression, keyset_time_start
 from ._schema import DATASET, DATASET_SOURCE, METADATA_TYPE, DATASET_LOCATION, PRODUCT
+from ._schema import PRODUCT_SUMMARY, PRODUCT_SUMMARY_DAY
 from .sql import escape_pg_identifier
 
 
@@ -62,6 +65,74 @@ _DATASET_SELECT_FIELDS = (
 PGCODE_UNIQUE_CONSTRAINT = '23505'
 PGCODE_FOREIGN_KEY_VIOLATION = '23503'
 
+
+def _summary_field_definitions(metadata_type_definition):
+    search_fields = metadata_type_definition['dataset'].get('search_fields', {})
+    return [search_fields.get(name) for name in ('time', 'lat', 'lon')]
+
+
+def _utc_day(timestamp):
+    return cast(func.timezone('UTC', timestamp), Date)
+
+
+def _summary_source(product_id, dataset_fields, dataset_ids=None, archived=False):
+    """
+    Bounds of the time, lat and lon fields of the datasets of a product, for summarising.
+
+    :param dataset_fields: search fields of the product
+    :param dataset_ids: only these datasets (default: all of them)
+    :param archived: archived datasets instead of active ones
+    """
+    columns = []
+    for name, type_ in (('time', TIMESTAMP(timezone=True)), ('lat', Float), ('lon', Float)):
+        field = dataset_fields.get(name)
+        if isinstance(field, RangeDocField):
+            lower, upper = field.lower.alchemy_expression, field.greater.alchemy_expression
+        else:
+            lower = upper = null()
+        columns += [cast(lower, type_).label(name + '_lower'), cast(upper, type_).label(name + '_upper')]
+
+    conditions = [DATASET.c.dataset_type_ref == product_id,
+                  DATASET.c.archived != None if archived else DATASET.c.archived == None]
+    if dataset_ids is not None:
+        conditions.append(DATASET.c.id.in_(dataset_ids))
+    return select(columns).where(and_(*conditions)).alias('summary_source')
+
+
+def _summary_values(source):
+    """
+    Summary table values of the datasets in a :func:`_summary_source`.
+    """
+    return select([
+        func.count().label('dataset_count'),
+        func.min(source.c.time_lower).label('time_min'),
+        func.max(source.c.time_upper).label('time_max'),
+        func.min(source.c.lat_lower).label('lat_min'),
+        func.max(source.c.lat_upper).label('lat_max'),
+        func.min(source.c.lon_lower).label('lon_min'),
+        func.max(source.c.lon_upper).label('lon_max'),
+        # (A missing start or end time is an unbounded time range)
+        func.coalesce(
+            func.bool_or(func.coalesce(_utc_day(source.c.time_lower) != _utc_day(source.c.time_upper), True)),
+            False
+        ).label('multi_day'),
+    ]).alias('summary_values')
+
+
+def _summary_day_counts(product_id, source, sign=1):
+    day = _utc_day(source.c.time_lower)
+    return select([
+        literal(product_id).label('product_ref'),
+        day.label('day'),
+        (func.count() * sign).label('dataset_count'),
+    ]).where(
+        source.c.time_lower != None
+    ).group_by(day)
+
+
+_SUMMARY_VALUE_COLUMNS = ('dataset_count', 'time_min', 'time_max', 'lat_min', 'lat_max', 'lon_min', 'lon_max',
+                          'multi_day')
+
 _LOG = logging.getLogger(__name__)
 
 
@@ -219,6 +290,38 @@ class PostgresDbAPI(object):
         )
         return ret.rowcount > 0
 
+    def insert_datasets(self, values):
+        """
+        Insert many datasets with a single statement, skipping already indexed ones.
+
+        :param values: ``(metadata_doc, dataset_id, product_id)`` for every dataset
+        :return: ids of inserted datasets
+        :rtype: list[uuid.UUID]
+        """
+        if not values:
+            return []
+
+        product_ids = {product_id for _, _, product_id in values}
+        metadata_type_refs = dict(self._connection.execute(
+            select([
+                PRODUCT.c.id, PRODUCT.c.metadata_type_ref
+            ]).where(
+                PRODUCT.c.id.in_(product_ids)
+            )
+        ).fetchall())
+
+        return [r[0] for r in self._connection.execute(
+            insert(DATASET).values([
+                dict(id=dataset_id,
+                     dataset_type_ref=product_id,
+                     metadata_type_ref=metadata_type_refs.get(product_id),
+                     metadata=metadata_doc)
+                for metadata_doc, dataset_id, product_id in values
+            ]).on_conflict_do_nothing(
+                index_elements=['id']
+            ).returning(DATASET.c.id)
+        ).fetchall()]
+
     def update_dataset(self, metadata_doc, dataset_id, product_id):
         """
         Update dataset
@@ -262,6 +365,31 @@ class PostgresDbAPI(object):
 
         return r.rowcount > 0
 
+    def insert_dataset_locations(self, values):
+        """
+        Add many locations with a single statement, skipping already recorded ones.
+
+        Locations of a dataset are added in order, so the last one supplied
+        for a dataset ends up first in its list of uris.
+
+        :param values: ``(dataset_id, uri)`` for every location
+        :return: number of locations added
+        :rtype: int
+        """
+        if not values:
+            return 0
+
+        r = self._connection.execute(
+            insert(DATASET_LOCATION).values([
+                dict(dataset_ref=dataset_id, uri_scheme=scheme, uri_body=body)
+                for dataset_id, (scheme, body) in ((dataset_id, _split_uri(uri))
+                                                   for dataset_id, uri in values)
+            ]).on_conflict_do_nothing(
+                index_elements=['uri_scheme', 'uri_body', 'dataset_ref']
+            )
+        )
+        return r.rowcount
+
     def contains_dataset(self, dataset_id):
         return bool(
             self._connection.execute(
@@ -306,7 +434,13 @@ class PostgresDbAPI(object):
             )
         ).fetchall()
 
-    def all_dataset_ids(self, archived: bool):
+    def all_dataset_ids(self, archived: bool, page_size=None, after=None):
+        """
+        Ids of all archived, or all active, datasets.
+
+        :param page_size: Only return this many ids, in id order
+        :param after: Only ids greater than this, the last id of the previous page
+        """
         query = select(
             DATASET.c.id  # type: ignore[arg-type]
         ).select_from(
@@ -320,6 +454,10 @@ class PostgresDbAPI(object):
             query = query.where(
                 DATASET.c.archived == None
             )
+        if after is not None:
+            query = query.where(DATASET.c.id > after)
+        if page_size is not None:
+            query = query.order_by(DATASET.c.id).limit(page_size)
         return self._connection.execute(query).fetchall()
 
     def insert_dataset_source(self, classifier, dataset_id, source_dataset_id):
@@ -338,6 +476,32 @@ class PostgresDbAPI(object):
                 raise MissingRecordError("Referenced source dataset doesn't exist")
             raise
 
+    def insert_dataset_sources(self, values):
+        """
+        Add many lineage edges with a single statement, skipping already recorded ones.
+
+        :param values: ``(classifier, dataset_id, source_dataset_id)`` for every edge
+        :return: number of edges added
+        :rtype: int
+        """
+        if not values:
+            return 0
+
+        try:
+            r = self._connection.execute(
+                insert(DATASET_SOURCE).values([
+                    dict(classifier=classifier, dataset_ref=dataset_id, source_dataset_ref=source_dataset_id)
+                    for classifier, dataset_id, source_dataset_id in values
+                ]).on_conflict_do_nothing(
+                    index_elements=['classifier', 'dataset_ref']
+                )
+            )
+            return r.rowcount
+        except IntegrityError as e:
+            if e.orig.pgcode == PGCODE_FOREIGN_KEY_VIOLATION:
+                raise MissingRecordError("Referenced source dataset doesn't exist")
+            raise
+
     def archive_dataset(self, dataset_id):
         self._connection.execute(
             DATASET.update().where(
@@ -396,16 +560,54 @@ class PostgresDbAPI(object):
             )
         ).fetchall()
 
-    def get_dataset_sources(self, dataset_id):
+    def get_derived_graph(self, dataset_id, max_depth=None):
+        # recursively build the list of (dataset_ref, source_dataset_ref) pairs of everything derived from
+        # dataset_id, along with how many generations away from dataset_id the dataset_ref is
+        derived = select(
+            [DATASET_SOURCE.c.dataset_ref,
+             DATASET_SOURCE.c.source_dataset_ref,
+             literal_column('1').label('depth')]
+        ).where(
+            DATASET_SOURCE.c.source_dataset_ref == dataset_id
+        ).cte(name="derived", recursive=True)
+
+        next_generation = select(
+            [DATASET_SOURCE.c.dataset_ref,
+             DATASET_SOURCE.c.source_dataset_ref,
+             (derived.c.depth + 1).label('depth')]
+        ).select_from(
+            derived.join(DATASET_SOURCE,
+                         derived.c.dataset_ref == DATASET_SOURCE.c.source_dataset_ref)
+        )
+        if max_depth is not None:
+            next_generation = next_generation.where(derived.c.depth < max_depth)
+        derived = derived.union_all(next_generation)
+
+        # join the pairs with datasets table, one row per pair
+        query = select(
+            _DATASET_SELECT_FIELDS + (derived.c.source_dataset_ref, derived.c.depth)
+        ).select_from(derived.join(DATASET, DATASET.c.id == derived.c.dataset_ref))
+
+        return self._connection.execute(query).fetchall()
+
+    def get_dataset_sources(self, dataset_id, max_depth=None):
         # recursively build the list of (dataset_ref, source_dataset_ref) pairs starting from dataset_id
         # include (dataset_ref, NULL) [hence the left join]
+        # datasets max_depth generations away from dataset_id only get (dataset_ref, NULL)
+        def sources_of(dataset_ref, depth):
+            condition = dataset_ref == DATASET_SOURCE.c.dataset_ref
+            if max_depth is not None:
+                condition = and_(condition, depth < max_depth)
+            return condition
+
         sources = select(
             [DATASET.c.id.label('dataset_ref'),
              DATASET_SOURCE.c.source_dataset_ref,
-             DATASET_SOURCE.c.classifier]
+             DATASET_SOURCE.c.classifier,
+             literal_column('0').label('depth')]
         ).select_from(
             DATASET.join(DATASET_SOURCE,
-                         DATASET.c.id == DATASET_SOURCE.c.dataset_ref,
+                         sources_of(DATASET.c.id, literal_column('0')),
                          isouter=True)
         ).where(
             DATASET.c.id == dataset_id
@@ -415,10 +617,11 @@ class PostgresDbAPI(object):
             select(
                 [sources.c.source_dataset_ref.label('dataset_ref'),
                  DATASET_SOURCE.c.source_dataset_ref,
-                 DATASET_SOURCE.c.classifier]
+                 DATASET_SOURCE.c.classifier,
+                 (sources.c.depth + 1).label('depth')]
             ).select_from(
                 sources.join(DATASET_SOURCE,
-                             sources.c.source_dataset_ref == DATASET_SOURCE.c.dataset_ref,
+                             sources_of(sources.c.source_dataset_ref, sources.c.depth + 1),
                              isouter=True)
             ).where(sources.c.source_dataset_ref != None))
 
@@ -427,12 +630,13 @@ class PostgresDbAPI(object):
         aggd = select(
             [sources.c.dataset_ref,
              func.array_agg(sources.c.source_dataset_ref).label('sources'),
-             func.array_agg(sources.c.classifier).label('classes')]
+             func.array_agg(sources.c.classifier).label('classes'),
+             func.min(sources.c.depth).label('depth')]
         ).group_by(sources.c.dataset_ref).alias('aggd')
 
         # join the adjacency list with datasets table
         query = select(
-            _DATASET_SELECT_FIELDS + (aggd.c.sources, aggd.c.classes)
+            _DATASET_SELECT_FIELDS + (aggd.c.sources, aggd.c.classes, aggd.c.depth)
         ).select_from(aggd.join(DATASET, DATASET.c.id == aggd.c.dataset_ref))
 
         return self._connection.execute(query).fetchall()
@@ -563,6 +767,61 @@ class PostgresDbAPI(object):
                                                   select_fields, with_source_ids, limit)
         return self._connection.execute(select_query)
 
+    @staticmethod
+    def search_datasets_page_query(expressions, page_size, after=None, time_field=None):
+        """
+        One page of active datasets in keyset order: by id, or by (time, id) if a time field is given.
+
+        :type expressions: Tuple[PgExpression]
+        :param page_size: Maximum number of datasets
+        :param after: Sort key of the last dataset of the previous page: id, or (time, id)
+        :param time_field: Order by this time field first
+        :rtype: sqlalchemy.Expression
+        """
+        select_columns = _DATASET_SELECT_FIELDS
+        where_expr = and_(DATASET.c.archived == None, *PostgresDbAPI._alchemify_expressions(expressions))
+        if time_field is None:
+            sort_key = (DATASET.c.id,)
+            if after is not None:
+                where_expr = and_(where_expr, DATASET.c.id > after)
+        else:
+            sort_key = (keyset_time_expression(time_field), DATASET.c.id)
+            # The time of the last dataset is needed for the next page
+            select_columns += (keyset_time_start(time_field).label('keyset_time'),)
+            if after is not None:
+                after_time, after_id = after
+                after_key = (
+                    KEYSET_TIME_MAX if after_time is None else literal(after_time, type_=KEYSET_TIME_MAX.type),
+                    literal(after_id, type_=DATASET.c.id.type),
+                )
+                # A row comparison, so the (time, id) index can be used
+                where_expr = and_(where_expr, tuple_(*sort_key) > tuple_(*after_key))
+
+        return (
+            select(
+                select_columns
+            ).select_from(
+                PostgresDbAPI._from_expression(DATASET, expressions)
+            ).where(
+                where_expr
+            ).order_by(
+                *sort_key
+            ).limit(
+                page_size
+            )
+        )
+
+    def search_datasets_page(self, expressions, page_size, after=None, time_field=None):
+        """
+        Keyset paginated dataset search, see :meth:`search_datasets_page_query`.
+
+        Pages are stable while datasets are added and archived, and each is a quick index scan
+        however far into the results it is.
+        """
+        return self._connection.execute(
+            self.search_datasets_page_query(expressions, page_size, after=after, time_field=time_field)
+        ).fetchall()
+
     @staticmethod
     def search_unique_datasets_query(expressions, select_fields, limit):
         """
@@ -679,24 +938,30 @@ class PostgresDbAPI(object):
 
         return self._connection.scalar(select_query)
 
-    def count_datasets_through_time(self, start, end, period, time_field, expressions):
+    def count_datasets_through_time(self, start, end, period, time_field, expressions, summary_product_id=None):
         """
         :type period: str
         :type start: datetime.datetime
         :type end: datetime.datetime
         :type expressions: tuple[datacube.drivers.postgres._fields.PgExpression]
+        :param summary_product_id: product whose summary may be used for the counts.
+            (only if the expressions select nothing but that product)
         :rtype: list[((datetime.datetime, datetime.datetime), int)]
         """
 
+        if not self.has_product_summaries:
+            summary_product_id = None
         results = self._connection.execute(
-            self.count_datasets_through_time_query(start, end, period, time_field, expressions)
+            self.count_datasets_through_time_query(start, end, period, time_field, expressions,
+                                                   summary_product_id=summary_product_id)
         )
 
         for time_period, dataset_count in results:
             # if not time_period.upper_inf:
             yield Range(time_period.lower, time_period.upper), dataset_count
 
-    def count_datasets_through_time_query(self, start, end, period, time_field, expressions):
+    def count_datasets_through_time_query(self, start, end, period, time_field, expressions,
+                                          summary_product_id=None):
         raw_expressions = self._alchemify_expressions(expressions)
 
         start_times = select((
@@ -735,7 +1000,216 @@ class PostgresDbAPI(object):
             )
         )
 
-        return select((time_ranges.c.time_period, count_query.label('dataset_count')))
+        if summary_product_id is None:
+            return select((time_ranges.c.time_period, count_query.label('dataset_count')))
+
+        # Slices of whole (UTC) days are a sum of the per-day counts of the product summary, unless
+        # there are datasets spanning more than a day.
+        slice_start = func.timezone('UTC', func.lower(time_ranges.c.time_period))
+        slice_end = func.timezone('UTC', func.upper(time_ranges.c.time_period))
+        day_counts = select([
+            cast(func.coalesce(func.sum(PRODUCT_SUMMARY_DAY.c.dataset_count), 0), BigInteger)
+        ]).where(
+            and_(
+                PRODUCT_SUMMARY_DAY.c.product_ref == summary_product_id,
+                PRODUCT_SUMMARY_DAY.c.day >= cast(slice_start, Date),
+                PRODUCT_SUMMARY_DAY.c.day < cast(slice_end, Date),
+            )
+        )
+        use_summary = and_(
+            func.date_trunc('day', slice_start) == slice_start,
+            func.date_trunc('day', slice_end) == slice_end,
+            exists().where(
+                and_(
+                    PRODUCT_SUMMARY.c.product_ref == summary_product_id,
+                    ~PRODUCT_SUMMARY.c.multi_day,
+                )
+            ),
+        )
+        return select((
+            time_ranges.c.time_period,
+            case(
+                [(use_summary, day_counts.scalar_subquery())],
+                else_=count_query.scalar_subquery()
+            ).label('dataset_count')
+        ))
+
+    def get_dataset_product_ids(self, dataset_ids):
+        """
+        Products of the given datasets.
+
+        :rtype: list[int]
+        """
+        return [r[0] for r in self._connection.execute(
+            select([
+                distinct(DATASET.c.dataset_type_ref)
+            ]).where(
+                DATASET.c.id.in_(dataset_ids)
+            )
+        ).fetchall()]
+
+    @property
+    def has_product_summaries(self):
+        """
+        Does the database have product summary tables? (Older ones get them from ``datacube system init``)
+        """
+        return _core.schema_has(self._connection, PRODUCT_SUMMARY.fullname)
+
+    def get_product_summary(self, product_id):
+        """
+        The stored summary of a product's active datasets, if it has one.
+
+        Dataset counts are exact, but the time, lat and lon bounds may be too wide when ``bounds_stale``.
+        """
+        if not self.has_product_summaries:
+            return None
+        return self._connection.execute(
+            PRODUCT_SUMMARY.select().where(PRODUCT_SUMMARY.c.product_ref == product_id)
+        ).first()
+
+    def calculate_product_summary(self, product_id, dataset_fields):
+        """
+        Summarise a product's active datasets from scratch, without storing it.
+
+        :param dataset_fields: search fields of the product
+        :return: row with the values of a product summary
+        """
+        return self._connection.execute(
+            select([_summary_values(_summary_source(product_id, dataset_fields))])
+        ).first()
+
+    def rebuild_product_summary(self, product_id, dataset_fields):
+        """
+        Summarise a product's active datasets from scratch, and store it.
+
+        Changes to other product summaries (and so adding, archiving etc. of datasets)
+        wait for the transaction to finish.
+
+        :param dataset_fields: search fields of the product
+        """
+        if not self._connection.in_transaction():
+            raise RuntimeError('Must rebuild product summaries in transaction')
+        if not self.has_product_summaries:
+            raise IndexSetupError('No product summary tables, an administrator must run: datacube system init')
+
+        # Concurrent dataset changes are either committed before the lock is granted, and
+        # summarised below, or adjust the new summary after the transaction.
+        self._connection.execute(text(
+            'lock table {} in share row exclusive mode'.format(PRODUCT_SUMMARY.fullname)
+        ))
+
+        source = _summary_source(product_id, dataset_fields)
+        values = _summary_values(source)
+        insert_summary = insert(PRODUCT_SUMMARY).from_select(
+            ('product_ref',) + _SUMMARY_VALUE_COLUMNS + ('bounds_stale', 'updated'),
+            select(
+                [literal(product_id)] + [values.c[name] for name in _SUMMARY_VALUE_COLUMNS] + [false(), func.now()]
+            )
+        )
+        self._connection.execute(
+            insert_summary.on_conflict_do_update(
+                index_elements=['product_ref'],
+                set_={name: insert_summary.excluded[name]
+                      for name in _SUMMARY_VALUE_COLUMNS + ('bounds_stale', 'updated')}
+            )
+        )
+
+        self._connection.execute(
+            PRODUCT_SUMMARY_DAY.delete().where(PRODUCT_SUMMARY_DAY.c.product_ref == product_id)
+        )
+        self._connection.execute(
+            insert(PRODUCT_SUMMARY_DAY).from_select(
+                ['product_ref', 'day', 'dataset_count'],
+                _summary_day_counts(product_id, source)
+            )
+        )
+
+    def update_product_summary(self, product_id, dataset_fields, dataset_ids, archived=False, removed=False):
+        """
+        Add datasets to the summary of their product, or remove them from it. (if it has one)
+
+        Datasets must still be in the state they are in the summary: so call after adding datasets,
+        but before archiving, restoring or deleting them.
+
+        Updates the product's summary row, which stays locked until the transaction ends: other
+        transactions changing datasets of the product wait for it, so call it late in the transaction
+        and once for many datasets.
+
+        :param dataset_fields: search fields of the product
+        :param dataset_ids: datasets that change (any not in the product are ignored)
+        :param archived: whether the datasets are currently archived
+        :param removed: whether they stop being active, rather than become active
+        """
+        if not self.has_product_summaries:
+            return
+        source = _summary_source(product_id, dataset_fields, dataset_ids, archived=archived)
+        change = _summary_values(source)
+        summary = PRODUCT_SUMMARY.c
+        if removed:
+            values = dict(
+                dataset_count=summary.dataset_count - change.c.dataset_count,
+                # Bounds shrink when removing datasets on them, but finding out how far takes a rebuild.
+                bounds_stale=or_(summary.bounds_stale, func.coalesce(or_(
+                    change.c.time_min <= summary.time_min, change.c.time_max >= summary.time_max,
+                    change.c.lat_min <= summary.lat_min, change.c.lat_max >= summary.lat_max,
+                    change.c.lon_min <= summary.lon_min, change.c.lon_max >= summary.lon_max,
+                ), False)),
+            )
+        else:
+            values = dict(
+                dataset_count=summary.dataset_count + change.c.dataset_count,
+                time_min=func.least(summary.time_min, change.c.time_min),
+                time_max=func.greatest(summary.time_max, change.c.time_max),
+                lat_min=func.least(summary.lat_min, change.c.lat_min),
+                lat_max=func.greatest(summary.lat_max, change.c.lat_max),
+                lon_min=func.least(summary.lon_min, change.c.lon_min),
+                lon_max=func.greatest(summary.lon_max, change.c.lon_max),
+                multi_day=or_(summary.multi_day, change.c.multi_day),
+            )
+
+        res = self._connection.execute(
+            PRODUCT_SUMMARY.update().where(
+                and_(summary.product_ref == product_id, change.c.dataset_count > 0)
+            ).values(
+                updated=func.now(),
+                **values
+            )
+        )
+        if res.rowcount == 0:
+            # Not summarised, or nothing changed
+            return
+
+        insert_days = insert(PRODUCT_SUMMARY_DAY).from_select(
+            ['product_ref', 'day', 'dataset_count'],
+            _summary_day_counts(product_id, source, sign=-1 if removed else 1)
+        )
+        self._connection.execute(
+            insert_days.on_conflict_do_update(
+                index_elements=['product_ref', 'day'],
+                set_={'dataset_count': PRODUCT_SUMMARY_DAY.c.dataset_count + insert_days.excluded.dataset_count}
+            )
+        )
+        if removed:
+            self._connection.execute(
+                PRODUCT_SUMMARY_DAY.delete().where(
+                    and_(PRODUCT_SUMMARY_DAY.c.product_ref == product_id, PRODUCT_SUMMARY_DAY.c.dataset_count <= 0)
+                )
+            )
+
+    def delete_product_summaries(self, product_ids):
+        """
+        Forget the summaries of products, until they are rebuilt.
+
+        :param product_ids: ids, or a select of them
+        """
+        if not self.has_product_summaries:
+            return
+        self._connection.execute(
+            PRODUCT_SUMMARY_DAY.delete().where(PRODUCT_SUMMARY_DAY.c.product_ref.in_(product_ids))
+        )
+        self._connection.execute(
+            PRODUCT_SUMMARY.delete().where(PRODUCT_SUMMARY.c.product_ref.in_(product_ids))
+        )
 
     @staticmethod
     def _from_expression(source_table, expressions=None, fields=None):
@@ -793,6 +1267,10 @@ class PostgresDbAPI(object):
 
         type_id = res.inserted_primary_key[0]
 
+        # A new product has nothing to summarise yet.
+        if self.has_product_summaries:
+            self._connection.execute(PRODUCT_SUMMARY.insert().values(product_ref=type_id))
+
         # Initialise search fields.
         self._setup_product_fields(type_id, name, search_fields, definition['metadata'],
                                    concurrently=concurrently)
@@ -826,6 +1304,8 @@ class PostgresDbAPI(object):
                     metadata_type_ref=metadata_type_id,
                 )
             )
+            # Summarised fields may be different now
+            self.delete_product_summaries([type_id])
 
         # Initialise search fields.
         self._setup_product_fields(type_id, name, search_fields, definition['metadata'],
@@ -848,6 +1328,9 @@ class PostgresDbAPI(object):
         )
 
     def update_metadata_type(self, name, definition, concurrently=False):
+        old_definition = self._connection.scalar(
+            select([METADATA_TYPE.c.definition]).where(METADATA_TYPE.c.name == name)
+        )
         res = self._connection.execute(
             METADATA_TYPE.update().returning(METADATA_TYPE.c.id).where(
                 METADATA_TYPE.c.name == name
@@ -858,6 +1341,11 @@ class PostgresDbAPI(object):
         )
         type_id = res.first()[0]
 
+        if _summary_field_definitions(old_definition) != _summary_field_definitions(definition):
+            self.delete_product_summaries(
+                select([PRODUCT.c.id]).where(PRODUCT.c.metadata_type_ref == type_id)
+            )
+
         search_fields = get_dataset_fields(definition)
         self._setup_metadata_type_fields(
             type_id, name, search_fields,
@@ -943,6 +1431,30 @@ class PostgresDbAPI(object):
     def get_all_metadata_types(self):
         return self._connection.execute(METADATA_TYPE.select().order_by(METADATA_TYPE.c.name.asc())).fetchall()
 
+    def get_catalogue_version(self):
+        """
+        Cheap fingerprint of the metadata type and product tables.
+
+        It changes whenever a metadata type or product is added, updated or removed.
+        Databases without the ``updated`` column (before ``datacube system init`` adds it)
+        only notice additions and removals.
+        """
+        # `updated` is maintained by a trigger and not part of the table definitions
+        has_updated = all(_core.schema_has(self._connection, table.fullname, 'updated')
+                          for table in (METADATA_TYPE, PRODUCT))
+
+        def _table_version(table):
+            columns = [literal(table.name), func.count(), func.max(table.c.id)]
+            if has_updated:
+                columns.append(func.max(func.greatest(table.c.added, literal_column('updated'))))
+            return select(columns).select_from(table)
+
+        return tuple(sorted(
+            tuple(row)
+            for row in self._connection.execute(union_all(_table_version(METADATA_TYPE),
+                                                          _table_version(PRODUCT)))
+        ))
+
     def get_locations(self, dataset_id):
         return [
             record[0]
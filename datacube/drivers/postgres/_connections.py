@@ -12,11 +12,12 @@
 """
 Postgres connection and setup
 """
+import functools
 import json
 import logging
 import os
 import re
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 from typing import Callable, Optional, Union
 
 from sqlalchemy import event, create_engine, text
@@ -24,6 +25,7 @@ from sqlalchemy.engine import Engine
 from sqlalchemy.engine.url import URL as EngineUrl  # noqa: N811
 
 import datacube
+from datacube.drivers._async import AsyncDbAPI, create_async_engine
 from datacube.index.exceptions import IndexSetupError
 from datacube.utils import jsonify_document
 
@@ -44,6 +46,8 @@ except (ImportError, KeyError):
 DEFAULT_DB_PORT = 5432
 DEFAULT_IAM_AUTH = False
 DEFAULT_IAM_TIMEOUT = 600
+DEFAULT_FETCH_SIZE = 1000
+DEFAULT_CATALOGUE_TTL = 60.0
 
 
 class PostgresDb(object):
@@ -63,10 +67,16 @@ class PostgresDb(object):
 
     driver_name = 'postgres'   # Mostly to support parametised tests
 
-    def __init__(self, engine):
+    def __init__(self, engine, fetch_size=DEFAULT_FETCH_SIZE, catalogue_ttl=DEFAULT_CATALOGUE_TTL,
+                 async_engine_factory=None):
         # We don't recommend using this constructor directly as it may change.
         # Use static methods PostgresDb.create() or PostgresDb.from_config()
         self._engine = engine
+        self._fetch_size = fetch_size
+        self._catalogue_ttl = catalogue_ttl
+        self._async_engine = None
+        self._async_engine_factory = (async_engine_factory or
+                                      functools.partial(self._create_async_engine, engine.url))
 
     @classmethod
     def from_config(cls, config, application_name=None, validate_connection=True):
@@ -83,6 +93,8 @@ class PostgresDb(object):
             iam_rds_auth=bool(config.get("db_iam_authentication", DEFAULT_IAM_AUTH)),
             iam_rds_timeout=int(config.get("db_iam_timeout", DEFAULT_IAM_TIMEOUT)),
             pool_timeout=int(config.get('db_connection_timeout', 60)),
+            fetch_size=int(config.get('db_fetch_size', DEFAULT_FETCH_SIZE)),
+            catalogue_ttl=float(config.get('db_catalogue_ttl', DEFAULT_CATALOGUE_TTL)),
             # pass config?
         )
 
@@ -91,18 +103,20 @@ class PostgresDb(object):
                application_name=None, validate=True,
                iam_rds_auth=False, iam_rds_timeout=600,
                # pass config?
-               pool_timeout=60):
+               pool_timeout=60,
+               fetch_size=DEFAULT_FETCH_SIZE,
+               catalogue_ttl=DEFAULT_CATALOGUE_TTL):
         mk_url = getattr(EngineUrl, 'create', EngineUrl)
-        engine = cls._create_engine(
-            mk_url(
-                'postgresql',
-                host=hostname, database=database, port=port,
-                username=username, password=password,
-            ),
-            application_name=application_name,
-            iam_rds_auth=iam_rds_auth,
-            iam_rds_timeout=iam_rds_timeout,
-            pool_timeout=pool_timeout)
+        url = mk_url(
+            'postgresql',
+            host=hostname, database=database, port=port,
+            username=username, password=password,
+        )
+        engine_args = dict(application_name=application_name,
+                           iam_rds_auth=iam_rds_auth,
+                           iam_rds_timeout=iam_rds_timeout,
+                           pool_timeout=pool_timeout)
+        engine = cls._create_engine(url, **engine_args)
         if validate:
             if not _core.database_exists(engine):
                 raise IndexSetupError('\n\nNo DB schema exists. Have you run init?\n\t{init_command}'.format(
@@ -115,7 +129,8 @@ class PostgresDb(object):
                     'An administrator must run init:\n\t{init_command}'.format(
                         init_command='datacube -v system init'
                     ))
-        return PostgresDb(engine)
+        return PostgresDb(engine, fetch_size=fetch_size, catalogue_ttl=catalogue_ttl,
+                          async_engine_factory=functools.partial(cls._create_async_engine, url, **engine_args))
 
     @staticmethod
     def _create_engine(url, application_name=None, iam_rds_auth=False, iam_rds_timeout=600, pool_timeout=60):
@@ -141,10 +156,38 @@ class PostgresDb(object):
 
         return engine
 
+    @staticmethod
+    def _create_async_engine(url, application_name=None, iam_rds_auth=False, iam_rds_timeout=600, pool_timeout=60):
+        engine = create_async_engine(url,
+                                     json_serializer=_to_json,
+                                     application_name=application_name,
+                                     pool_timeout=pool_timeout)
+
+        if iam_rds_auth:
+            from datacube.utils.aws import obtain_new_iam_auth_token
+            handle_dynamic_token_authentication(engine.sync_engine, obtain_new_iam_auth_token,
+                                                timeout=iam_rds_timeout, url=url)
+
+        return engine
+
     @property
     def url(self) -> EngineUrl:
         return self._engine.url
 
+    @property
+    def catalogue_ttl(self) -> float:
+        """
+        Seconds between checks for metadata type and product changes made by other processes.
+        """
+        return self._catalogue_ttl
+
+    @property
+    def fetch_size(self) -> int:
+        """
+        Number of rows to read at a time from large query results.
+        """
+        return self._fetch_size
+
     @staticmethod
     def get_db_username(config):
         try:
@@ -167,6 +210,13 @@ class PostgresDb(object):
         """
         self._engine.dispose()
 
+    async def close_async(self):
+        """
+        Close any idle connections in the async connection pool.
+        """
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+
     @classmethod
     def _expand_app_name(cls, application_name):
         """
@@ -252,6 +302,56 @@ class PostgresDb(object):
             finally:
                 connection.close()
 
+    @contextmanager
+    def stream(self):
+        """
+        Borrow a connection for reading large query results.
+
+        Like :meth:`connect`, but query results are read through a named server-side
+        cursor, ``fetch_size`` rows at a time, rather than being loaded into client
+        memory all at once. Named cursors only live within a transaction, so the
+        connection is in a (read committed) transaction until the context exits.
+
+        (Only use for queries, don't share an instance between threads)
+
+        :rtype: PostgresDbAPI
+        """
+        with self._engine.connect() as connection:
+            connection = connection.execution_options(isolation_level='READ COMMITTED',
+                                                      stream_results=True,
+                                                      max_row_buffer=self._fetch_size)
+            with connection.begin():
+                yield _api.PostgresDbAPI(connection)
+
+    @property
+    def async_engine(self):
+        """
+        Engine for async access, with its own pool of asyncpg connections.
+
+        Created on first use (requires asyncpg).
+
+        :rtype: sqlalchemy.ext.asyncio.AsyncEngine
+        """
+        if self._async_engine is None:
+            self._async_engine = self._async_engine_factory()
+        return self._async_engine
+
+    @asynccontextmanager
+    async def connect_async(self):
+        """
+        Borrow a connection from the async connection pool.
+
+        Same as :meth:`connect`, but every method of the returned api is a coroutine
+        that doesn't block the event loop while waiting on the database:
+
+            async with db.connect_async() as connection:
+                dataset = await connection.get_dataset(id_)
+
+        :rtype: datacube.drivers._async.AsyncDbAPI
+        """
+        async with self.async_engine.connect() as connection:
+            yield AsyncDbAPI(connection, _api.PostgresDbAPI)
+
     def give_me_a_connection(self):
         return self._engine.connect()
 
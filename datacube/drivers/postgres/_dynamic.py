@@ -12,6 +12,7 @@ from sqlalchemy import Index
 from sqlalchemy import select
 
 from ._core import schema_qualified
+from ._fields import keyset_time_expression
 from ._schema import DATASET, PRODUCT, METADATA_TYPE
 from .sql import pg_exists, CreateView
 
@@ -109,10 +110,38 @@ def check_dynamic_fields(conn, concurrently, dataset_filter, excluded_field_name
             concurrently=concurrently,
             replace_existing=rebuild_indexes,
         )
+    # Paging through datasets in time order
+    if 'time' in fields:
+        _check_keyset_index(conn, fields['time'], name, dataset_filter,
+                            concurrently=concurrently, replace_existing=rebuild_indexes)
+
     # A view of all fields
     _ensure_view(conn, fields, name, rebuild_view, dataset_filter)
 
 
+def _check_keyset_index(conn, time_field, name_prefix, filter_expression,
+                        concurrently=False, replace_existing=False):
+    """
+    Check the index for paging through datasets by (time, id), add it if needed
+    """
+    index_name = 'dix_{prefix}_time_keyset'.format(prefix=name_prefix.lower())
+    index = Index(
+        index_name,
+        keyset_time_expression(time_field),
+        DATASET.c.id,
+        postgresql_where=filter_expression,
+        postgresql_concurrently=concurrently
+    )
+    exists = pg_exists(conn, schema_qualified(index_name))
+    if exists and replace_existing:
+        _LOG.debug('Dropping index: %s (replace=%r)', index_name, replace_existing)
+        index.drop(conn)
+        exists = False
+    if not exists:
+        _LOG.info('Creating index: %s', index_name)
+        index.create(conn)
+
+
 def _check_field_index(conn, fields, name_prefix, filter_expression,
                        should_exist=True, concurrently=False,
                        replace_existing=False, index_type=None):
@@ -12,6 +12,7 @@ from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql import sqltypes
 from sqlalchemy.sql.expression import Executable, ClauseElement
 from sqlalchemy.sql.functions import GenericFunction
+from sqlalchemy.sql.operators import custom_op
 
 SCHEMA_NAME = 'agdc'
 
@@ -73,6 +74,12 @@ create type {schema}.float8range as range (
 """.format(schema=SCHEMA_NAME)
 
 
+# Range operators, as in RangeOperators but created only once: custom_op hashes by identity,
+# so a new one for every query would make every query look different to the compiled query cache.
+RANGE_OVERLAPS = custom_op('&&', is_comparison=True)
+RANGE_CONTAINS = custom_op('@>', is_comparison=True)
+
+
 # pylint: disable=abstract-method
 class FLOAT8RANGE(RangeOperators, sqltypes.TypeEngine):
     __visit_name__ = 'FLOAT8RANGE'
@@ -89,13 +96,14 @@ class CommonTimestamp(GenericFunction):
     type = TIMESTAMP(timezone=True)
     package = 'agdc'
     identifier = 'common_timestamp'
-    inherit_cache = False
+    inherit_cache = True
 
     name = 'common_timestamp'
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.packagenames = ['%s' % SCHEMA_NAME]
+        # Hashable, so that queries using the function can be cached
+        self.packagenames = (SCHEMA_NAME,)
 
 
 # pylint: disable=too-many-ancestors
@@ -103,13 +111,14 @@ class Float8Range(GenericFunction):
     type = FLOAT8RANGE  # type: ignore[assignment]
     package = 'agdc'
     identifier = 'float8range'
-    inherit_cache = False
+    inherit_cache = True
 
     name = 'float8range'
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.packagenames = ['%s' % SCHEMA_NAME]
+        # Hashable, so that queries using the function can be cached
+        self.packagenames = (SCHEMA_NAME,)
 
 
 class PGNAME(sqltypes.Text):
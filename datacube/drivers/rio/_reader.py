@@ -4,6 +4,9 @@
 # SPDX-License-Identifier: Apache-2.0
 """ reader
 """
+import weakref
+from collections import OrderedDict
+from threading import Lock
 from typing import (
     List, Optional, Union, Any, Iterable,
     Tuple, NamedTuple, TypeVar
@@ -38,6 +41,8 @@ Overrides = NamedTuple('Overrides', [('crs', Optional[CRS]),
 RioWindow = Tuple[Tuple[int, int], Tuple[int, int]]  # pylint: disable=invalid-name
 T = TypeVar('T')
 
+DEFAULT_MAX_OPEN_FILES = 64
+
 
 def pick(a: Optional[T], b: Optional[T]) -> Optional[T]:
     """ Return first non-None value or None if all are None
@@ -83,13 +88,131 @@ def _dc_crs(crs: Optional[rasterio.crs.CRS]) -> Optional[CRS]:
     return CRS(crs.wkt)
 
 
-def _read(src: DatasetReader,
+class _OpenFile:
+    """ Open rasterio file handle plus a lock guarding reads from it.
+
+    Also counts its users (readers and their pending reads), so that a handle
+    evicted from :class:`RIOFileCache` can be closed once the last one is done.
+    """
+    __slots__ = ('src', 'lock', '_users', '_unused_close', '_users_lock')
+
+    def __init__(self, src: DatasetReader):
+        self.src = src
+        self.lock = Lock()
+        self._users = 0
+        self._unused_close = False
+        self._users_lock = Lock()
+
+    def acquire(self) -> '_OpenFile':
+        with self._users_lock:
+            self._users += 1
+        return self
+
+    def release(self) -> None:
+        with self._users_lock:
+            self._users -= 1
+            close = self._unused_close and self._users == 0
+        if close:
+            self._close()
+
+    def close_when_unused(self) -> None:
+        """ Close now, or once the last user releases the handle.
+        """
+        with self._users_lock:
+            self._unused_close = True
+            close = self._users == 0
+        if close:
+            self._close()
+
+    def _close(self) -> None:
+        with self.lock:
+            self.src.close()
+
+
+class RIOFileCache:
+    """ LRU cache of open rasterio file handles, keyed by normalised uri.
+
+    This is the load context of :class:`RIORdrDriver`. Bands that live in the
+    same file (multi-band files, or the same file loaded again by a later
+    ``dc.load`` that recycled this context) share one open handle instead of
+    re-opening the file for every band.
+
+    Handles evicted to stay within ``max_size`` are dropped from the cache, and
+    closed once no reader handed out earlier is using them any more.
+    :meth:`close` closes every handle still in the cache.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_OPEN_FILES):
+        if max_size < 1:
+            raise ValueError("File cache size should be at least 1")
+        self._max_size = max_size
+        self._cache: 'OrderedDict[str, _OpenFile]' = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self._cache
+
+    def checkout(self, uri: str) -> _OpenFile:
+        """ Return cached handle for ``uri``, opening the file if needed.
+
+        The handle is acquired for the caller, who has to release it when done.
+        """
+        with self._lock:
+            f = self._cache.get(uri, None)
+            if f is not None:
+                self._cache.move_to_end(uri)
+                return f.acquire()
+
+        # Open without holding the lock, this can be slow for remote files
+        f = _OpenFile(rasterio.open(uri, 'r'))
+
+        with self._lock:
+            existing = self._cache.get(uri, None)
+            if existing is not None:
+                # Somebody else opened the same file concurrently, use theirs
+                self._cache.move_to_end(uri)
+                f.src.close()
+                return existing.acquire()
+
+            self._cache[uri] = f.acquire()
+            evicted = [self._cache.popitem(last=False)[1]
+                       for _ in range(len(self._cache) - self._max_size)]
+
+        for old in evicted:
+            old.close_when_unused()
+        return f
+
+    def close(self) -> None:
+        """ Close all cached file handles and empty the cache.
+        """
+        with self._lock:
+            ff = list(self._cache.values())
+            self._cache.clear()
+
+        for f in ff:
+            with f.lock:
+                f.src.close()
+
+
+def _read(f: _OpenFile,
           bidx: int,
           window: Optional[RasterWindow],
           out_shape: Optional[RasterShape]) -> np.ndarray:
-    return src.read(bidx,
-                    window=_roi_to_window(window, src.shape),
-                    out_shape=out_shape)
+    src = f.src
+    try:
+        with f.lock:
+            return src.read(bidx,
+                            window=_roi_to_window(window, src.shape),
+                            out_shape=out_shape)
+    finally:
+        f.release()
 
 
 def _rio_uri(band: BandInfo) -> str:
@@ -128,15 +251,20 @@ def _rio_band_idx(band: BandInfo, src: DatasetReader) -> int:
 
 class RIOReader(GeoRasterReader):
     def __init__(self,
-                 src: DatasetReader,
+                 src: Union[DatasetReader, _OpenFile],
                  band_idx: int,
                  pool: ThreadPoolExecutor,
                  overrides: Overrides = Overrides(None, None, None)):
 
+        # Takes over an acquired handle, released when this reader is garbage collected
+        f = src if isinstance(src, _OpenFile) else _OpenFile(src).acquire()
+        src = f.src
+
         transform = pick(overrides.transform, src.transform)
         if transform is not None and transform.is_identity:
             transform = None
 
+        self._file = f
         self._src = src
         self._crs = overrides.crs or _dc_crs(src.crs)
         self._transform = transform
@@ -144,6 +272,7 @@ class RIOReader(GeoRasterReader):
         self._band_idx = band_idx
         self._dtype = src.dtypes[band_idx-1]
         self._pool = pool
+        weakref.finalize(self, f.release)
 
     @property
     def crs(self) -> Optional[CRS]:
@@ -165,10 +294,20 @@ class RIOReader(GeoRasterReader):
     def nodata(self) -> Optional[Union[int, float]]:
         return self._nodata
 
+    @property
+    def overviews(self) -> List[int]:
+        with self._file.lock:
+            return self._src.overviews(self._band_idx)
+
     def read(self,
              window: Optional[RasterWindow] = None,
              out_shape: Optional[RasterShape] = None) -> FutureNdarray:
-        return self._pool.submit(_read, self._src, self._band_idx, window, out_shape)
+        f = self._file.acquire()
+        try:
+            return self._pool.submit(_read, f, self._band_idx, window, out_shape)
+        except Exception:
+            f.release()
+            raise
 
 
 def _compute_overrides(src: DatasetReader, bi: BandInfo) -> Overrides:
@@ -191,15 +330,24 @@ def _compute_overrides(src: DatasetReader, bi: BandInfo) -> Overrides:
 def _rdr_open(band: BandInfo, ctx: Any, pool: ThreadPoolExecutor) -> RIOReader:
     """ Open file pointed by BandInfo and return RIOReader instance.
 
-        raises Exception on failure
+        When ``ctx`` is a :class:`RIOFileCache` file handles are taken from it.
 
-        TODO: start using ctx for handle cache
+        raises Exception on failure
     """
     normalised_uri = _rio_uri(band)
-    src = rasterio.open(normalised_uri, 'r')
-    bidx = _rio_band_idx(band, src)
+    if isinstance(ctx, RIOFileCache):
+        f = ctx.checkout(normalised_uri)
+    else:
+        f = _OpenFile(rasterio.open(normalised_uri, 'r')).acquire()
 
-    return RIOReader(src, bidx, pool, _compute_overrides(src, band))
+    # Handle can be shared with readers of other bands, that read from it concurrently
+    try:
+        with f.lock:
+            bidx = _rio_band_idx(band, f.src)
+            return RIOReader(f, bidx, pool, _compute_overrides(f.src, band))
+    except Exception:
+        f.release()
+        raise
 
 
 class RIORdrDriver(ReaderDriver):
@@ -210,7 +358,19 @@ class RIORdrDriver(ReaderDriver):
     def new_load_context(self,
                          bands: Iterable[BandInfo],
                          old_ctx: Optional[Any]) -> Any:
-        return None  # TODO: implement file handle cache with this
+        """ Return file handle cache, re-using ``old_ctx`` when it is compatible.
+
+        Recycling the previous context keeps files opened by the previous load
+        available to this one.
+        """
+        max_size = self._cfg.get('max_open_files', DEFAULT_MAX_OPEN_FILES)
+
+        if isinstance(old_ctx, RIOFileCache):
+            if old_ctx.max_size == max_size:
+                return old_ctx
+            old_ctx.close()
+
+        return RIOFileCache(max_size)
 
     def open(self, band: BandInfo, ctx: Any) -> FutureGeoRasterReader:
         return self._pool.submit(_rdr_open, band, ctx, self._pool)
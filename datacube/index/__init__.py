@@ -10,10 +10,12 @@ from ._api import index_connect
 from .fields import UnknownFieldError
 from .exceptions import DuplicateRecordError, MissingRecordError, IndexSetupError
 from datacube.index.abstract import AbstractIndex as Index
+from ._async import AsyncIndex
 
 __all__ = [
     'index_connect',
     'Index',
+    'AsyncIndex',
 
     'DuplicateRecordError',
     'IndexSetupError',
@@ -0,0 +1,176 @@
+# This file is part of the Open Data Cube, see https://opendatacube.org for more information
+#
+# Copyright (c) 2015-2020 ODC Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Async access to the core read operations of an index.
+
+See :class:`AsyncIndex`.
+"""
+from collections import namedtuple
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+from datacube.drivers._async import from_asyncpg_value
+from datacube.index.abstract import AbstractIndex, DSID, dsid_to_uuid
+from datacube.model import Dataset, Product
+
+
+class AsyncIndex:
+    """
+    Async version of the most common read operations of an index.
+
+    Database queries run on a separate pool of asyncpg connections and don't
+    block the event loop, so a single process can serve many concurrent
+    searches without a thread for each of them:
+
+    .. code-block:: python
+
+       index = AsyncIndex(dc.index)
+       dataset = await index.datasets.get(id_)
+       async for dataset in index.datasets.search(product='ga_ls8c_ard_3', time=('2020-01', '2020-03')):
+           ...
+
+    Results are the same as for the synchronous index. Metadata types and
+    products come from the same cache (see :class:`datacube.index._catalogue.CatalogueCache`),
+    checking it is up to date is also done asynchronously.
+
+    Only available for index drivers with ``supports_async``, requires asyncpg.
+    """
+
+    def __init__(self, index: AbstractIndex):
+        if not index.supports_async:
+            raise NotImplementedError(f'{type(index).__module__} index driver does not support async access')
+        self._index = index
+        # pylint: disable=protected-access
+        self._db = index._db  # type: ignore[attr-defined]
+        self.products = AsyncProductResource(index.products)
+        self.datasets = AsyncDatasetResource(self._db, index.datasets, index.products)
+
+    async def close(self) -> None:
+        """
+        Close any idle async database connections.
+        """
+        await self._db.close_async()
+
+
+class AsyncProductResource:
+    """
+    Async product lookups, see :class:`AsyncIndex`.
+    """
+
+    def __init__(self, products):
+        self._products = products
+
+    async def get_by_name(self, name: str) -> Optional[Product]:
+        """
+        Get product by name.
+        """
+        return await self._products.catalogue.product_by_name_async(name)
+
+    async def get_by_name_unsafe(self, name: str) -> Product:
+        """
+        Get product by name, raise KeyError if not found.
+        """
+        product = await self.get_by_name(name)
+        if product is None:
+            raise KeyError(name)
+        return product
+
+
+class AsyncDatasetResource:
+    """
+    Async dataset lookups and searches, see :class:`AsyncIndex`.
+
+    Search terms are the same as for the synchronous index. Search results
+    are read in full before the first one is returned.
+    """
+
+    def __init__(self, db, datasets, products):
+        self._db = db
+        self._datasets = datasets
+        self._catalogue = products.catalogue
+
+    async def get(self, id_: DSID, include_sources: bool = False,
+                  max_depth: Optional[int] = None) -> Optional[Dataset]:
+        """
+        Get dataset by id.
+
+        :param id_: id of the dataset to retrieve
+        :param include_sources: get the full provenance graph?
+        :param max_depth: with ``include_sources``, only get this many generations of sources
+        """
+        id_ = dsid_to_uuid(id_)
+        # pylint: disable=protected-access
+        async with self._db.connect_async() as connection:
+            if not include_sources:
+                result = await connection.get_dataset(id_)
+                if not result:
+                    return None
+                products = await self._catalogue.products_async([result.dataset_type_ref])
+                return self._datasets._make(result, full_info=True, product=products[result.dataset_type_ref])
+            results = await connection.get_dataset_sources(id_, max_depth=max_depth)
+
+        products = await self._catalogue.products_async(result['dataset_type_ref'] for result in results)
+        return self._datasets._make_with_sources(id_, results, max_depth, products=products)
+
+    async def bulk_get(self, ids: Iterable[DSID]) -> List[Dataset]:
+        """
+        Get multiple datasets by id. (Lineage sources NOT included)
+        """
+        ids = [dsid_to_uuid(id_) for id_ in ids]
+        async with self._db.connect_async() as connection:
+            results = await connection.get_datasets(ids)
+        products = await self._catalogue.products_async(result.dataset_type_ref for result in results)
+        # pylint: disable=protected-access
+        return [self._datasets._make(result, full_info=True, product=products[result.dataset_type_ref])
+                for result in results]
+
+    async def search(self, limit: Optional[int] = None, source_filter=None, **query) -> AsyncIterator[Dataset]:
+        """
+        Perform a search, returning results as Dataset objects.
+
+        :param limit: Limit number of datasets (per product)
+        :param source_filter: query terms against source datasets
+        """
+        async for product, results in self._search_by_product(query, source_filter=source_filter, limit=limit):
+            for result in results:
+                # pylint: disable=protected-access
+                yield self._datasets._make(result, product=product)
+
+    async def search_returning(self, field_names: Tuple[str, ...], limit: Optional[int] = None,
+                               **query) -> AsyncIterator[tuple]:
+        """
+        Perform a search, returning only the specified fields.
+
+        :param field_names: Fields to return
+        :param limit: Limit number of datasets (per product)
+        :return: namedtuple of the requested fields for each result
+        """
+        result_type = namedtuple('search_result', field_names)  # type: ignore[misc]
+        async for _, results in self._search_by_product(query, return_fields=True,
+                                                        select_field_names=field_names, limit=limit):
+            for columns in results:
+                yield result_type(*(from_asyncpg_value(value) for value in columns))
+
+    async def count(self, **query) -> int:
+        """
+        Perform a search, returning count of results.
+        """
+        await self._catalogue.get_async()
+        result = 0
+        async with self._db.connect_async() as connection:
+            # pylint: disable=protected-access
+            for _, query_exprs in self._datasets._product_query_exprs(query):
+                result += await connection.count_datasets(query_exprs)
+        return result
+
+    async def _search_by_product(self, query, return_fields=False, select_field_names=None,
+                                 source_filter=None, limit=None):
+        await self._catalogue.get_async()
+        # pylint: disable=protected-access
+        searches = self._datasets._search_product_exprs(query, return_fields, select_field_names, source_filter)
+        for product, query_exprs, source_exprs, select_fields in searches:
+            async with self._db.connect_async() as connection:
+                results = await connection.search_datasets(query_exprs, source_exprs,
+                                                           select_fields=select_fields, limit=limit)
+            yield product, results
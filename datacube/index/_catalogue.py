@@ -0,0 +1,181 @@
+# This file is part of the Open Data Cube, see https://opendatacube.org for more information
+#
+# Copyright (c) 2015-2020 ODC Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Process-local cache of the metadata types and products of a database index.
+
+See :class:`CatalogueCache`.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+from datacube.model import MetadataType, Product
+
+_LOG = logging.getLogger(__name__)
+
+
+class Catalogue:
+    """
+    Snapshot of all metadata types and products, looked up by id or by name.
+    """
+
+    def __init__(self, version: Hashable,
+                 metadata_types: Dict[int, MetadataType],
+                 products: Dict[int, Product]):
+        self.version = version
+        self.metadata_types = metadata_types
+        self.metadata_types_by_name = {mdt.name: mdt for mdt in metadata_types.values()}
+        self.products = products
+        self.products_by_name = {product.name: product for product in products.values()}
+
+
+class CatalogueCache:
+    """
+    Metadata types and products of an index, shared by its metadata type and
+    product resources.
+
+    Everything is loaded in one go on first use and then served from memory.
+    Changes made through the same index invalidate the cache straight away.
+    Changes made by other processes are picked up with a cheap version query
+    (row counts and latest ``added``/``updated`` timestamps) at most every
+    ``ttl`` seconds, or immediately when looking up something that isn't
+    cached yet. Only when the version has changed is everything reloaded.
+    """
+
+    def __init__(self, db, ttl: float,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param db: Database the index lives in
+        :param ttl: Seconds before checking for changes made by other processes, 0 to check every time
+        :param clock: Source of time, for testing
+        """
+        self._db = db
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._catalogue: Optional[Catalogue] = None
+        self._checked = 0.0
+        self._invalidations = 0
+
+    def __getstate__(self):
+        """
+        Cached objects and the lock are not pickled, unpickled caches start empty
+        """
+        return self._db, self.ttl
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def get(self, refresh: bool = False) -> Catalogue:
+        """
+        Current catalogue, loading it or checking it's still current as needed.
+
+        :param refresh: Check for changes made by other processes even when ``ttl`` hasn't expired yet
+        """
+        with self._lock:
+            now = self._clock()
+            if refresh or self._catalogue is None or now - self._checked >= self.ttl:
+                with self._db.connect() as connection:
+                    version = connection.get_catalogue_version()
+                    if self._catalogue is None or self._catalogue.version != version:
+                        self._catalogue = self._load(connection, version)
+                self._checked = now
+            return self._catalogue
+
+    async def get_async(self, refresh: bool = False) -> Catalogue:
+        """
+        Same as :meth:`get`, but the database is queried without blocking the event loop.
+        """
+        with self._lock:
+            catalogue, invalidations = self._catalogue, self._invalidations
+            now = self._clock()
+            if not (refresh or catalogue is None or now - self._checked >= self.ttl):
+                return catalogue
+
+        # The lock is a thread lock, it can't be held while waiting on the database
+        async with self._db.connect_async() as connection:
+            version = await connection.get_catalogue_version()
+            if catalogue is None or catalogue.version != version:
+                catalogue = await connection.run(lambda api: self._load(api, version))
+
+        with self._lock:
+            if self._invalidations == invalidations:
+                self._catalogue = catalogue
+                self._checked = now
+            return catalogue
+
+    def invalidate(self) -> None:
+        """
+        Drop the cached catalogue, next use reloads it.
+        """
+        with self._lock:
+            self._catalogue = None
+            self._invalidations += 1
+
+    def metadata_type(self, id_: int) -> Optional[MetadataType]:
+        return self._find('metadata_types', id_)
+
+    def metadata_type_by_name(self, name: str) -> Optional[MetadataType]:
+        return self._find('metadata_types_by_name', name)
+
+    def product(self, id_: int) -> Optional[Product]:
+        return self._find('products', id_)
+
+    def product_by_name(self, name: str) -> Optional[Product]:
+        return self._find('products_by_name', name)
+
+    def _find(self, attr: str, key: Any) -> Any:
+        found = getattr(self.get(), attr).get(key)
+        if found is None:
+            # Might have been added by another process since the last check
+            found = getattr(self.get(refresh=True), attr).get(key)
+        return found
+
+    async def product_by_name_async(self, name: str) -> Optional[Product]:
+        return await self._find_async('products_by_name', name)
+
+    async def products_async(self, ids: Iterable[int]) -> Dict[int, Product]:
+        """
+        Products by id, without blocking the event loop.
+
+        :raises KeyError: if a product isn't in the index
+        """
+        ids = set(ids)
+        products = (await self.get_async()).products
+        if not ids.issubset(products):
+            # Might have been added by another process since the last check
+            products = (await self.get_async(refresh=True)).products
+        return {id_: products[id_] for id_ in ids}
+
+    async def _find_async(self, attr: str, key: Any) -> Any:
+        found = getattr(await self.get_async(), attr).get(key)
+        if found is None:
+            found = getattr(await self.get_async(refresh=True), attr).get(key)
+        return found
+
+    def _load(self, connection, version: Hashable) -> Catalogue:
+        _LOG.debug("Loading metadata types and products, version: %r", version)
+
+        def make_metadata_type(row) -> MetadataType:
+            return MetadataType(row['definition'],
+                                dataset_search_fields=self._db.get_dataset_fields(row['definition']),
+                                id_=row['id'])
+
+        metadata_types = {row['id']: make_metadata_type(row)
+                          for row in connection.get_all_metadata_types()}
+
+        products = {}
+        for row in connection.get_all_products():
+            metadata_type_ref = row['metadata_type_ref']
+            if metadata_type_ref not in metadata_types:
+                # Added after metadata types were read, version check will catch up with it
+                metadata_types[metadata_type_ref] = make_metadata_type(
+                    connection.get_metadata_type(metadata_type_ref))
+            products[row['id']] = Product(definition=row['definition'],
+                                          metadata_type=metadata_types[metadata_type_ref],
+                                          id_=row['id'])
+
+        return Catalogue(version, metadata_types, products)
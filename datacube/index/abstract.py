@@ -2,12 +2,20 @@
 #
 # Copyright (c) 2015-2022 ODC Contributors
 # SPDX-License-Identifier: Apache-2.0
+import base64
 import datetime
+import json
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
 from pathlib import Path
 
 from abc import ABC, abstractmethod
-from typing import (Any, Iterable, Iterator,
-                    List, Mapping, Optional,
+from concurrent.futures import ThreadPoolExecutor
+from typing import (Any, Callable, Iterable, Iterator,
+                    List, Mapping, Optional, Set,
                     Tuple, Union)
 from uuid import UUID
 
@@ -17,6 +25,9 @@ from datacube.model import Dataset, MetadataType, Range
 from datacube.model import DatasetType as Product
 from datacube.utils import cached_property, read_documents, InvalidDocException
 from datacube.utils.changes import AllowPolicy, Change, Offset
+from datacube.utils.dates import tz_aware
+
+_LOG = logging.getLogger(__name__)
 
 
 class AbstractUserResource(ABC):
@@ -477,6 +488,60 @@ def dsid_to_uuid(dsid: DSID) -> UUID:
         return UUID(dsid)
 
 
+# Outcome of a bulk operation: number of items added, skipped (already present) and time taken
+BatchStatus = namedtuple('BatchStatus', ('completed', 'skipped', 'seconds'))
+
+# Summary of the active datasets of a product: their number, time Range and lon/lat BoundingBox (None if unknown)
+ProductSummary = namedtuple('ProductSummary', ('dataset_count', 'time', 'bbox'))
+
+# One page of a paginated dataset search, and the continuation token for the next page (None after the last page)
+DatasetPage = namedtuple('DatasetPage', ('datasets', 'continuation'))
+
+# Orders of paginated dataset searches (within each product)
+SEARCH_PAGE_ORDERS = ('id', 'time')
+
+
+def make_continuation(order_by: str, product_id: int, key: Any) -> str:
+    """
+    Continuation token of a paginated dataset search, see :meth:`AbstractDatasetResource.search_page`.
+
+    :param order_by: Order of the search
+    :param product_id: Product of the last dataset returned
+    :param key: Sort key of the last dataset returned: its id, or (time, id)
+    """
+    if order_by == 'time':
+        time_, id_ = key
+        key = [time_.isoformat() if time_ is not None else None, str(id_)]
+    else:
+        key = [str(key)]
+    doc = json.dumps([order_by, product_id] + key, separators=(',', ':'))
+    return base64.urlsafe_b64encode(doc.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def parse_continuation(token: str, order_by: str) -> Tuple[int, Any]:
+    """
+    Read a continuation token made by :func:`make_continuation`
+
+    :param token: Continuation token
+    :param order_by: Order of the search the token is used with
+    :return: Product id, and sort key of the last dataset returned by the previous page
+    """
+    try:
+        token_order, product_id, *key = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if token_order == 'time':
+            time_, id_ = key
+            parsed_key = (datetime.datetime.fromisoformat(time_) if time_ is not None else None, UUID(id_))
+        else:
+            id_, = key
+            parsed_key = UUID(id_)
+        product_id = int(product_id)
+    except (ValueError, TypeError):
+        raise ValueError(f'Invalid continuation token: {token!r}')
+    if token_order != order_by:
+        raise ValueError(f'Continuation token is for a search ordered by {token_order}, not {order_by}')
+    return product_id, parsed_key
+
+
 class AbstractDatasetResource(ABC):
     """
     Abstract base class for the Dataset portion of an index api.
@@ -491,13 +556,16 @@ class AbstractDatasetResource(ABC):
     @abstractmethod
     def get(self,
             id_: DSID,
-            include_sources: bool = False
+            include_sources: bool = False,
+            max_depth: Optional[int] = None
            ) -> Optional[Dataset]:
         """
         Get dataset by id
 
         :param id_: id of the dataset to retrieve
         :param include_sources: get the full provenance graph?
+        :param max_depth: with ``include_sources``, only get this many generations of sources (None for all).
+                          Sources of the oldest generation retrieved are left as they are stored.
         :rtype: Dataset model (None if not found)
         """
 
@@ -519,6 +587,20 @@ class AbstractDatasetResource(ABC):
         :rtype: list[Dataset]
         """
 
+    @abstractmethod
+    def get_derived_graph(self,
+                          id_: DSID,
+                          max_depth: Optional[int] = None
+                         ) -> Mapping[UUID, List[Dataset]]:
+        """
+        Get all datasets derived from a dataset, recursively, in one go.
+
+        :param id_: dataset id
+        :param max_depth: only get this many generations of derived datasets (None for all)
+        :return: Datasets derived directly from each dataset in the graph, by id of the dataset they
+                 are derived from. Datasets nothing is derived from are left out.
+        """
+
     @abstractmethod
     def has(self, id_: DSID) -> bool:
         """
@@ -557,6 +639,60 @@ class AbstractDatasetResource(ABC):
         :return: Persisted Dataset model
         """
 
+    @abstractmethod
+    def add_many(self, datasets: Iterable[Dataset],
+                 with_lineage: bool = True,
+                 batch_size: int = 1000
+                ) -> BatchStatus:
+        """
+        Add many datasets to the index, ``batch_size`` datasets at a time.
+
+        Same as calling :meth:`add` for every dataset, but every batch is added with
+        a handful of bulk operations. Datasets already in the index are skipped.
+        Throughput is logged after every batch.
+
+        :param datasets: Unpersisted dataset models, can be a generator
+        :param with_lineage: See :meth:`add`
+        :param batch_size: Number of datasets to add at once
+        :return: Totals over all batches (lineage datasets are not counted)
+        """
+
+    def _add_batches(self, datasets: Iterable[Dataset],
+                     batch_size: int,
+                     add_batch: Callable[[List[Dataset]], int]
+                    ) -> BatchStatus:
+        """
+        Helper for implementing :meth:`add_many`.
+
+        :param add_batch: Adds a list of datasets, returns how many of them were added
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size should be at least 1")
+
+        completed, skipped, seconds = 0, 0, 0.0
+
+        def run(batch: List[Dataset]) -> None:
+            nonlocal completed, skipped, seconds
+            t0 = time.monotonic()
+            n_added = add_batch(batch)
+            dt = time.monotonic() - t0
+            _LOG.info('Added %d datasets (%d skipped) in %.2fs, %.1f datasets/s',
+                      n_added, len(batch) - n_added, dt, len(batch)/dt if dt > 0 else float('inf'))
+            completed += n_added
+            skipped += len(batch) - n_added
+            seconds += dt
+
+        batch: List[Dataset] = []
+        for ds in datasets:
+            batch.append(ds)
+            if len(batch) == batch_size:
+                run(batch)
+                batch = []
+        if batch:
+            run(batch)
+
+        return BatchStatus(completed, skipped, seconds)
+
     @abstractmethod
     def search_product_duplicates(self,
                                   product: Product,
@@ -762,6 +898,56 @@ class AbstractDatasetResource(ABC):
         :return: Matching datasets
         """
 
+    @abstractmethod
+    def search_page(self,
+                    page_size: int = 1000,
+                    continuation: Optional[str] = None,
+                    order_by: str = 'id',
+                    **query: QueryField) -> DatasetPage:
+        """
+        Perform a search, returning one page of results.
+
+        Datasets are ordered by product, then by id or by (time, id). Pass the continuation token
+        of a page, with the same query, to get the next one:
+
+        .. code-block:: python
+
+           page = index.datasets.search_page(product='ga_ls8c_ard_3')
+           while page.continuation is not None:
+               page = index.datasets.search_page(continuation=page.continuation, product='ga_ls8c_ard_3')
+
+        Tokens are plain strings, so a long scan can be resumed after a failure, or pages handed out to
+        other workers. Datasets added or archived during a scan don't shift the remaining pages.
+
+        :param page_size: Maximum number of datasets in the page
+        :param continuation: Token returned with the previous page, or None for the first page
+        :param order_by: 'id', or 'time' (start of the time range, datasets without a time last)
+        :param query: search query parameters
+        :return: Matching datasets, and the continuation token for the next page (None after the last page)
+        """
+
+    def search_pages(self,
+                     page_size: int = 1000,
+                     continuation: Optional[str] = None,
+                     order_by: str = 'id',
+                     **query: QueryField) -> Iterator[DatasetPage]:
+        """
+        Perform a search, returning every page of results from the continuation token on.
+
+        See :meth:`search_page`. The continuation token of each page resumes the search after it.
+
+        :param page_size: Maximum number of datasets in each page
+        :param continuation: Token to resume a previous search, or None to start from the first page
+        :param order_by: 'id' or 'time'
+        :param query: search query parameters
+        """
+        while True:
+            page = self.search_page(page_size, continuation, order_by, **query)
+            yield page
+            if page.continuation is None:
+                return
+            continuation = page.continuation
+
     @abstractmethod
     def search_by_product(self,
                           **query: QueryField
@@ -858,6 +1044,121 @@ class AbstractDatasetResource(ABC):
         """
         return list(self.search(**query))  # type: ignore[arg-type]   # mypy isn't being very smart here :(
 
+    def search_parallel(self,
+                        shards: int = 4,
+                        limit: Optional[int] = None,
+                        read_ahead: int = 1000,
+                        **query: QueryField) -> Iterator[Dataset]:
+        """
+        Perform a search split into time ranges, which are searched concurrently.
+
+        Each time range is searched (and its results turned into Dataset objects) in a separate thread,
+        on its own database connection. Datasets are returned in time range order, without duplicates,
+        so this is a drop-in replacement for :meth:`search` for large searches.
+
+        Results are streamed: each time range reads at most ``read_ahead`` datasets ahead of the ones
+        returned so far, and all searches are stopped once ``limit`` datasets have been returned or
+        iteration is stopped early.
+
+        The search needs a ``time`` range, or a single ``product`` to take the time bounds of (datasets
+        without a time are then left out). Otherwise it runs as a single ordinary search.
+
+        :param shards: Number of time ranges to split the search into
+        :param limit: Limit number of datasets (None/default = unlimited)
+        :param read_ahead: Maximum number of datasets to hold for each time range, waiting to be returned
+        :param query: search query parameters
+        :return: Matching datasets
+        """
+        time_ranges = self._time_shards(query, shards)
+        if len(time_ranges) < 2:
+            yield from self.search(limit=limit, **query)  # type: ignore[arg-type]
+            return
+
+        stop = threading.Event()
+        shard_queues: List[queue.Queue] = [queue.Queue(maxsize=read_ahead) for _ in time_ranges]
+
+        def put(shard_queue: queue.Queue, item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    shard_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def search_shard(time_range: Range, shard_queue: queue.Queue) -> None:
+            # End of results is marked with None, a failure with its exception
+            datasets = iter(self.search(limit=limit, **dict(query, time=time_range)))  # type: ignore[arg-type]
+            try:
+                for dataset in datasets:
+                    if not put(shard_queue, dataset):
+                        return
+            except Exception as e:  # pylint: disable=broad-except
+                put(shard_queue, e)
+                return
+            finally:
+                close = getattr(datasets, 'close', None)
+                if close is not None:
+                    close()
+            put(shard_queue, None)
+
+        executor = ThreadPoolExecutor(max_workers=len(time_ranges), thread_name_prefix='odc-search')
+        for time_range, shard_queue in zip(time_ranges, shard_queues):
+            executor.submit(search_shard, time_range, shard_queue)
+        try:
+            # Datasets that extend past the end of a time range are found again in the next one
+            spanning: Set[UUID] = set()
+            count = 0
+            for time_range, shard_queue in zip(time_ranges, shard_queues):
+                while True:
+                    dataset = shard_queue.get()
+                    if dataset is None:
+                        break
+                    if isinstance(dataset, Exception):
+                        raise dataset
+                    if dataset.id in spanning:
+                        continue
+                    dataset_time = dataset.time
+                    if dataset_time is None or dataset_time.end is None or \
+                            tz_aware(dataset_time.end) >= time_range.end:
+                        spanning.add(dataset.id)
+                    yield dataset
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+        finally:
+            stop.set()
+            executor.shutdown(wait=False)
+
+    def _time_shards(self, query: Mapping[str, QueryField], shards: int) -> List[Range]:
+        """
+        Split the time range of a search into (at most) the given number of equal length time ranges
+        """
+        time_range = query.get('time')
+        if time_range is None:
+            time_range = Range(None, None)
+        elif not isinstance(time_range, Range):
+            return []
+        begin, end = time_range
+        if begin is None or end is None:
+            product = query.get('product')
+            if not isinstance(product, str):
+                return []
+            try:
+                product_begin, product_end = self.get_product_summary(product).time
+            except NotImplementedError:
+                return []
+            begin = begin if begin is not None else product_begin
+            end = end if end is not None else product_end
+        if not isinstance(begin, datetime.datetime) or not isinstance(end, datetime.datetime):
+            return []
+        begin, end = tz_aware(begin), tz_aware(end)
+        if end <= begin:
+            return []
+        step = (end - begin) / shards
+        bounds = [begin + step * i for i in range(shards)] + [end]
+        return [Range(lower, upper) for lower, upper in zip(bounds[:-1], bounds[1:])]
+
     @abstractmethod
     def get_product_time_bounds(self,
                                 product: str
@@ -869,6 +1170,28 @@ class AbstractDatasetResource(ABC):
         :return: minimum and maximum acquisition times
         """
 
+    @abstractmethod
+    def get_product_summary(self, product: str) -> ProductSummary:
+        """
+        Summarise the active datasets of a product.
+
+        Index drivers may keep summaries up to date as datasets are added, archived, restored and
+        purged, which is a lot quicker than counting or searching.
+
+        :param product: Name of product
+        :return: number of datasets, their time range and lon/lat bounding box
+        """
+
+    def rebuild_product_summary(self, product: str) -> None:
+        """
+        Recalculate the stored summary of a product from scratch.
+
+        Only needed for products that were indexed before their index driver kept summaries,
+        or after their bounds became stale. Does nothing for drivers that don't store summaries.
+
+        :param product: Name of product
+        """
+
     @abstractmethod
     def search_returning_datasets_light(self,
                                         field_names: Tuple[str, ...],
@@ -916,6 +1239,10 @@ class AbstractIndex(ABC):
     supports_legacy = True
     #   supports non-geospatial (e.g. telemetry) metadata types
     supports_nongeo = True
+    #   supports searching datasets by ``geopolygon``, intersected with dataset extents by the index
+    supports_spatial_indexes = False
+    #   supports async access to the core read operations (see :class:`datacube.index.AsyncIndex`)
+    supports_async = False
 
     @property
     @abstractmethod
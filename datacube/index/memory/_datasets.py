@@ -15,7 +15,9 @@ from uuid import UUID
 
 from datacube.index import fields
 
-from datacube.index.abstract import AbstractDatasetResource, DSID, dsid_to_uuid, QueryField, DatasetSpatialMixin
+from datacube.index.abstract import (AbstractDatasetResource, BatchStatus, DSID, dsid_to_uuid, QueryField,
+                                     DatasetSpatialMixin, ProductSummary, DatasetPage, SEARCH_PAGE_ORDERS,
+                                     make_continuation, parse_continuation)
 from datacube.index.fields import Field
 from datacube.index.memory._fields import build_custom_fields, get_dataset_fields
 from datacube.index.memory._products import ProductResource
@@ -25,6 +27,7 @@ from datacube.utils import changes
 from datacube.utils.changes import AllowPolicy, Change, Offset, get_doc_changes
 from datacube.utils.dates import tz_aware
 from datacube.utils.documents import metadata_subset
+from datacube.utils.geometry import BoundingBox
 
 _LOG = logging.getLogger(__name__)
 
@@ -47,12 +50,14 @@ class DatasetResource(AbstractDatasetResource):
         # Active Index By Product
         self.by_product: MutableMapping[str, List[UUID]] = {}
 
-    def get(self, id_: DSID, include_sources: bool = False) -> Optional[Dataset]:
+    def get(self, id_: DSID, include_sources: bool = False,
+            max_depth: Optional[int] = None) -> Optional[Dataset]:
         try:
             ds = self.clone(self.by_id[dsid_to_uuid(id_)])
-            if include_sources:
+            if include_sources and (max_depth is None or max_depth > 0):
                 ds.sources = {
-                    classifier: cast(Dataset, self.get(dsid, include_sources=True))
+                    classifier: cast(Dataset, self.get(dsid, include_sources=True,
+                                                       max_depth=None if max_depth is None else max_depth - 1))
                     for classifier, dsid in self.derived_from.get(ds.id, {}).items()
                 }
             return ds
@@ -65,6 +70,21 @@ class DatasetResource(AbstractDatasetResource):
     def get_derived(self, id_: DSID) -> Iterable[Dataset]:
         return (cast(Dataset, self.get(dsid)) for dsid in self.derivations.get(dsid_to_uuid(id_), {}).values())
 
+    def get_derived_graph(self, id_: DSID, max_depth: Optional[int] = None) -> Mapping[UUID, List[Dataset]]:
+        graph: Dict[UUID, List[Dataset]] = {}
+        generation = [dsid_to_uuid(id_)]
+        depth = 0
+        while generation and (max_depth is None or depth < max_depth):
+            next_generation = []
+            for parent in generation:
+                if parent in graph or parent not in self.derivations:
+                    continue
+                graph[parent] = list(self.get_derived(parent))
+                next_generation.extend(ds.id for ds in graph[parent])
+            generation = next_generation
+            depth += 1
+        return graph
+
     def has(self, id_: DSID) -> bool:
         return dsid_to_uuid(id_) in self.by_id
 
@@ -102,6 +122,21 @@ class DatasetResource(AbstractDatasetResource):
                 self.by_product[dataset.type.name] = [dataset.id]
         return cast(Dataset, self.get(dataset.id))
 
+    def add_many(self, datasets: Iterable[Dataset],
+                 with_lineage: bool = True,
+                 batch_size: int = 1000) -> BatchStatus:
+        def add_batch(batch: List[Dataset]) -> int:
+            n_added = 0
+            for ds in batch:
+                if self.has(ds.id):
+                    _LOG.warning("Dataset %s is already in the database", ds.id)
+                else:
+                    self.add(ds, with_lineage=with_lineage)
+                    n_added += 1
+            return n_added
+
+        return self._add_batches(datasets, batch_size, add_batch)
+
     def persist_source_relationship(self, ds: Dataset, src: Dataset, classifier: str) -> None:
         # Add source lineage link
         if ds.id not in self.derived_from:
@@ -493,6 +528,47 @@ class DatasetResource(AbstractDatasetResource):
     def search_by_product(self, **query: QueryField) -> Iterable[Tuple[Iterable[Dataset], Product]]:
         return self._search_grouped(**query)  # type: ignore[arg-type]
 
+    def search_page(self,
+                    page_size: int = 1000,
+                    continuation: Optional[str] = None,
+                    order_by: str = 'id',
+                    **query: QueryField) -> DatasetPage:
+        if order_by not in SEARCH_PAGE_ORDERS:
+            raise ValueError(f'Unknown order {order_by!r}, expected one of {SEARCH_PAGE_ORDERS}')
+        if page_size < 1:
+            raise ValueError('Page size must be positive')
+        after_product, after = parse_continuation(continuation, order_by) if continuation else (None, None)
+
+        if order_by == 'time':
+            # Same order as the postgres drivers: datasets without a time last
+            def sort_key(key):
+                time_, id_ = key
+                return time_ is None, time_, id_
+        else:
+            def sort_key(key):
+                return key
+
+        datasets: List[Dataset] = []
+        for product_datasets, product in sorted(self._search_grouped(**query),  # type: ignore[arg-type]
+                                                key=lambda found: found[1].id):
+            if after_product is not None and product.id < after_product:
+                continue
+            if order_by == 'time':
+                time_field = product.metadata_type.dataset_fields.get('time')
+                if time_field is None:
+                    raise ValueError(f'Product {product.name} has no time field to order by')
+                keys = {ds.id: (_time_start(time_field, ds), ds.id) for ds in product_datasets}
+            else:
+                keys = {ds.id: ds.id for ds in product_datasets}
+
+            page = sorted(product_datasets, key=lambda ds: sort_key(keys[ds.id]))
+            if product.id == after_product:
+                page = [ds for ds in page if sort_key(keys[ds.id]) > sort_key(after)]
+            datasets.extend(page[:page_size - len(datasets)])
+            if len(datasets) == page_size:
+                return DatasetPage(datasets, make_continuation(order_by, product.id, keys[datasets[-1].id]))
+        return DatasetPage(datasets, None)
+
     def search_returning(self,
                          field_names: Iterable[str],
                          limit: Optional[int] = None,
@@ -668,6 +744,27 @@ class DatasetResource(AbstractDatasetResource):
                 max_time = dsmax
         return (cast(datetime.datetime, min_time), cast(datetime.datetime, max_time))
 
+    def get_product_summary(self, product: str) -> ProductSummary:
+        prod = self.product_resource.get_by_name(product)
+        if prod is None:
+            raise ValueError(f"Product {product} not in index")
+        fields = prod.metadata_type.dataset_fields
+        ids = self.by_product.get(product, [])
+        bounds = {}
+        for name in ('lat', 'lon'):
+            if name not in fields:
+                continue
+            ranges = [fields[name].extract(self.active_by_id[id_].metadata_doc)  # type: ignore[attr-defined]
+                      for id_ in ids]
+            lower = [r.begin for r in ranges if r is not None and r.begin is not None]
+            upper = [r.end for r in ranges if r is not None and r.end is not None]
+            if lower and upper:
+                bounds[name] = (min(lower), max(upper))
+        bbox = None
+        if 'lat' in bounds and 'lon' in bounds:
+            bbox = BoundingBox(bounds['lon'][0], bounds['lat'][0], bounds['lon'][1], bounds['lat'][1])
+        return ProductSummary(len(ids), Range(*self.get_product_time_bounds(product)), bbox)
+
     # pylint: disable=redefined-outer-name
     def search_returning_datasets_light(
             self,
@@ -720,3 +817,10 @@ class DatasetResource(AbstractDatasetResource):
             indexed_time=datetime.datetime.now() if for_save and orig.indexed_time is None else orig.indexed_time,
             archived_time=None if for_save else orig.archived_time
         )
+
+
+def _time_start(time_field: Field, ds: Dataset) -> Optional[datetime.datetime]:
+    time_range = time_field.extract(ds.metadata_doc)  # type: ignore[attr-defined]
+    if time_range is None or time_range.begin is None:
+        return None
+    return tz_aware(time_range.begin)
@@ -3,7 +3,7 @@
 # Copyright (c) 2015-2020 ODC Contributors
 # SPDX-License-Identifier: Apache-2.0
 
-from datacube.index.abstract import AbstractDatasetResource, DSID
+from datacube.index.abstract import AbstractDatasetResource, DatasetPage, DSID
 from datacube.model import Dataset, DatasetType
 from typing import Iterable
 
@@ -12,7 +12,7 @@ class DatasetResource(AbstractDatasetResource):
     def __init__(self, product_resource):
         self.types = product_resource
 
-    def get(self, id_: DSID, include_sources=False):
+    def get(self, id_: DSID, include_sources=False, max_depth=None):
         return None
 
     def bulk_get(self, ids):
@@ -21,6 +21,9 @@ class DatasetResource(AbstractDatasetResource):
     def get_derived(self, id_):
         return []
 
+    def get_derived_graph(self, id_, max_depth=None):
+        return {}
+
     def has(self, id_):
         return False
 
@@ -31,6 +34,9 @@ class DatasetResource(AbstractDatasetResource):
             with_lineage: bool = True) -> Dataset:
         raise NotImplementedError()
 
+    def add_many(self, datasets, with_lineage=True, batch_size=1000):
+        raise NotImplementedError()
+
     def search_product_duplicates(self, product: DatasetType, *args):
         return []
 
@@ -85,6 +91,9 @@ class DatasetResource(AbstractDatasetResource):
     def search(self, limit=None, **query):
         return []
 
+    def search_page(self, page_size=1000, continuation=None, order_by='id', **query):
+        return DatasetPage([], None)
+
     def search_by_product(self, **query):
         return []
 
@@ -109,6 +118,9 @@ class DatasetResource(AbstractDatasetResource):
     def get_product_time_bounds(self, product: str):
         raise NotImplementedError()
 
+    def get_product_summary(self, product: str):
+        raise NotImplementedError()
+
     # pylint: disable=redefined-outer-name
     def search_returning_datasets_light(self, field_names: tuple, custom_offsets=None, limit=None, **query):
         return []
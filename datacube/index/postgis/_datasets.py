@@ -12,21 +12,34 @@ from collections import namedtuple
 from typing import Iterable, Union, List
 from uuid import UUID
 
-from sqlalchemy import select, func
+from psycopg2.errors import InsufficientPrivilege
+from sqlalchemy.exc import ProgrammingError
 
-from datacube.drivers.postgis._fields import SimpleDocField, DateDocField
+from datacube.drivers.postgis._api import extent_intersects
+from datacube.drivers.postgis._fields import SimpleDocField
 from datacube.drivers.postgis._schema import DATASET
-from datacube.index.abstract import AbstractDatasetResource, DatasetSpatialMixin, DSID
-from datacube.model import Dataset, Product
+from datacube.index.abstract import AbstractDatasetResource, DatasetSpatialMixin, DSID, ProductSummary
+from datacube.index.abstract import DatasetPage, SEARCH_PAGE_ORDERS, make_continuation, parse_continuation
+from datacube.index.exceptions import IndexSetupError
+from datacube.model import Dataset, Product, Range
 from datacube.model.fields import Field
 from datacube.model.utils import flatten_datasets
 from datacube.utils import jsonify_document, _readable_offset, changes
 from datacube.utils.changes import get_doc_changes
+from datacube.utils.geometry import BoundingBox
 from datacube.index import fields
 
 _LOG = logging.getLogger(__name__)
 
 
+def _summarised_values(dataset_fields, metadata_doc):
+    """
+    Values of a dataset document that go into its product's summary.
+    """
+    return [dataset_fields[name].extract(metadata_doc) if name in dataset_fields else None
+            for name in ('time', 'lat', 'lon')]
+
+
 # It's a public api, so we can't reorganise old methods.
 # pylint: disable=too-many-public-methods, too-many-lines
 
@@ -46,12 +59,15 @@ class DatasetResource(AbstractDatasetResource):
         self.types = product_resource
         self.products = product_resource
 
-    def get(self, id_: Union[str, UUID], include_sources=False):
+    def get(self, id_: Union[str, UUID], include_sources=False, max_depth=None):
         """
         Get dataset by id
 
+        The provenance graph is retrieved with a single query.
+
         :param UUID id_: id of the dataset to retrieve
         :param bool include_sources: get the full provenance graph?
+        :param int max_depth: with ``include_sources``, only get this many generations of sources
         :rtype: Dataset
         """
         if isinstance(id_, str):
@@ -62,14 +78,31 @@ class DatasetResource(AbstractDatasetResource):
                 dataset = connection.get_dataset(id_)
                 return self._make(dataset, full_info=True) if dataset else None
 
-            datasets = {result['id']: (self._make(result, full_info=True), result)
-                        for result in connection.get_dataset_sources(id_)}
+            results = connection.get_dataset_sources(id_, max_depth=max_depth)
+
+        return self._make_with_sources(id_, results, max_depth)
+
+    def _make_with_sources(self, id_, results, max_depth=None, products=None):
+        """
+        Dataset with its provenance graph, from the results of ``get_dataset_sources``.
+
+        :param products: Products of the results by id, default is to look them up
+        :rtype: Dataset (None if not found)
+        """
+        def product(result):
+            return products[result['dataset_type_ref']] if products is not None else None
+
+        datasets = {result['id']: (self._make(result, full_info=True, product=product(result)), result)
+                    for result in results}
 
         if not datasets:
             # No dataset found
             return None
 
         for dataset, result in datasets.values():
+            if max_depth is not None and result['depth'] >= max_depth:
+                # Oldest generation retrieved, its sources weren't
+                continue
             dataset.metadata.sources = {
                 classifier: datasets[source][0].metadata_doc
                 for source, classifier in zip(result['sources'], result['classes']) if source
@@ -105,6 +138,32 @@ class DatasetResource(AbstractDatasetResource):
                 for result in connection.get_derived_datasets(id_)
             ]
 
+    def get_derived_graph(self, id_, max_depth=None):
+        """
+        Get all datasets derived from a dataset, recursively, with a single query
+
+        :param Union[str,UUID] id_: dataset id
+        :param int max_depth: only get this many generations of derived datasets (None for all)
+        :return: Datasets derived directly from each dataset in the graph, by id of the dataset they are derived from
+        :rtype: dict[UUID, list[Dataset]]
+        """
+        if not isinstance(id_, UUID):
+            id_ = UUID(id_)
+        with self._db.connect() as connection:
+            results = connection.get_derived_graph(id_, max_depth=max_depth)
+
+        datasets = {}
+        graph = {}
+        seen = set()
+        for result in results:
+            if result['id'] not in datasets:
+                datasets[result['id']] = self._make(result, full_info=True)
+            # Datasets reachable along several paths come back more than once
+            if (result['source_dataset_ref'], result['id']) not in seen:
+                seen.add((result['source_dataset_ref'], result['id']))
+                graph.setdefault(result['source_dataset_ref'], []).append(datasets[result['id']])
+        return graph
+
     def has(self, id_):
         """
         Have we already indexed this dataset?
@@ -148,11 +207,15 @@ class DatasetResource(AbstractDatasetResource):
 
         def process_bunch(dss, main_ds, transaction):
             edges = []
+            inserted = []
 
             # First insert all new datasets
             for ds in dss:
-                is_new = transaction.insert_dataset(ds.metadata_doc_without_lineage(), ds.id, ds.type.id)
+                is_new = transaction.insert_dataset(ds.metadata_doc_without_lineage(), ds.id, ds.type.id,
+                                                    ds.extent)
                 sources = ds.sources
+                if is_new:
+                    inserted.append(ds.id)
                 if is_new and sources is not None:
                     edges.extend((name, ds.id, src.id)
                                  for name, src in sources.items())
@@ -165,6 +228,9 @@ class DatasetResource(AbstractDatasetResource):
             if main_ds.uris is not None:
                 self._ensure_new_locations(main_ds, transaction=transaction)
 
+            # Last, to hold the lock on the product summary for as short as possible
+            self._update_summaries(transaction, inserted)
+
         _LOG.info('Indexing %s', dataset.id)
 
         if with_lineage:
@@ -190,6 +256,61 @@ class DatasetResource(AbstractDatasetResource):
 
         return dataset
 
+    def add_many(self, datasets, with_lineage=True, batch_size=1000):
+        """
+        Add many datasets to the index, ``batch_size`` datasets at a time.
+
+        Every batch takes one transaction: one query to find already indexed
+        datasets and one multi-row insert each for new datasets, their lineage
+        edges and their locations.
+
+        :param Iterable[Dataset] datasets: datasets to add
+        :param bool with_lineage: see :meth:`add`
+        :param int batch_size: number of datasets to add at once
+        :rtype: BatchStatus
+        """
+        return self._add_batches(datasets, batch_size,
+                                 lambda batch: self._add_batch(batch, with_lineage))
+
+    def _add_batch(self, batch, with_lineage):
+        # Unique datasets of the batch and, optionally, their lineage
+        top_level = {ds.id: ds for ds in batch}
+        ds_by_uuid = {}
+        for ds in top_level.values():
+            if with_lineage:
+                for id_, dss in flatten_datasets(ds).items():
+                    ds_by_uuid.setdefault(id_, dss[0])
+            else:
+                ds_by_uuid.setdefault(ds.id, ds)
+
+        with self._db.begin() as transaction:
+            present = set(transaction.datasets_intersection(list(ds_by_uuid)))
+            for id_ in present.intersection(top_level):
+                _LOG.warning('Dataset %s is already in the database', id_)
+
+            new = [ds for id_, ds in ds_by_uuid.items() if id_ not in present]
+            inserted = set(transaction.insert_datasets([
+                (ds.metadata_doc_without_lineage(), ds.id, ds.type.id, ds.extent) for ds in new
+            ]))
+
+            transaction.insert_dataset_sources([
+                (name, ds.id, src.id)
+                for ds in new if ds.id in inserted and ds.sources is not None
+                for name, src in ds.sources.items()
+            ])
+
+            # Locations for top-level datasets only, in reverse order, same as :meth:`add`
+            transaction.insert_dataset_locations([
+                (ds.id, uri)
+                for ds in top_level.values() if ds.id in inserted and ds.uris is not None
+                for uri in ds.uris[::-1] if uri is not None
+            ])
+
+            # Once per batch and last, to hold the lock on the product summary for as short as possible
+            self._update_summaries(transaction, inserted)
+
+        return len(inserted.intersection(top_level))
+
     def search_product_duplicates(self, product: Product, *args):
         """
         Find dataset ids who have duplicates of the given set of field names.
@@ -278,9 +399,16 @@ class DatasetResource(AbstractDatasetResource):
         _LOG.info("Updating dataset %s", dataset.id)
 
         product = self.types.get_by_name(dataset.type.name)
+        summarised_change = (_summarised_values(product.metadata_type.dataset_fields, existing.metadata_doc)
+                             != _summarised_values(product.metadata_type.dataset_fields, dataset.metadata_doc))
         with self._db.begin() as transaction:
-            if not transaction.update_dataset(dataset.metadata_doc_without_lineage(), dataset.id, product.id):
+            if summarised_change:
+                self._update_summaries(transaction, [dataset.id], removed=True)
+            if not transaction.update_dataset(dataset.metadata_doc_without_lineage(), dataset.id, product.id,
+                                              dataset.extent):
                 raise ValueError("Failed to update dataset %s..." % dataset.id)
+            if summarised_change:
+                self._update_summaries(transaction, [dataset.id])
 
         self._ensure_new_locations(dataset, existing)
 
@@ -308,7 +436,9 @@ class DatasetResource(AbstractDatasetResource):
 
         :param Iterable[UUID] ids: list of dataset ids to archive
         """
+        ids = list(ids)
         with self._db.begin() as transaction:
+            self._update_summaries(transaction, ids, removed=True)
             for id_ in ids:
                 transaction.archive_dataset(id_)
 
@@ -318,7 +448,9 @@ class DatasetResource(AbstractDatasetResource):
 
         :param Iterable[UUID] ids: list of dataset ids to restore
         """
+        ids = list(ids)
         with self._db.begin() as transaction:
+            self._update_summaries(transaction, ids, archived=True)
             for id_ in ids:
                 transaction.restore_dataset(id_)
 
@@ -328,22 +460,70 @@ class DatasetResource(AbstractDatasetResource):
 
         :param ids: iterable of dataset ids to purge
         """
+        ids = list(ids)
         with self._db.begin() as transaction:
+            self._update_summaries(transaction, ids, removed=True)
             for id_ in ids:
                 transaction.delete_dataset(id_)
 
+    def _update_summaries(self, transaction, ids, archived=False, removed=False):
+        """
+        Update product summaries for datasets becoming active or inactive.
+
+        This locks the summary row of each product until the transaction ends, so concurrent
+        transactions changing datasets of the same product wait for each other from here on.
+
+        See :meth:`datacube.drivers.postgis._api.PostgisDbAPI.update_product_summary`
+        """
+        if not ids:
+            return
+        ids = list(ids)
+        for product_id in transaction.get_dataset_product_ids(ids):
+            product = self.types.get(product_id)
+            transaction.update_product_summary(product.id, product.metadata_type.dataset_fields, ids,
+                                               archived=archived, removed=removed)
+
     def get_all_dataset_ids(self, archived: bool):
         """
-        Get list of all dataset IDs based only on archived status
+        Get all dataset IDs based only on archived status
 
         This will be very slow and inefficient for large databases, and is really
         only intended for small and/or experimental databases.
 
+        Ids are read in pages of ``db_fetch_size``, each with a separate short query,
+        so no cursor or transaction is held open while the caller works through them.
+
         :param archived:
-        :rtype: list[UUID]
+        :rtype: __generator[UUID]
         """
-        with self._db.begin() as transaction:
-            return [dsid[0] for dsid in transaction.all_dataset_ids(archived)]
+        page_size = self._db.fetch_size
+        after = None
+        while True:
+            with self._db.connect() as connection:
+                page = [dsid[0] for dsid in connection.all_dataset_ids(archived, page_size=page_size, after=after)]
+            yield from page
+            if len(page) < page_size:
+                return
+            after = page[-1]
+
+    def _populate_extents(self, batch_size=1000):
+        """
+        Store extents of datasets indexed before extents were stored, so spatial searches can find them.
+
+        :return: Number of datasets processed
+        """
+        count = 0
+        after_id = None
+        while True:
+            with self._db.begin() as transaction:
+                rows = transaction.get_datasets_without_extent(after_id, limit=batch_size)
+                for dataset in self._make_many(rows):
+                    transaction.update_dataset_extent(dataset.id, dataset.extent)
+            if not rows:
+                return count
+            count += len(rows)
+            after_id = rows[-1].id
+            _LOG.info("Stored extents of %d datasets", count)
 
     def get_field_names(self, product_name=None):
         """
@@ -491,7 +671,7 @@ class DatasetResource(AbstractDatasetResource):
         :param dict metadata:
         :rtype: list[Dataset]
         """
-        with self._db.connect() as connection:
+        with self._db.stream() as connection:
             for dataset in self._make_many(connection.search_datasets_by_metadata(metadata)):
                 yield dataset
 
@@ -499,6 +679,9 @@ class DatasetResource(AbstractDatasetResource):
         """
         Perform a search, returning results as Dataset objects.
 
+        Besides search fields ``query`` can contain a ``geopolygon``, only datasets
+        with extent intersecting it are returned then.
+
         :param Union[str,float,Range,list] query:
         :param int limit: Limit number of datasets
         :rtype: __generator[Dataset]
@@ -509,6 +692,46 @@ class DatasetResource(AbstractDatasetResource):
                                                             limit=limit):
             yield from self._make_many(datasets, product)
 
+    def search_page(self, page_size=1000, continuation=None, order_by='id', **query):
+        """
+        Perform a search, returning one page of results, see :meth:`AbstractDatasetResource.search_page`.
+
+        Each page is a keyset query: datasets after the last one of the previous page. Id order uses
+        the primary key and (time, id) order has an index for each product, so pages are as quick
+        at the end of a product as at the start.
+
+        :param int page_size: Maximum number of datasets in the page
+        :param str continuation: Token returned with the previous page
+        :param str order_by: 'id' or 'time'
+        :rtype: DatasetPage
+        """
+        if order_by not in SEARCH_PAGE_ORDERS:
+            raise ValueError(f'Unknown order {order_by!r}, expected one of {SEARCH_PAGE_ORDERS}')
+        if page_size < 1:
+            raise ValueError('Page size must be positive')
+        after_product, after = parse_continuation(continuation, order_by) if continuation else (None, None)
+
+        product_queries = sorted(self._search_product_exprs(query), key=lambda pq: pq[0].id)
+        datasets = []
+        for product, query_exprs, _, _ in product_queries:
+            if after_product is not None and product.id < after_product:
+                continue
+            time_field = None
+            if order_by == 'time':
+                time_field = product.metadata_type.dataset_fields.get('time')
+                if time_field is None:
+                    raise ValueError(f'Product {product.name} has no time field to order by')
+            with self._db.connect() as connection:
+                results = connection.search_datasets_page(query_exprs, page_size - len(datasets),
+                                                          after=after if product.id == after_product else None,
+                                                          time_field=time_field)
+            datasets.extend(self._make_many(results, product))
+            if len(datasets) == page_size:
+                last = results[-1]
+                key = (last.keyset_time, last.id) if time_field is not None else last.id
+                return DatasetPage(datasets, make_continuation(order_by, product.id, key))
+        return DatasetPage(datasets, None)
+
     def search_by_product(self, **query):
         """
         Perform a search, returning datasets grouped by product type.
@@ -516,7 +739,9 @@ class DatasetResource(AbstractDatasetResource):
         :param dict[str,str|float|datacube.model.Range] query:
         :rtype: __generator[(Product,  __generator[Dataset])]]
         """
-        for product, datasets in self._do_search_by_product(query):
+        # Datasets of a product can be consumed after moving on to the next product,
+        # so results can't be streamed from a cursor that only lives for one step
+        for product, datasets in self._do_search_by_product(query, stream=False):
             yield product, self._make_many(datasets, product)
 
     def search_returning(self, field_names, limit=None, **query):
@@ -609,10 +834,35 @@ class DatasetResource(AbstractDatasetResource):
             q['product_id'] = product.id
             yield q, product
 
+    def _product_query_exprs(self, query):
+        """
+        Every product matching search terms, with the expressions for searching its datasets.
+
+        :rtype: __generator[(Product, tuple[PgExpression])]
+        """
+        query = dict(query)
+        geopolygon = query.pop('geopolygon', None)
+        if geopolygon is not None:
+            with self._db.connect() as connection:
+                if not connection.has_dataset_extents:
+                    raise IndexSetupError('Searching by geopolygon needs dataset extents, '
+                                          'an administrator must run: datacube system init')
+
+        for q, product in self._get_product_queries(query):
+            dataset_fields = product.metadata_type.dataset_fields
+            query_exprs = tuple(fields.to_expressions(dataset_fields.get, **q))
+            if geopolygon is not None:
+                query_exprs += (extent_intersects(geopolygon),)
+            yield product, query_exprs
+
     # pylint: disable=too-many-locals
-    def _do_search_by_product(self, query, return_fields=False, select_field_names=None,
-                              with_source_ids=False, source_filter=None,
-                              limit=None):
+    def _search_product_exprs(self, query, return_fields=False, select_field_names=None, source_filter=None):
+        """
+        Everything needed for searching datasets of each product matching search terms.
+
+        :rtype: __generator[(Product, tuple[PgExpression], tuple[PgExpression], tuple[PgField])]
+        :return: product, query expressions, source expressions, fields to select
+        """
         if source_filter:
             product_queries = list(self._get_product_queries(source_filter))
             if not product_queries:
@@ -627,7 +877,7 @@ class DatasetResource(AbstractDatasetResource):
         else:
             source_exprs = None
 
-        product_queries = list(self._get_product_queries(query))
+        product_queries = list(self._product_query_exprs(query))
         if not product_queries:
             product = query.get('product', None)
             if product is None:
@@ -635,9 +885,8 @@ class DatasetResource(AbstractDatasetResource):
             else:
                 raise ValueError(f"No such product: {product}")
 
-        for q, product in product_queries:
+        for product, query_exprs in product_queries:
             dataset_fields = product.metadata_type.dataset_fields
-            query_exprs = tuple(fields.to_expressions(dataset_fields.get, **q))
             select_fields = None
             if return_fields:
                 # if no fields specified, select all
@@ -647,7 +896,14 @@ class DatasetResource(AbstractDatasetResource):
                 else:
                     select_fields = tuple(dataset_fields[field_name]
                                           for field_name in select_field_names)
-            with self._db.connect() as connection:
+            yield product, query_exprs, source_exprs, select_fields
+
+    def _do_search_by_product(self, query, return_fields=False, select_field_names=None,
+                              with_source_ids=False, source_filter=None,
+                              limit=None, stream=True):
+        for product, query_exprs, source_exprs, select_fields in self._search_product_exprs(
+                query, return_fields, select_field_names, source_filter):
+            with (self._db.stream() if stream else self._db.connect()) as connection:
                 yield (product,
                        connection.search_datasets(
                            query_exprs,
@@ -658,13 +914,13 @@ class DatasetResource(AbstractDatasetResource):
                        ))
 
     def _do_count_by_product(self, query):
-        product_queries = self._get_product_queries(query)
-
-        for q, product in product_queries:
-            dataset_fields = product.metadata_type.dataset_fields
-            query_exprs = tuple(fields.to_expressions(dataset_fields.get, **q))
+        for product, query_exprs in self._product_query_exprs(query):
             with self._db.connect() as connection:
-                count = connection.count_datasets(query_exprs)
+                summary = None
+                if len(query_exprs) == 1:
+                    # Nothing but the product is selected: all of its datasets are counted in its summary
+                    summary = connection.get_product_summary(product.id)
+                count = summary.dataset_count if summary else connection.count_datasets(query_exprs)
             if count > 0:
                 yield product, count
 
@@ -694,7 +950,9 @@ class DatasetResource(AbstractDatasetResource):
                     end,
                     period,
                     dataset_fields.get('time'),
-                    query_exprs
+                    query_exprs,
+                    # Nothing but the product is selected: its summary can have the counts
+                    summary_product_id=product.id if len(query_exprs) == 1 else None,
                 ))
 
     def search_summaries(self, **query):
@@ -712,37 +970,57 @@ class DatasetResource(AbstractDatasetResource):
         """
         Returns the minimum and maximum acquisition time of the product.
         """
+        return tuple(self.get_product_summary(product).time)
 
-        # Get the offsets from dataset doc
-        product = self.types.get_by_name(product)
-        dataset_section = product.metadata_type.definition['dataset']
-        min_offset = dataset_section['search_fields']['time']['min_offset']
-        max_offset = dataset_section['search_fields']['time']['max_offset']
-
-        time_min = DateDocField('aquisition_time_min',
-                                'Min of time when dataset was acquired',
-                                DATASET.c.metadata,
-                                False,  # is it indexed
-                                offset=min_offset,
-                                selection='least')
-
-        time_max = DateDocField('aquisition_time_max',
-                                'Max of time when dataset was acquired',
-                                DATASET.c.metadata,
-                                False,  # is it indexed
-                                offset=max_offset,
-                                selection='greatest')
+    def get_product_summary(self, product: str) -> ProductSummary:
+        """
+        Summarise the active datasets of a product.
 
-        with self._db.connect() as connection:
-            result = connection.execute(
-                select(
-                    [func.min(time_min.alchemy_expression), func.max(time_max.alchemy_expression)]
-                ).where(
-                    DATASET.c.product_ref == product.id
-                )
-            ).first()
+        Uses the stored summary of the product if it is up to date, otherwise goes through all
+        its datasets and stores the result for next time (see :meth:`rebuild_product_summary`),
+        if the database and user permissions allow it.
 
-        return result
+        :param product: Name of product
+        """
+        prod = self.types.get_by_name(product)
+        if prod is None:
+            raise ValueError(f"Product {product} not in index")
+        dataset_fields = prod.metadata_type.dataset_fields
+        with self._db.connect() as connection:
+            summary = connection.get_product_summary(prod.id)
+            if summary is None and not connection.has_product_summaries:
+                # Nowhere to store it until `datacube system init` adds the summary tables
+                return _product_summary(connection.calculate_product_summary(prod.id, dataset_fields))
+
+        if summary is None or summary.bounds_stale:
+            _LOG.debug('No up to date summary of %s, rebuilding it', product)
+            try:
+                with self._db.begin() as transaction:
+                    transaction.rebuild_product_summary(prod.id, dataset_fields)
+                    summary = transaction.get_product_summary(prod.id)
+            except ProgrammingError as e:
+                if not isinstance(e.orig, InsufficientPrivilege):
+                    raise
+                _LOG.debug('Not allowed to store summary of %s, calculating it', product)
+                with self._db.connect() as connection:
+                    summary = connection.calculate_product_summary(prod.id, dataset_fields)
+
+        return _product_summary(summary)
+
+    def rebuild_product_summary(self, product: str) -> None:
+        """
+        Recalculate the stored summary of a product from scratch.
+
+        Needed for products indexed before summaries were kept, or to tighten stale bounds after
+        archiving datasets. Adding and archiving datasets (of any product) waits until it's finished.
+
+        :param product: Name of product
+        """
+        prod = self.types.get_by_name(product)
+        if prod is None:
+            raise ValueError(f"Product {product} not in index")
+        with self._db.begin() as transaction:
+            transaction.rebuild_product_summary(prod.id, prod.metadata_type.dataset_fields)
 
     # pylint: disable=redefined-outer-name
     def search_returning_datasets_light(self, field_names: tuple, custom_offsets=None, limit=None, **query):
@@ -787,23 +1065,23 @@ class DatasetResource(AbstractDatasetResource):
                 class DatasetLight(result_type):  # type: ignore
                     __slots__ = ()
 
-            with self._db.connect() as connection:
+            with self._db.stream() as connection:
                 results = connection.search_unique_datasets(
                     query_exprs,
                     select_fields=select_fields,
                     limit=limit
                 )
 
-            for result in results:
-                field_values = dict()
-                for i_, field in enumerate(select_fields):
-                    # We need to load the simple doc fields
-                    if isinstance(field, SimpleDocField):
-                        field_values[field.name] = json.loads(result[i_])
-                    else:
-                        field_values[field.name] = result[i_]
+                for result in results:
+                    field_values = dict()
+                    for i_, field in enumerate(select_fields):
+                        # We need to load the simple doc fields
+                        if isinstance(field, SimpleDocField):
+                            field_values[field.name] = json.loads(result[i_])
+                        else:
+                            field_values[field.name] = result[i_]
 
-                yield DatasetLight(**field_values)  # type: ignore
+                    yield DatasetLight(**field_values)  # type: ignore
 
     def make_select_fields(self, product, field_names, custom_offsets):
         """
@@ -884,3 +1162,13 @@ class DatasetResource(AbstractDatasetResource):
             custom_exprs.append(fields.as_expression(custom_field, custom_query[key]))
 
         return custom_exprs
+
+
+def _product_summary(summary) -> ProductSummary:
+    """
+    ProductSummary from a stored or calculated product summary row
+    """
+    bbox = None
+    if None not in (summary.lon_min, summary.lat_min, summary.lon_max, summary.lat_max):
+        bbox = BoundingBox(summary.lon_min, summary.lat_min, summary.lon_max, summary.lat_max)
+    return ProductSummary(summary.dataset_count, Range(summary.time_min, summary.time_max), bbox)
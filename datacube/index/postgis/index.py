@@ -43,6 +43,8 @@ class Index(AbstractIndex):
     supports_legacy = False
     # Hopefully can reinstate non-geo support, but dropping for now will make progress easier.
     supports_nongeo = False
+    # Read operations can also be run on an asyncpg connection pool
+    supports_async = True
 
     def __init__(self, db: PostGisDb) -> None:
         # POSTGIS driver is not stable with respect to database schema or internal APIs.
@@ -56,6 +58,13 @@ WARNING: Database schema and internal APIs may change significantly between rele
         self._products = ProductResource(db, self.metadata_types)
         self._datasets = DatasetResource(db, self.products)
 
+    @property
+    def supports_spatial_indexes(self) -> bool:  # type: ignore[override]
+        # Dataset extents are stored in a spatially indexed geometry column, older databases
+        # get it from `datacube system init`
+        with self._db.connect() as connection:
+            return connection.has_dataset_extents
+
     @property
     def users(self) -> UserResource:
         return self._users
@@ -94,6 +103,10 @@ WARNING: Database schema and internal APIs may change significantly between rele
             for doc in default_metadata_type_docs():
                 self.metadata_types.add(self.metadata_types.from_doc(doc), allow_table_lock=True)
 
+        if not is_new:
+            # Datasets might predate the extent column
+            self.datasets._populate_extents()  # pylint: disable=protected-access
+
         return is_new
 
     def close(self):
@@ -4,8 +4,7 @@
 # SPDX-License-Identifier: Apache-2.0
 import logging
 
-from cachetools.func import lru_cache
-
+from datacube.index._catalogue import CatalogueCache
 from datacube.index.abstract import AbstractMetadataTypeResource
 from datacube.model import MetadataType
 from datacube.utils import jsonify_document, changes, _readable_offset
@@ -20,9 +19,8 @@ class MetadataTypeResource(AbstractMetadataTypeResource):
         :type db: datacube.drivers.postgres._connections.PostgresDb
         """
         self._db = db
-
-        self.get_unsafe = lru_cache()(self.get_unsafe)
-        self.get_by_name_unsafe = lru_cache()(self.get_by_name_unsafe)
+        #: Metadata types and products, shared with the product resource
+        self.catalogue = CatalogueCache(db, ttl=db.catalogue_ttl)
 
     def __getstate__(self):
         """
@@ -73,6 +71,7 @@ class MetadataTypeResource(AbstractMetadataTypeResource):
                     definition=metadata_type.definition,
                     concurrently=not allow_table_lock
                 )
+            self.catalogue.invalidate()
         return self.get_by_name(metadata_type.name)
 
     def can_update(self, metadata_type, allow_unsafe_updates=False):
@@ -148,8 +147,7 @@ class MetadataTypeResource(AbstractMetadataTypeResource):
                 concurrently=not allow_table_lock
             )
 
-        self.get_by_name_unsafe.cache_clear()   # type: ignore[attr-defined]
-        self.get_unsafe.cache_clear()           # type: ignore[attr-defined]
+        self.catalogue.invalidate()
         return self.get_by_name(metadata_type.name)
 
     def update_document(self, definition, allow_unsafe_updates=False):
@@ -164,23 +162,17 @@ class MetadataTypeResource(AbstractMetadataTypeResource):
         """
         return self.update(self.from_doc(definition), allow_unsafe_updates=allow_unsafe_updates)
 
-    # This is memoized in the constructor
-    # pylint: disable=method-hidden
-    def get_unsafe(self, id_):  # type: ignore
-        with self._db.connect() as connection:
-            record = connection.get_metadata_type(id_)
-        if record is None:
-            raise KeyError('%s is not a valid MetadataType id')
-        return self._make_from_query_row(record)
-
-    # This is memoized in the constructor
-    # pylint: disable=method-hidden
-    def get_by_name_unsafe(self, name):  # type: ignore
-        with self._db.connect() as connection:
-            record = connection.get_metadata_type_by_name(name)
-        if not record:
+    def get_unsafe(self, id_):
+        metadata_type = self.catalogue.metadata_type(id_)
+        if metadata_type is None:
+            raise KeyError('%s is not a valid MetadataType id' % id_)
+        return metadata_type
+
+    def get_by_name_unsafe(self, name):
+        metadata_type = self.catalogue.metadata_type_by_name(name)
+        if metadata_type is None:
             raise KeyError('%s is not a valid MetadataType name' % name)
-        return self._make_from_query_row(record)
+        return metadata_type
 
     def check_field_indexes(self, allow_table_lock=False,
                             rebuild_views=False, rebuild_indexes=False):
@@ -205,20 +197,7 @@ class MetadataTypeResource(AbstractMetadataTypeResource):
 
         :rtype: iter[datacube.model.MetadataType]
         """
-        with self._db.connect() as connection:
-            return self._make_many(connection.get_all_metadata_types())
-
-    def _make_many(self, query_rows):
-        """
-        :rtype: list[datacube.model.MetadataType]
-        """
-        return (self._make_from_query_row(c) for c in query_rows)
-
-    def _make_from_query_row(self, query_row):
-        """
-        :rtype: datacube.model.MetadataType
-        """
-        return self._make(query_row['definition'], query_row['id'])
+        return iter(self.catalogue.get().metadata_types.values())
 
     def _make(self, definition, id_=None):
         """
@@ -4,8 +4,6 @@
 # SPDX-License-Identifier: Apache-2.0
 import logging
 
-from cachetools.func import lru_cache
-
 from datacube.index import fields
 from datacube.index.abstract import AbstractProductResource
 from datacube.model import DatasetType, MetadataType
@@ -30,9 +28,7 @@ class ProductResource(AbstractProductResource):
         """
         self._db = db
         self.metadata_type_resource = metadata_type_resource
-
-        self.get_unsafe = lru_cache()(self.get_unsafe)
-        self.get_by_name_unsafe = lru_cache()(self.get_by_name_unsafe)
+        self.catalogue = metadata_type_resource.catalogue
 
     def __getstate__(self):
         """
@@ -83,6 +79,7 @@ class ProductResource(AbstractProductResource):
                     definition=product.definition,
                     concurrently=not allow_table_lock,
                 )
+            self.catalogue.invalidate()
         return self.get_by_name(product.name)
 
     def can_update(self, product, allow_unsafe_updates=False):
@@ -197,8 +194,7 @@ class ProductResource(AbstractProductResource):
                 concurrently=not allow_table_lock
             )
 
-        self.get_by_name_unsafe.cache_clear()  # type: ignore[attr-defined]
-        self.get_unsafe.cache_clear()          # type: ignore[attr-defined]
+        self.catalogue.invalidate()
         return self.get_by_name(product.name)
 
     def update_document(self, definition, allow_unsafe_updates=False, allow_table_lock=False):
@@ -221,23 +217,17 @@ class ProductResource(AbstractProductResource):
             allow_table_lock=allow_table_lock,
         )
 
-    # This is memoized in the constructor
-    # pylint: disable=method-hidden
-    def get_unsafe(self, id_):  # type: ignore
-        with self._db.connect() as connection:
-            result = connection.get_product(id_)
-        if not result:
+    def get_unsafe(self, id_):
+        product = self.catalogue.product(id_)
+        if product is None:
             raise KeyError('"%s" is not a valid Product id' % id_)
-        return self._make(result)
-
-    # This is memoized in the constructor
-    # pylint: disable=method-hidden
-    def get_by_name_unsafe(self, name):  # type: ignore
-        with self._db.connect() as connection:
-            result = connection.get_product_by_name(name)
-        if not result:
+        return product
+
+    def get_by_name_unsafe(self, name):
+        product = self.catalogue.product_by_name(name)
+        if product is None:
             raise KeyError('"%s" is not a valid Product name' % name)
-        return self._make(result)
+        return product
 
     def get_with_fields(self, field_names):
         """
@@ -305,15 +295,4 @@ class ProductResource(AbstractProductResource):
         """
         Retrieve all Products
         """
-        with self._db.connect() as connection:
-            return (self._make(record) for record in connection.get_all_products())
-
-    def _make_many(self, query_rows):
-        return (self._make(c) for c in query_rows)
-
-    def _make(self, query_row) -> DatasetType:
-        return DatasetType(
-            definition=query_row['definition'],
-            metadata_type=cast(MetadataType, self.metadata_type_resource.get(query_row['metadata_type_ref'])),
-            id_=query_row['id'],
-        )
+        return iter(self.catalogue.get().products.values())
@@ -39,6 +39,9 @@ class Index(AbstractIndex):
     :type metadata_types: datacube.index._metadata_types.MetadataTypeResource
     """
 
+    # Read operations can also be run on an asyncpg connection pool
+    supports_async = True
+
     def __init__(self, db: PostgresDb) -> None:
         self._db = db
 
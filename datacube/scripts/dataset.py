@@ -8,7 +8,7 @@ import logging
 import sys
 from collections import OrderedDict
 from textwrap import dedent
-from typing import cast, Iterable, Mapping, MutableMapping, Any, List, Set
+from typing import cast, Iterable, Mapping, MutableMapping, Any, List, Optional, Set
 from uuid import UUID
 
 import click
@@ -339,7 +339,15 @@ def build_dataset_info(index: Index, dataset: Dataset,
                        show_sources: bool = False,
                        show_derived: bool = False,
                        depth: int = 1,
-                       max_depth: int = 99) -> Mapping[str, Any]:
+                       max_depth: int = 99,
+                       derived_graph: Optional[Mapping[UUID, List[Dataset]]] = None) -> Mapping[str, Any]:
+    """
+    Describe a dataset, and optionally its sources and derived datasets, up to ``max_depth`` levels deep.
+
+    Sources are taken from ``dataset.sources``, so get the dataset with ``include_sources=True``.
+    Derived datasets are retrieved all at once, from ``derived_graph`` if supplied
+    (see :meth:`datacube.index.abstract.AbstractDatasetResource.get_derived_graph`).
+    """
     info = OrderedDict((
         ('id', str(dataset.id)),
         ('product', dataset.type.name),
@@ -361,10 +369,13 @@ def build_dataset_info(index: Index, dataset: Dataset,
                                for key, source in dataset.sources.items()}
 
         if show_derived:
+            if derived_graph is None:
+                derived_graph = index.datasets.get_derived_graph(dataset.id, max_depth=max_depth - depth)
             info['derived'] = [build_dataset_info(index, derived,
                                                   show_sources=False, show_derived=True,
-                                                  depth=depth + 1, max_depth=max_depth)
-                               for derived in index.datasets.get_derived(dataset.id)]
+                                                  depth=depth + 1, max_depth=max_depth,
+                                                  derived_graph=derived_graph)
+                               for derived in derived_graph.get(dataset.id, [])]
 
     return info
 
@@ -424,7 +435,8 @@ def info_cmd(index: Index, show_sources: bool, show_derived: bool,
 
     def get_datasets(ids):
         for id_ in ids:
-            dataset = index.datasets.get(id_, include_sources=show_sources)
+            # only the generations of sources that are shown
+            dataset = index.datasets.get(id_, include_sources=show_sources, max_depth=max_depth - 1)
             if dataset:
                 yield dataset
             else:
@@ -466,10 +478,7 @@ def _get_derived_set(index: Index, id_: UUID) -> Set[Dataset]:
     (children, grandchildren, great-grandchildren...)
     """
     derived_set = {cast(Dataset, index.datasets.get(id_))}
-    to_process = {id_}
-    while to_process:
-        derived = index.datasets.get_derived(to_process.pop())
-        to_process.update(d.id for d in derived)
+    for derived in index.datasets.get_derived_graph(id_).values():
         derived_set.update(derived)
     return derived_set
 
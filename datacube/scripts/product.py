@@ -209,6 +209,31 @@ def list_products(dc, output_format):
     writer(products)
 
 
+@product_cli.command('rebuild-summary')
+@click.argument('product_names', nargs=-1)
+@ui.pass_index()
+def rebuild_summary(index, product_names):
+    """
+    Recalculate the dataset summaries of products (default: all of them).
+
+    Summaries give quick dataset counts and time bounds. They are kept up to date
+    as datasets are added or archived, but products indexed before summaries existed
+    need a rebuild, as do products with stale bounds after archiving datasets.
+    """
+    if not product_names:
+        product_names = [p.name for p in index.products.get_all()]
+
+    for name in product_names:
+        if index.products.get_by_name(name) is None:
+            echo('No such product: {!r}'.format(name), err=True)
+            sys.exit(1)
+
+    for name in product_names:
+        echo(f'Summarising "{name}"', nl=False)
+        index.datasets.rebuild_product_summary(name)
+        echo(' DONE')
+
+
 @product_cli.command('show')
 @click.option('-f', 'output_format', help='Output format',
               type=click.Choice(['yaml', 'json']), default='yaml', show_default=True)
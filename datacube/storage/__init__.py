@@ -16,13 +16,19 @@ from ..drivers.datasource import (
 
 from ._base import BandInfo, measurement_paths
 from ._load import reproject_and_fuse
+from ._fusers import Fuser, register_fuser, available_fusers
+from ._shared import SharedStorage
 
 __all__ = (
     'BandInfo',
     'DataSource',
+    'Fuser',
     'GeoRasterReader',
     'RasterShape',
     'RasterWindow',
+    'SharedStorage',
+    'available_fusers',
     'measurement_paths',
+    'register_fuser',
     'reproject_and_fuse',
 )
@@ -0,0 +1,190 @@
+# This file is part of the Open Data Cube, see https://opendatacube.org for more information
+#
+# Copyright (c) 2015-2020 ODC Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Built-in fusers, selected by name with ``fuse_func=`` in ``dc.load``.
+
+A fuser updates *fused result so far* with *new data* in place. Built-in
+fusers are classes, an instance is created for every output slice being
+loaded, so they can keep state across sources of that slice.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+
+import numpy as np
+
+from datacube.utils.math import invalid_mask, valid_mask, dtype_is_float
+
+FuserFunction = Callable[[np.ndarray, np.ndarray], Any]  # pylint: disable=invalid-name
+Nodata = Optional[Union[int, float]]  # pylint: disable=invalid-name
+Roi = Tuple[slice, ...]  # pylint: disable=invalid-name
+
+
+class Fuser:
+    """
+    Base class for built-in fusers.
+
+    Instances can be used as plain ``fuse_func(dst, src)``. Loaders that know
+    where in the output slice ``dst`` is call :meth:`fuse` instead, which is
+    what allows fusers like :class:`MeanFuser` to keep per-pixel state.
+    """
+
+    def __init__(self, nodata: Nodata):
+        self.nodata = nodata
+
+    def _nan_nodata(self, dtype: np.dtype) -> bool:
+        return dtype_is_float(dtype) and (self.nodata is None or np.isnan(self.nodata))
+
+    def __call__(self, dst: np.ndarray, src: np.ndarray) -> None:
+        raise NotImplementedError()
+
+    def fuse(self, out: np.ndarray, roi: Roi, src: np.ndarray) -> None:
+        """ Update ``out[roi]`` with ``src``.
+
+        :param out: Whole output slice
+        :param roi: Region of ``out`` that ``src`` covers
+        :param src: New data
+        """
+        self(out[roi], src)
+
+
+class CopyFuser(Fuser):
+    """ Keep first valid observation (this is the default).
+    """
+
+    def __call__(self, dst: np.ndarray, src: np.ndarray) -> None:
+        np.copyto(dst, src, where=invalid_mask(dst, self.nodata))
+
+
+class LastFuser(Fuser):
+    """ Keep last valid observation.
+    """
+
+    def __call__(self, dst: np.ndarray, src: np.ndarray) -> None:
+        if self.nodata is None and not dtype_is_float(src.dtype):
+            np.copyto(dst, src)
+        else:
+            np.copyto(dst, src, where=valid_mask(src, self.nodata))
+
+
+class _ReduceFuser(Fuser):
+    """ Combine valid observations with a binary ufunc.
+    """
+    op: Callable = np.maximum
+    nan_op: Optional[Callable] = None
+
+    def __call__(self, dst: np.ndarray, src: np.ndarray) -> None:
+        if self.nan_op is not None and self._nan_nodata(dst.dtype):
+            # nan-aware ufuncs ignore missing values, no masks needed
+            self.nan_op(dst, src, out=dst)
+            return
+
+        if self.nodata is None and not dtype_is_float(dst.dtype):
+            self.op(dst, src, out=dst)
+            return
+
+        # Fill missing pixels first, after that op(src, src) == src, so we
+        # only need to know where src is valid
+        np.copyto(dst, src, where=invalid_mask(dst, self.nodata))
+        self.op(dst, src, out=dst, where=valid_mask(src, self.nodata))
+
+
+class MaxFuser(_ReduceFuser):
+    """ Keep largest valid observation.
+    """
+    op = np.maximum
+    nan_op = np.fmax
+
+
+class MinFuser(_ReduceFuser):
+    """ Keep smallest valid observation.
+    """
+    op = np.minimum
+    nan_op = np.fmin
+
+
+class OrFuser(_ReduceFuser):
+    """ Bitwise OR of valid observations, for bit-flag data.
+    """
+    op = np.bitwise_or
+
+
+class MeanFuser(Fuser):
+    """ Mean of valid observations.
+
+    Keeps running sum and count of valid observations for every pixel of the
+    output slice, output holds mean of observations seen so far after every
+    update. Integer outputs are rounded to the nearest integer.
+    """
+
+    def __init__(self, nodata: Nodata):
+        super().__init__(nodata)
+        self._sum: Optional[np.ndarray] = None
+        self._count: Optional[np.ndarray] = None
+
+    def __call__(self, dst: np.ndarray, src: np.ndarray) -> None:
+        self.fuse(dst, tuple(slice(None) for _ in dst.shape), src)
+
+    def fuse(self, out: np.ndarray, roi: Roi, src: np.ndarray) -> None:
+        if self._sum is None:
+            # Output might already contain first observation
+            valid = valid_mask(out, self.nodata)
+            self._count = valid.astype('uint32')
+            self._sum = np.zeros(out.shape, dtype='float64')
+            np.copyto(self._sum, out, where=valid)
+        elif self._sum.shape != out.shape:
+            raise ValueError("MeanFuser can only be used with one output slice")
+
+        _sum, count = self._sum[roi], self._count[roi]
+        valid = valid_mask(src, self.nodata)
+        np.add(_sum, src, out=_sum, where=valid)
+        np.add(count, 1, out=count, where=valid)
+
+        dst = out[roi]
+        if dtype_is_float(dst.dtype):
+            np.divide(_sum, count, out=dst, where=count > 0, casting='unsafe')
+        else:
+            mean = np.divide(_sum, count, where=count > 0)
+            np.copyto(dst, np.rint(mean), where=count > 0, casting='unsafe')
+
+
+FUSERS: Dict[str, Type[Fuser]] = {
+    'copy': CopyFuser,
+    'first': CopyFuser,
+    'last': LastFuser,
+    'max': MaxFuser,
+    'min': MinFuser,
+    'or': OrFuser,
+    'mean': MeanFuser,
+}
+
+
+def register_fuser(name: str, fuser: Type[Fuser]) -> None:
+    """ Make ``fuser`` available as ``fuse_func=name``.
+    """
+    FUSERS[name] = fuser
+
+
+def available_fusers() -> List[str]:
+    """ Names of all registered fusers.
+    """
+    return sorted(FUSERS)
+
+
+def check_fuser(fuse_func: Union[None, str, FuserFunction]) -> None:
+    """ Raise ValueError if ``fuse_func`` is a name of an unknown fuser.
+    """
+    if isinstance(fuse_func, str) and fuse_func not in FUSERS:
+        raise ValueError("Unknown fuser: {!r}, expect one of: {}".format(
+            fuse_func, ', '.join(available_fusers())))
+
+
+def resolve_fuser(fuse_func: Union[None, str, FuserFunction],
+                  nodata: Nodata) -> Optional[FuserFunction]:
+    """ Turn fuser name into a new fuser instance, other values are returned as is.
+    """
+    if not isinstance(fuse_func, str):
+        return fuse_func
+
+    check_fuser(fuse_func)
+    return FUSERS[fuse_func](nodata)
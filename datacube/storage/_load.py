@@ -10,6 +10,7 @@ Important functions are:
 """
 import logging
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import numpy as np
 from xarray.core.dataarray import DataArray as XrDataArray, DataArrayCoordinates
 from xarray.core.dataset import Dataset as XrDataset
@@ -20,17 +21,26 @@ from typing import (
 
 from datacube.utils import ignore_exceptions_if
 from datacube.utils.math import invalid_mask
-from datacube.utils.geometry import GeoBox, roi_is_empty
+from datacube.utils.geometry import (
+    GeoBox,
+    roi_is_empty,
+    roi_intersect,
+    roi_pad,
+    roi_shape,
+    warp_plan,
+)
 from datacube.model import Measurement
 from datacube.drivers._types import ReaderDriver
 from ..drivers.datasource import DataSource
 from ._base import BandInfo
+from ._fusers import CopyFuser, Fuser, FuserFunction, resolve_fuser
 
 _LOG = logging.getLogger(__name__)
 
-FuserFunction = Callable[[np.ndarray, np.ndarray], Any]  # pylint: disable=invalid-name
 ProgressFunction = Callable[[int, int], Any]  # pylint: disable=invalid-name
 
+DEFAULT_MAX_IN_FLIGHT = 8
+
 
 def _default_fuser(dst: np.ndarray, src: np.ndarray, dst_nodata) -> None:
     """ Overwrite only those pixels in `dst` with `src` that are "not valid"
@@ -41,41 +51,80 @@ def _default_fuser(dst: np.ndarray, src: np.ndarray, dst_nodata) -> None:
     np.copyto(dst, src, where=invalid_mask(dst, dst_nodata))
 
 
+def _fuse(fuse_func: FuserFunction, dst: np.ndarray, roi: Tuple[slice, slice], src: np.ndarray) -> None:
+    # roi is along the last 2 dimensions, dst might be 3D
+    nd_roi = (..., *roi)
+    if isinstance(fuse_func, Fuser):
+        fuse_func.fuse(dst, nd_roi, src)
+    else:
+        fuse_func(dst[nd_roi], src)
+
+
 def reproject_and_fuse(datasources: List[DataSource],
                        destination: np.ndarray,
                        dst_gbox: GeoBox,
                        dst_nodata: Optional[Union[int, float]],
                        resampling: str = 'nearest',
-                       fuse_func: Optional[FuserFunction] = None,
+                       fuse_func: Union[None, str, FuserFunction] = None,
                        skip_broken_datasets: bool = False,
                        progress_cbk: Optional[ProgressFunction] = None,
-                       extra_dim_index: Optional[int] = None):
+                       extra_dim_index: Optional[Union[int, slice]] = None,
+                       prefill: bool = True,
+                       use_overviews: bool = True,
+                       overview_tol: float = 1e-3):
     """
     Reproject and fuse `sources` into a 2D numpy array `destination`.
 
+    For sources with an extra dimension `destination` can also be 3D, with
+    `extra_dim_index` a slice of indexes along the extra dimension, all of
+    them are then read from every source at once.
+
+    When using the default fuser, sources are read straight into `destination`
+    as long as they don't overlap any region written by previous sources, only
+    overlapping sources are read into a temporary array the size of the
+    affected region and then fused.
+
     :param datasources: Data sources to open and read from
     :param destination: ndarray of appropriate size to read data into
     :param dst_gbox: GeoBox defining destination region
+    :param fuse_func: Function ``(dst, src) -> None`` updating ``dst`` in place, or name of a built-in fuser
     :param skip_broken_datasets: Carry on in the face of adversity and failing reads.
     :param progress_cbk: If supplied will be called with 2 integers `Items processed, Total Items`
                          after reading each file.
+    :param extra_dim_index: Index (2D `destination`) or slice (3D `destination`) to read along the
+                            extra dimension of the sources
+    :param prefill: Fill `destination` with `dst_nodata` before reading, set to
+                    ``False`` when `destination` is already filled with `dst_nodata`.
+    :param use_overviews: When False read at full resolution even when down-sampling
+    :param overview_tol: Tolerance for matching shrink factor to an overview level
     """
     # pylint: disable=too-many-locals
-    from ._read import read_time_slice
-    assert len(destination.shape) == 2
+    from ._read import read_time_slice, rdr_geobox, _roi_within
+    assert destination.ndim == (3 if isinstance(extra_dim_index, slice) else 2)
 
     def copyto_fuser(dest: np.ndarray, src: np.ndarray) -> None:
         _default_fuser(dest, src, dst_nodata)
 
+    fuse_func = resolve_fuser(fuse_func, dst_nodata)
+
+    # Reading into a region with nothing but nodata in it is the same as fusing
+    # with the default fuser, custom fusers always need a separate buffer
+    can_read_direct = fuse_func is None or isinstance(fuse_func, CopyFuser)
     fuse_func = fuse_func or copyto_fuser
 
-    destination.fill(dst_nodata)
+    def read(rdr, dst, dst_roi=None):
+        return read_time_slice(rdr, dst, dst_gbox, resampling, dst_nodata, extra_dim_index,
+                               use_overviews=use_overviews, overview_tol=overview_tol, dst_roi=dst_roi)
+
+    if prefill:
+        destination.fill(dst_nodata)
+
     if len(datasources) == 0:
         return destination
     elif len(datasources) == 1:
         with ignore_exceptions_if(skip_broken_datasets):
             with datasources[0].open() as rdr:
-                read_time_slice(rdr, destination, dst_gbox, resampling, dst_nodata, extra_dim_index)
+                read(rdr, destination)
 
         if progress_cbk:
             progress_cbk(1, 1)
@@ -83,15 +132,32 @@ def reproject_and_fuse(datasources: List[DataSource],
         return destination
     else:
         # Multiple sources, we need to fuse them together into a single array
-        buffer_ = np.full(destination.shape, dst_nodata, dtype=destination.dtype)
+        written: List[Tuple[slice, slice]] = []
+
+        def overlaps_written(roi) -> bool:
+            return any(not roi_is_empty(roi_intersect(roi, w)) for w in written)
+
         for n_so_far, source in enumerate(datasources, 1):
             with ignore_exceptions_if(skip_broken_datasets):
                 with source.open() as rdr:
-                    roi = read_time_slice(rdr, buffer_, dst_gbox, resampling, dst_nodata, extra_dim_index)
-
-                if not roi_is_empty(roi):
-                    fuse_func(destination[roi], buffer_[roi])
-                    buffer_[roi] = dst_nodata  # clean up for next read
+                    rr = warp_plan(rdr_geobox(rdr), dst_gbox, resampling).rr
+                    # read_time_slice might pad the region by 1 pixel
+                    roi = roi_pad(rr.roi_dst, 1, dst_gbox.shape)
+
+                    if roi_is_empty(rr.roi_dst):
+                        pass
+                    elif can_read_direct and not overlaps_written(roi):
+                        roi = read(rdr, destination)
+                        written.append(roi)
+                    else:
+                        # Warped on the same grid as a direct read, only the buffer is smaller
+                        buffer_ = np.full(destination.shape[:-2] + roi_shape(roi), dst_nodata,
+                                          dtype=destination.dtype)
+                        read_roi = read(rdr, buffer_, dst_roi=roi)
+                        if not roi_is_empty(read_roi):
+                            _fuse(fuse_func, destination, read_roi,
+                                  buffer_[(..., *_roi_within(read_roi, roi))])
+                            written.append(roi)
 
             if progress_cbk:
                 progress_cbk(n_so_far, len(datasources))
@@ -126,10 +192,26 @@ def xr_load(sources: XrDataArray,
             measurements: List[Measurement],
             driver: ReaderDriver,
             driver_ctx_prev: Optional[Any] = None,
-            skip_broken_datasets: bool = False) -> Tuple[XrDataset, Any]:
+            skip_broken_datasets: bool = False,
+            max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> Tuple[XrDataset, Any]:
+    """
+    Load data from ``sources`` using reader driver ``driver``.
+
+    Every band read (open + read + reproject) is independent, so up to
+    ``max_in_flight`` of them are run concurrently. Results are fused into
+    the output on the calling thread as they complete, but always in the
+    order of the sources within each output slice, so the result is the
+    same as for a serial load.
+
+    :returns: Loaded data and load context of the driver, pass the latter as
+              ``driver_ctx_prev`` to the next call to recycle it.
+    """
     # pylint: disable=too-many-locals
     from ._read import read_time_slice_v2
 
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight should be at least 1")
+
     out = _allocate_storage(sources.coords, geobox, measurements)
 
     def all_groups() -> Iterator[Tuple[Measurement, Tuple[int, ...], List[BandInfo]]]:
@@ -145,22 +227,64 @@ def xr_load(sources: XrDataArray,
     groups = list(all_groups())
     ctx = driver.new_load_context(just_bands(groups), driver_ctx_prev)
 
-    # TODO: run upto N concurrently
-    for m, idx, bbi in groups:
+    dsts = []
+    fusers = []
+    for m, idx, _ in groups:
         dst = out.data_vars[m.name].values[idx]
         dst[:] = m.nodata
-        resampling = m.get('resampling_method', 'nearest')
-        fuse_func = m.get('fuser', None)
+        dsts.append(dst)
+        fusers.append(resolve_fuser(m.get('fuser', None), m.nodata))
 
-        for band in bbi:
+    def read_band(m: Measurement, band: BandInfo):
+        with ignore_exceptions_if(skip_broken_datasets):
             rdr = driver.open(band, ctx).result()
-
-            pix, roi = read_time_slice_v2(rdr, geobox, resampling, m.nodata)
-
-            if pix is not None:
-                if fuse_func:
-                    fuse_func(dst[roi], pix)
-                else:
-                    _default_fuser(dst[roi], pix, m.nodata)
+            return read_time_slice_v2(rdr, geobox, m.get('resampling_method', 'nearest'), m.nodata,
+                                      use_overviews=m.get('use_overviews', True),
+                                      overview_tol=m.get('overview_tol', 1e-3))
+        return None, None
+
+    def fuse(group_idx: int, pix: Optional[np.ndarray], roi) -> None:
+        if pix is None:
+            return
+        m = groups[group_idx][0]
+        dst = dsts[group_idx]
+        fuse_func = fusers[group_idx]
+        if fuse_func:
+            _fuse(fuse_func, dst, roi, pix)
+        else:
+            _default_fuser(dst[roi], pix, m.nodata)
+
+    # (group index, position within group) for every band read, in submission order
+    work = [(group_idx, pos)
+            for group_idx, (_, _, bbi) in enumerate(groups)
+            for pos in range(len(bbi))]
+    work.reverse()
+
+    next_pos = [0]*len(groups)
+    done = {}
+    in_flight = {}
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        try:
+            while work or in_flight:
+                # completed but not yet fused reads count towards the limit, this bounds memory use
+                while work and len(in_flight) + len(done) < max_in_flight:
+                    group_idx, pos = work.pop()
+                    m, _, bbi = groups[group_idx]
+                    in_flight[pool.submit(read_band, m, bbi[pos])] = (group_idx, pos)
+
+                completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in completed:
+                    group_idx, pos = in_flight.pop(fut)
+                    done[(group_idx, pos)] = fut.result()
+
+                    # fuse in order, as far as possible
+                    while (group_idx, next_pos[group_idx]) in done:
+                        fuse(group_idx, *done.pop((group_idx, next_pos[group_idx])))
+                        next_pos[group_idx] += 1
+        except BaseException:
+            for fut in in_flight:
+                fut.cancel()
+            raise
 
     return out, ctx
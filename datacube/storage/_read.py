@@ -6,7 +6,7 @@
 """
 from affine import Affine
 import numpy as np
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 
 from ..utils.math import is_almost_int, valid_mask
 
@@ -14,15 +14,11 @@ from ..utils.geometry import (
     roi_shape,
     roi_is_empty,
     roi_is_full,
-    roi_pad,
     GeoBox,
     w_,
-    warp_affine,
-    rio_reproject,
-    compute_reproject_roi)
+    warp_plan)
 
 from ..utils.geometry._warp import is_resampling_nn, Resampling, Nodata
-from ..utils.geometry import gbox as gbx
 
 
 def rdr_geobox(rdr) -> GeoBox:
@@ -85,7 +81,28 @@ def can_paste(rr, stol=1e-3, ttol=1e-2):
     return True, None
 
 
-def pick_read_scale(scale: float, rdr=None, tol=1e-3):
+def _roi_within(roi: Tuple[slice, slice], outer: Tuple[slice, slice]) -> Tuple[slice, slice]:
+    """ Translate ``roi`` to be relative to ``outer``, which has to contain it.
+    """
+    assert all(o.start <= s.start and s.stop <= o.stop for s, o in zip(roi, outer))
+    y, x = (slice(s.start - o.start, s.stop - o.start)
+            for s, o in zip(roi, outer))
+    return (y, x)
+
+
+def pick_read_scale(scale: float, rdr=None, tol=1e-3,
+                    resampling: Resampling = 'nearest',
+                    use_overviews: bool = True) -> int:
+    """
+    Pick integer shrink factor to apply when reading source image.
+
+    :param scale: Ratio of destination pixel size to source pixel size
+    :param rdr: Opened reader, consulted for available overview levels when resampling is not
+                nearest neighbour, such reads are only ever decimated to an overview level
+    :param tol: Tolerance for rounding ``scale`` up to the next integer or overview level
+    :param resampling: Resampling that will be applied after reading
+    :param use_overviews: When False always read at full resolution
+    """
     assert scale > 0
     # First find nearest integer scale
     #    Scale down to nearest integer, unless we can scale up by less than tol
@@ -94,19 +111,24 @@ def pick_read_scale(scale: float, rdr=None, tol=1e-3):
     # 2.8 -> 2
     # 0.3 -> 1
 
-    if scale < 1:
+    if scale < 1 or not use_overviews:
         return 1
 
     if is_almost_int(scale, tol):
         scale = np.round(scale)
 
-    scale = int(scale)
+    iscale = int(scale)
 
-    if rdr is not None:
-        # TODO: check available overviews in rdr
-        pass
+    if is_resampling_nn(resampling):
+        # GDAL picks appropriate overview level for decimated reads
+        return iscale
 
-    return scale
+    # Read from the coarsest overview level that is still at least as fine
+    # as destination, so that resampling is done by us with a method user
+    # asked for, rather than by GDAL with nearest neighbour. Full resolution
+    # when there is no such overview, or overviews are not known.
+    overviews = getattr(rdr, 'overviews', None) or []
+    return int(max((ovr for ovr in overviews if ovr <= scale), default=1))
 
 
 def read_time_slice(rdr,
@@ -114,23 +136,48 @@ def read_time_slice(rdr,
                     dst_gbox: GeoBox,
                     resampling: Resampling,
                     dst_nodata: Nodata,
-                    extra_dim_index: Optional[int] = None) -> Tuple[slice, slice]:
+                    extra_dim_index: Optional[Union[int, slice]] = None,
+                    use_overviews: bool = True,
+                    overview_tol: float = 1e-3,
+                    dst_roi: Optional[Tuple[slice, slice]] = None) -> Tuple[slice, slice]:
     """ From opened reader object read into `dst`
 
-    :returns: affected destination region
+    :param extra_dim_index: Index along the extra dimension of a 3D source to read into 2D `dst`,
+                            or a slice of indexes to read into 3D `dst` with a single read
+    :param use_overviews: When False read at full resolution even when down-sampling
+    :param overview_tol: Tolerance for matching shrink factor to an overview level
+    :param dst_roi: Region of `dst_gbox` covered by `dst`, default is all of it. It has to contain
+                    the affected region. Pixels are the same as when reading into all of `dst_gbox`.
+    :returns: affected destination region, of `dst_gbox`
     """
-    assert dst.shape == dst_gbox.shape
-    src_gbox = rdr_geobox(rdr)
+    if isinstance(extra_dim_index, slice):
+        extra_shape = (extra_dim_index.stop - extra_dim_index.start,)
+    else:
+        extra_shape = ()
+    if dst_roi is None:
+        assert dst.shape == extra_shape + dst_gbox.shape
+    else:
+        assert dst.shape == extra_shape + roi_shape(dst_roi)
 
-    rr = compute_reproject_roi(src_gbox, dst_gbox)
+    def dst_view(roi):
+        if dst_roi is not None:
+            roi = _roi_within(roi, dst_roi)
+        return dst[(..., *roi)]
+    plan = warp_plan(rdr_geobox(rdr), dst_gbox, resampling)
+    rr = plan.rr
 
     if roi_is_empty(rr.roi_dst):
         return rr.roi_dst
 
     is_nn = is_resampling_nn(resampling)
-    scale = pick_read_scale(rr.scale, rdr)
+    scale = pick_read_scale(rr.scale, rdr, tol=overview_tol,
+                            resampling=resampling,
+                            use_overviews=use_overviews)
 
     paste_ok, _ = can_paste(rr, ttol=0.9 if is_nn else 0.01)
+    if paste_ok and scale < np.round(rr.scale):
+        # decimated read would go through overviews, read full resolution and reproject instead
+        paste_ok = False
 
     def norm_read_args(roi, shape, extra_dim_index):
         if roi_is_full(roi, rdr.shape):
@@ -141,54 +188,46 @@ def read_time_slice(rdr,
 
         w = w_[roi]
 
-        # Build 3D read window
-        # Note: Might be a good idea to natively support nD read windows.
-        if extra_dim_index is not None:
-            if w is None:
-                w = ()
-            return (extra_dim_index,) + w, shape
-        else:
+        if extra_dim_index is None:
             # 2D read window
             return w, shape
 
+        # Build 3D read window, for a slice read all of it at once
+        if w is None:
+            w = ()
+        if isinstance(extra_dim_index, slice):
+            extra = (extra_dim_index.start, extra_dim_index.stop)
+            return (extra,) + w, None if shape is None else extra_shape + shape
+        return (extra_dim_index,) + w, shape
+
     if paste_ok:
         A = rr.transform.linear
         sx, sy = A.a, A.e
 
-        dst = dst[rr.roi_dst]
-        pix = rdr.read(*norm_read_args(rr.roi_src, dst.shape, extra_dim_index))
+        dst = dst_view(rr.roi_dst)
+        pix = rdr.read(*norm_read_args(rr.roi_src, dst.shape[-2:], extra_dim_index))
 
         if sx < 0:
-            pix = pix[:, ::-1]
+            pix = pix[..., ::-1]
         if sy < 0:
-            pix = pix[::-1, :]
+            pix = pix[..., ::-1, :]
 
         if rdr.nodata is None:
             np.copyto(dst, pix)
         else:
             np.copyto(dst, pix, where=valid_mask(pix, rdr.nodata))
     else:
-        if rr.is_st:
-            # add padding on src/dst ROIs, it was set to tight bounds
-            # TODO: this should probably happen inside compute_reproject_roi
-            rr.roi_dst = roi_pad(rr.roi_dst, 1, dst_gbox.shape)
-            rr.roi_src = roi_pad(rr.roi_src, 1, src_gbox.shape)
-
-        dst = dst[rr.roi_dst]
-        dst_gbox = dst_gbox[rr.roi_dst]
-        src_gbox = src_gbox[rr.roi_src]
-        if scale > 1:
-            src_gbox = gbx.zoom_out(src_gbox, scale)
-
-        pix = rdr.read(*norm_read_args(rr.roi_src, src_gbox.shape, extra_dim_index))
-
-        if rr.transform.linear is not None:
-            A = (~src_gbox.transform)*dst_gbox.transform
-            warp_affine(pix, dst, A, resampling,
-                        src_nodata=rdr.nodata, dst_nodata=dst_nodata)
-        else:
-            rio_reproject(pix, dst, src_gbox, dst_gbox, resampling,
-                          src_nodata=rdr.nodata, dst_nodata=dst_nodata)
+        region = plan.region(scale)
+        dst = dst_view(region.roi_dst)
+        pix = rdr.read(*norm_read_args(region.roi_src, region.src_gbox.shape, extra_dim_index))
+
+        # warp one 2D plane at a time
+        pix, dst = pix.reshape((-1, *pix.shape[-2:])), dst.reshape((-1, *dst.shape[-2:]))
+        for src_plane, dst_plane in zip(pix, dst):
+            plan.warp(src_plane, dst_plane, scale,
+                      src_nodata=rdr.nodata, dst_nodata=dst_nodata)
+
+        return region.roi_dst
 
     return rr.roi_dst
 
@@ -196,24 +235,32 @@ def read_time_slice(rdr,
 def read_time_slice_v2(rdr,
                        dst_gbox: GeoBox,
                        resampling: Resampling,
-                       dst_nodata: Nodata) -> Tuple[Optional[np.ndarray],
-                                                    Tuple[slice, slice]]:
+                       dst_nodata: Nodata,
+                       use_overviews: bool = True,
+                       overview_tol: float = 1e-3) -> Tuple[Optional[np.ndarray],
+                                                            Tuple[slice, slice]]:
     """ From opened reader object read into `dst`
 
+    :param use_overviews: When False read at full resolution even when down-sampling
+    :param overview_tol: Tolerance for matching shrink factor to an overview level
     :returns: pixels read and ROI of dst_gbox that was affected
     """
     # pylint: disable=too-many-locals
-    src_gbox = rdr_geobox(rdr)
-
-    rr = compute_reproject_roi(src_gbox, dst_gbox)
+    plan = warp_plan(rdr_geobox(rdr), dst_gbox, resampling)
+    rr = plan.rr
 
     if roi_is_empty(rr.roi_dst):
         return None, rr.roi_dst
 
     is_nn = is_resampling_nn(resampling)
-    scale = pick_read_scale(rr.scale, rdr)
+    scale = pick_read_scale(rr.scale, rdr, tol=overview_tol,
+                            resampling=resampling,
+                            use_overviews=use_overviews)
 
     paste_ok, _ = can_paste(rr, ttol=0.9 if is_nn else 0.01)
+    if paste_ok and scale < np.round(rr.scale):
+        # decimated read would go through overviews, read full resolution and reproject instead
+        paste_ok = False
 
     def norm_read_args(roi, shape):
         if roi_is_full(roi, rdr.shape):
@@ -242,26 +289,12 @@ def read_time_slice_v2(rdr,
 
         dst = pix
     else:
-        if rr.is_st:
-            # add padding on src/dst ROIs, it was set to tight bounds
-            # TODO: this should probably happen inside compute_reproject_roi
-            rr.roi_dst = roi_pad(rr.roi_dst, 1, dst_gbox.shape)
-            rr.roi_src = roi_pad(rr.roi_src, 1, src_gbox.shape)
-
-        dst_gbox = dst_gbox[rr.roi_dst]
-        src_gbox = src_gbox[rr.roi_src]
-        if scale > 1:
-            src_gbox = gbx.zoom_out(src_gbox, scale)
-
-        dst = np.full(dst_gbox.shape, dst_nodata, dtype=rdr.dtype)
-        pix = rdr.read(*norm_read_args(rr.roi_src, src_gbox.shape)).result()
-
-        if rr.transform.linear is not None:
-            A = (~src_gbox.transform)*dst_gbox.transform
-            warp_affine(pix, dst, A, resampling,
-                        src_nodata=rdr.nodata, dst_nodata=dst_nodata)
-        else:
-            rio_reproject(pix, dst, src_gbox, dst_gbox, resampling,
-                          src_nodata=rdr.nodata, dst_nodata=dst_nodata)
+        region = plan.region(scale)
+        dst = np.full(region.dst_gbox.shape, dst_nodata, dtype=rdr.dtype)
+        pix = rdr.read(*norm_read_args(region.roi_src, region.src_gbox.shape)).result()
+
+        plan.warp(pix, dst, scale, src_nodata=rdr.nodata, dst_nodata=dst_nodata)
+
+        return dst, region.roi_dst
 
     return dst, rr.roi_dst
@@ -13,7 +13,7 @@ import numpy as np
 from affine import Affine
 import rasterio  # type: ignore[import]
 from urllib.parse import urlparse
-from typing import Optional, Iterator
+from typing import Optional, Iterator, List
 
 from datacube.utils import geometry
 from datacube.utils.math import num2numpy
@@ -75,12 +75,30 @@ class BandDataSource(GeoRasterReader):
     def shape(self) -> RasterShape:
         return self.source.shape
 
+    @property
+    def overviews(self) -> List[int]:
+        return self.source.ds.overviews(self.source.bidx)
+
     def read(self, window: Optional[RasterWindow] = None,
              out_shape: Optional[RasterShape] = None) -> Optional[np.ndarray]:
         """Read data in the native format, returning a numpy array
+
+        3D reads are supported for multi-band files, ``window`` is then prefixed
+        with an extra dimension index ``i`` or range ``(start, stop)``, which is
+        read from band ``bidx + i``, or bands ``bidx + start`` up to ``bidx + stop``
+        in one go.
         """
+        indexes = self.source.bidx
+        if window is not None and len(window) % 2 == 1:
+            extra, *spatial = window
+            if isinstance(extra, tuple):
+                indexes = list(range(indexes + extra[0], indexes + extra[1]))
+            else:
+                indexes = indexes + extra
+            window = tuple(spatial) if spatial else None
+
         with maybe_lock(self._lock):
-            return self.source.ds.read(indexes=self.source.bidx, window=window, out_shape=out_shape)
+            return self.source.ds.read(indexes=indexes, window=window, out_shape=out_shape)
 
 
 class RasterioDataSource(DataSource):
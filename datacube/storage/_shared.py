@@ -0,0 +1,187 @@
+# This file is part of the Open Data Cube, see https://opendatacube.org for more information
+#
+# Copyright (c) 2015-2020 ODC Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Output storage shared between processes.
+
+See :class:`SharedStorage`.
+"""
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+import xarray
+
+from datacube.model import ExtraDimensions, Measurement
+from datacube.utils.geometry import GeoBox
+
+_LOG = logging.getLogger(__name__)
+
+
+class SharedStorage:
+    """
+    Output :class:`xarray.Dataset` with data living in shared memory.
+
+    Same structure as :meth:`datacube.Datacube.create_storage` (and filled with
+    ``nodata`` just the same), but every data variable is backed by a
+    :class:`multiprocessing.shared_memory.SharedMemory` block, or, when
+    ``directory`` is supplied, by a memory mapped file in that directory.
+
+    Pickling a :class:`SharedStorage` only pickles references to the shared
+    memory, unpickled copies attach to the same memory. Worker processes can
+    then load disjoint slices in place and the parent process sees the data
+    without any copying:
+
+    .. code-block:: python
+
+       def load_slice(storage, sources, geobox, measurements, i0, i1):
+           out = storage.dataset.isel(time=slice(i0, i1))
+           Datacube.load_data(sources[i0:i1], geobox, measurements, out=out)
+
+       with SharedStorage(sources.coords, geobox, measurements) as storage:
+           futures = [executor.submit(load_slice, storage, sources, geobox, measurements, i, i + 1)
+                      for i in range(sources.shape[0])]
+           executor.results(futures)
+           result = storage.dataset.compute()  # copy out before closing
+
+    Process that created the storage owns the memory, it is released when
+    the owner is closed. Data in :attr:`dataset` must not be used after that.
+    """
+
+    def __init__(self,
+                 coords: Mapping[str, xarray.DataArray],
+                 geobox: GeoBox,
+                 measurements: Iterable[Measurement],
+                 extra_dims: Optional[ExtraDimensions] = None,
+                 directory: Optional[str] = None):
+        """
+        :param coords: Non-spatial coordinates of the output, usually ``sources.coords``
+        :param geobox: Output GeoBox
+        :param measurements: Measurements to allocate
+        :param extra_dims: Additional dimensions between (t) and (y, x)
+        :param directory: Allocate memory mapped files in this directory instead of shared memory
+        """
+        self._coords = OrderedDict(coords.items())
+        self._geobox = geobox
+        self._measurements = list(measurements)
+        self._extra_dims = extra_dims
+        self._directory = directory
+        self._owner = True
+        self._refs: Dict[str, Optional[str]] = {}
+        self._dataset: Optional[xarray.Dataset] = None
+        self._handles: List[Any] = []
+        self._dataset = self._create_dataset()
+
+    @property
+    def directory(self) -> Optional[str]:
+        """ Directory holding memory mapped files, ``None`` when using shared memory.
+        """
+        return self._directory
+
+    @property
+    def dataset(self) -> xarray.Dataset:
+        """ Output dataset, data variables are views of the shared memory.
+        """
+        if self._dataset is None:
+            raise ValueError("Shared storage is closed")
+        return self._dataset
+
+    def _create_dataset(self) -> xarray.Dataset:
+        from datacube.api.core import Datacube
+        return Datacube.create_storage(self._coords, self._geobox, self._measurements,
+                                       data_func=self._allocate,
+                                       extra_dims=self._extra_dims)
+
+    def _allocate(self, m: Measurement, shape: Tuple[int, ...]) -> np.ndarray:
+        dtype = np.dtype(m.dtype)
+        nbytes = int(np.prod(shape, dtype='int64'))*dtype.itemsize
+
+        if nbytes == 0:
+            # nothing to share, shared memory and mmap can't be empty anyway
+            self._refs[m.name] = None
+            return np.empty(shape, dtype=dtype)
+
+        attach = m.name in self._refs
+        if self._directory is None:
+            if attach:
+                shm = shared_memory.SharedMemory(name=self._refs[m.name])
+            else:
+                shm = shared_memory.SharedMemory(create=True, size=nbytes)
+                self._refs[m.name] = shm.name
+            self._handles.append(shm)
+            data = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        else:
+            if attach:
+                path = self._refs[m.name]
+            else:
+                fd, path = tempfile.mkstemp(prefix='dc-', suffix='.dat', dir=self._directory)
+                os.close(fd)
+                self._refs[m.name] = path
+            data = np.memmap(path, dtype=dtype, mode='r+' if attach else 'w+', shape=shape)
+
+        if not attach:
+            data.fill(m.nodata)
+        return data
+
+    def close(self) -> None:
+        """
+        Stop using shared memory, when called by the owner also release it.
+        """
+        if self._dataset is None:
+            return
+        self._dataset = None
+
+        for shm in self._handles:
+            try:
+                shm.close()
+            except BufferError:
+                # Data is still referenced elsewhere, memory is unmapped when that goes away
+                _LOG.debug("Shared memory %s is still in use", shm.name)
+            if self._owner:
+                shm.unlink()
+        self._handles = []
+
+        if self._owner and self._directory is not None:
+            for path in self._refs.values():
+                if path is not None:
+                    os.remove(path)
+
+    def __enter__(self) -> 'SharedStorage':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        if self._dataset is None:
+            raise ValueError("Can not pickle closed shared storage")
+        return dict(coords=self._coords,
+                    geobox=self._geobox,
+                    measurements=self._measurements,
+                    extra_dims=self._extra_dims,
+                    directory=self._directory,
+                    refs=self._refs)
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # Dataset is assigned before handles, so that on garbage collection
+        # arrays are released before the shared memory they point to
+        self._coords = state['coords']
+        self._geobox = state['geobox']
+        self._measurements = state['measurements']
+        self._extra_dims = state['extra_dims']
+        self._directory = state['directory']
+        self._owner = False
+        self._refs = dict(state['refs'])
+        self._dataset = None
+        self._handles = []
+        self._dataset = self._create_dataset()
+
+    def __repr__(self) -> str:
+        return 'SharedStorage<{}, vars={}>'.format(
+            'shm' if self._directory is None else self._directory,
+            list(self._refs))
@@ -21,6 +21,7 @@ from ._base import (
     bbox_union,
     bbox_intersection,
     crs_units_per_degree,
+    crs_cache_info,
     geobox_union_conservative,
     geobox_intersection_conservative,
     intersects,
@@ -37,6 +38,7 @@ from ._base import (
     polygon_from_transform,
     unary_union,
     unary_intersection,
+    to_crs_many,
     lonlat_bounds,
     projected_lon,
     clip_lon180,
@@ -72,6 +74,8 @@ from .tools import (
 from ._warp import (
     warp_affine,
     rio_reproject,
+    WarpPlan,
+    warp_plan,
 )
 
 __all__ = [
@@ -90,6 +94,7 @@ __all__ = [
     "bbox_union",
     "bbox_intersection",
     "crs_units_per_degree",
+    "crs_cache_info",
     "geobox_union_conservative",
     "geobox_intersection_conservative",
     "intersects",
@@ -105,6 +110,7 @@ __all__ = [
     "polygon_from_transform",
     "unary_union",
     "unary_intersection",
+    "to_crs_many",
     "lonlat_bounds",
     "projected_lon",
     "clip_lon180",
@@ -134,5 +140,7 @@ __all__ = [
     "split_translation",
     "warp_affine",
     "rio_reproject",
+    "WarpPlan",
+    "warp_plan",
     "w_",
 ]
@@ -6,6 +6,7 @@ import functools
 import itertools
 import math
 import array
+import threading
 import warnings
 from collections import namedtuple, OrderedDict
 from typing import Tuple, Iterable, List, Union, Optional, Any, Callable, Hashable, Dict, Iterator
@@ -116,6 +117,54 @@ class BoundingBox(_BoundingBox):
                                    (p1[1], p2[1]))
 
 
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
+
+# Upper bounds on the number of parsed CRSs and of transformers between pairs of them
+CRS_CACHE_SIZE = 512
+CRS_TRANSFORM_CACHE_SIZE = 512
+
+
+class _CountingLRUCache(cachetools.LRUCache):
+    """
+    LRU cache that counts hits and misses of :meth:`lookup`, only use it with a lock.
+
+    Other access, including evictions, is not counted.
+    """
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key) -> Any:
+        """ Cached value or None, counted as a hit or a miss """
+        value = self.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, self.currsize)
+
+
+_crs_cache = _CountingLRUCache(CRS_CACHE_SIZE)
+_crs_transform_cache = _CountingLRUCache(CRS_TRANSFORM_CACHE_SIZE)
+_crs_cache_lock = threading.Lock()
+
+
+def crs_cache_info() -> Dict[str, CacheInfo]:
+    """
+    Statistics of the process wide caches of parsed CRSs (``'crs'``)
+    and of transformers between them (``'transform'``), for monitoring.
+
+    :return: ``CacheInfo(hits, misses, maxsize, currsize)`` for each cache
+    """
+    with _crs_cache_lock:
+        return {'crs': _crs_cache.info(), 'transform': _crs_transform_cache.info()}
+
+
 def _make_crs_key(crs_spec: Union[str, _CRS]) -> str:
     if isinstance(crs_spec, str):
         normed_epsg = crs_spec.upper()
@@ -125,8 +174,13 @@ def _make_crs_key(crs_spec: Union[str, _CRS]) -> str:
     return crs_spec.to_wkt()
 
 
-@cachetools.cached({}, key=_make_crs_key)  # type: ignore[misc]
 def _make_crs(crs: Union[str, _CRS]) -> Tuple[_CRS, str, Optional[int]]:
+    key = _make_crs_key(crs)
+    with _crs_cache_lock:
+        cached = _crs_cache.lookup(key)
+    if cached is not None:
+        return cached
+
     if isinstance(crs, str):
         crs = _CRS.from_user_input(crs)
     epsg = crs.to_epsg()
@@ -134,16 +188,26 @@ def _make_crs(crs: Union[str, _CRS]) -> Tuple[_CRS, str, Optional[int]]:
         crs_str = f"EPSG:{epsg}"
     else:
         crs_str = crs.to_wkt()
-    return (crs, crs_str, crs.to_epsg())
+    value = (crs, crs_str, crs.to_epsg())
+    with _crs_cache_lock:
+        return _crs_cache.setdefault(key, value)
+
 
+def _make_crs_transform_key(from_crs: 'CRS', to_crs: 'CRS', always_xy: bool) -> Tuple[str, str, bool]:
+    # EPSG code or WKT: unlike object ids, these are never reused for a different CRS
+    return (from_crs._str, to_crs._str, always_xy)
 
-def _make_crs_transform_key(from_crs, to_crs, always_xy):
-    return (id(from_crs), id(to_crs), always_xy)
 
+def _make_crs_transform(from_crs: 'CRS', to_crs: 'CRS', always_xy: bool) -> Callable[[Any, Any], Tuple[Any, Any]]:
+    key = _make_crs_transform_key(from_crs, to_crs, always_xy)
+    with _crs_cache_lock:
+        cached = _crs_transform_cache.lookup(key)
+    if cached is not None:
+        return cached
 
-@cachetools.cached({}, key=_make_crs_transform_key)
-def _make_crs_transform(from_crs, to_crs, always_xy):
-    return Transformer.from_crs(from_crs, to_crs, always_xy=always_xy).transform
+    transform = Transformer.from_crs(from_crs._crs, to_crs._crs, always_xy=always_xy).transform
+    with _crs_cache_lock:
+        return _crs_transform_cache.setdefault(key, transform)
 
 
 class CRS:
@@ -327,7 +391,7 @@ class CRS:
         this stored either as scalars or ndarray objects and x', y' are the same
         points in the `other` CRS.
         """
-        transform = _make_crs_transform(self._crs, other._crs, always_xy=always_xy)
+        transform = _make_crs_transform(self, other, always_xy=always_xy)
 
         def result(x, y):
             rx, ry = transform(x, y)
@@ -982,6 +1046,123 @@ def unary_intersection(geoms: Iterable[Geometry]) -> Geometry:
     return functools.reduce(Geometry.intersection, geoms)
 
 
+def to_crs_many(geoms: Iterable[Geometry],
+                crs: SomeCRS,
+                resolution: Optional[float] = None,
+                wrapdateline: bool = False) -> List[Geometry]:
+    """
+    Convert many geometries to a different Coordinate Reference System
+
+    Gives the same result as ``[g.to_crs(crs, resolution, wrapdateline) for g in geoms]``,
+    but the vertices of all geometries in the same source CRS are transformed
+    together, in a single call to pyproj.
+
+    :param crs: CRS to convert to
+    :param resolution: see :py:meth:`Geometry.to_crs`
+    :param wrapdateline: see :py:meth:`Geometry.to_crs`, not batched
+    """
+    crs = _norm_crs_or_error(crs)
+    geoms = list(geoms)
+    result: List[Optional[Geometry]] = [None] * len(geoms)
+
+    by_crs: Dict[CRS, List[int]] = {}
+    for i, geom in enumerate(geoms):
+        if geom.crs == crs:
+            result[i] = geom
+        elif geom.crs is None:
+            raise ValueError("Cannot project geometries without CRS")
+        elif wrapdateline and crs.geographic:
+            result[i] = geom.to_crs(crs, resolution=resolution, wrapdateline=True)
+        else:
+            by_crs.setdefault(geom.crs, []).append(i)
+
+    for src_crs, idxs in by_crs.items():
+        res = resolution
+        if res is None:
+            res = 1 if src_crs.geographic else 100000
+        shapes = [geoms[i].geom for i in idxs]
+
+        coords = [c for shape in shapes for c in _shape_coords(shape, res)]
+        if coords:
+            xy = numpy.concatenate(coords)
+            xx, yy = src_crs.transformer_to_crs(crs)(xy[:, 0], xy[:, 1])
+            splits = numpy.cumsum([len(c) for c in coords[:-1]])
+            coords = numpy.split(numpy.column_stack([xx, yy]), splits)
+
+        transformed = iter(coords)
+        for i, shape in zip(idxs, shapes):
+            result[i] = Geometry(_shape_from_coords(shape, transformed), crs)
+
+    return result  # type: ignore[return-value]
+
+
+def _densify_array(xy: numpy.ndarray, resolution: float) -> numpy.ndarray:
+    """
+    Vectorised :py:func:`densify` of an Nx2 array, adding exactly the same points.
+    """
+    if not math.isfinite(resolution) or len(xy) < 2:
+        return xy
+    p1, p2 = xy[:-1], xy[1:]
+    dx, dy = (p2 - p1).T
+    seg_len = numpy.sqrt(dx * dx + dy * dy)
+    # same test as densify() for skipping a segment
+    seg_len[((p1[:, 0] ** 2 + p2[:, 0] ** 2) < resolution ** 2) | numpy.isnan(seg_len)] = 0
+
+    # Distances along each segment of the new points: resolution, 2*resolution, ...
+    # accumulated the same way as in densify()
+    n_max = int(numpy.max(seg_len) // resolution) + 1
+    dists = numpy.cumsum(numpy.full(n_max, resolution, dtype='float64'))
+    counts = numpy.searchsorted(dists, seg_len, side='left')
+    if not counts.any():
+        return xy
+
+    seg = numpy.repeat(numpy.arange(len(counts)), counts)
+    step = numpy.arange(len(seg)) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+    frac = (dists[step] / seg_len[seg])[:, None]
+    # As interpolated along the segment by GEOS
+    new_pts = numpy.where(frac >= 1, p2[seg], (p2[seg] - p1[seg]) * frac + p1[seg])
+
+    # each segment's new points go after its first point
+    pos = numpy.concatenate([numpy.arange(len(xy)) + numpy.concatenate([[0], numpy.cumsum(counts)]),
+                             seg + 1 + numpy.arange(len(seg))])
+    out = numpy.empty((len(xy) + len(seg), 2), dtype='float64')
+    out[pos] = numpy.concatenate([xy, new_pts])
+    return out
+
+
+def _shape_coords(geom: base.BaseGeometry, resolution: float) -> Iterator[numpy.ndarray]:
+    """ Vertices of every part of a shapely geometry as Nx2 arrays, lines segmented to `resolution` """
+    if geom.is_empty:
+        return
+    if geom.type == 'Point':
+        yield numpy.asarray(geom.coords, dtype='float64')[:, :2]
+    elif geom.type in ['LineString', 'LinearRing']:
+        yield _densify_array(numpy.asarray(geom.coords, dtype='float64')[:, :2], resolution)
+    elif geom.type == 'Polygon':
+        yield from _shape_coords(geom.exterior, resolution)
+        for ring in geom.interiors:
+            yield from _shape_coords(ring, resolution)
+    elif geom.type in ['GeometryCollection', 'MultiPolygon', 'MultiLineString', 'MultiPoint']:
+        for g in geom.geoms:
+            yield from _shape_coords(g, resolution)
+    else:
+        raise ValueError('unknown geometry type {}'.format(geom.type))  # pragma: no cover
+
+
+def _shape_from_coords(geom: base.BaseGeometry, coords: Iterator[numpy.ndarray]) -> base.BaseGeometry:
+    """ Same shape as `geom`, with the vertices of each part taken from `coords` in turn """
+    if geom.is_empty:
+        return type(geom)()
+    if geom.type == 'Point':
+        return geometry.Point(next(coords)[0])
+    if geom.type in ['LineString', 'LinearRing']:
+        return type(geom)(next(coords))
+    if geom.type == 'Polygon':
+        shell = next(coords)
+        return geometry.Polygon(shell, [next(coords) for _ in geom.interiors])
+    return type(geom)([_shape_from_coords(g, coords) for g in geom.geoms])
+
+
 def _align_pix(left: float, right: float, res: float, off: float) -> Tuple[float, int]:
     if res < 0:
         res = -res
@@ -1000,13 +1181,27 @@ class GeoBox:
 
     :param crs: Coordinate Reference System
     :param affine: Affine transformation defining the location of the geobox
+
+    GeoBoxes are created for every tile or chunk of a large area, so they are
+    kept light: ``extent`` and ``coordinates`` are only computed when first
+    needed, and the :py:class:`CRS` object passed in is shared, not copied.
     """
+    __slots__ = ('width', 'height', 'affine', '_crs', '_extent', '_geographic_extent', '_coordinates')
 
     def __init__(self, width: int, height: int, affine: Affine, crs: MaybeCRS):
         self.width = width
         self.height = height
         self.affine = affine
-        self.extent = polygon_from_transform(width, height, affine, crs=crs)
+        self._crs = _norm_crs(crs)
+        self._extent: Optional[Geometry] = None
+        self._geographic_extent: Optional[Geometry] = None
+        self._coordinates: Optional[Tuple[numpy.ndarray, numpy.ndarray]] = None
+
+    def __getstate__(self):
+        return {'width': self.width, 'height': self.height, 'affine': self.affine, 'crs': self._crs}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
 
     @classmethod
     def from_geopolygon(cls,
@@ -1094,7 +1289,16 @@ class GeoBox:
 
     @property
     def crs(self) -> Optional[CRS]:
-        return self.extent.crs
+        return self._crs
+
+    @property
+    def extent(self) -> Geometry:
+        """
+        GeoBox outline as a polygon in its own CRS
+        """
+        if self._extent is None:
+            self._extent = polygon_from_transform(self.width, self.height, self.affine, crs=self._crs)
+        return self._extent
 
     @property
     def dimensions(self) -> Tuple[str, str]:
@@ -1127,10 +1331,15 @@ class GeoBox:
         """
         assert is_affine_st(self.affine), "Only axis-aligned geoboxes are currently supported"
         yres, xres = self.resolution
-        yoff, xoff = self.affine.yoff, self.affine.xoff
-
-        xs = numpy.arange(self.width) * xres + (xoff + xres / 2)
-        ys = numpy.arange(self.height) * yres + (yoff + yres / 2)
+        if self._coordinates is None:
+            yoff, xoff = self.affine.yoff, self.affine.xoff
+            xs = numpy.arange(self.width) * xres + (xoff + xres / 2)
+            ys = numpy.arange(self.height) * yres + (yoff + yres / 2)
+            # Shared between calls, so must not be modified in place
+            xs.flags.writeable = False
+            ys.flags.writeable = False
+            self._coordinates = (ys, xs)
+        ys, xs = self._coordinates
 
         units = self.crs.units if self.crs is not None else ('1', '1')
 
@@ -1176,7 +1385,9 @@ class GeoBox:
         """
         if self.crs is None or self.crs.geographic:
             return self.extent
-        return self.extent.to_crs(CRS('EPSG:4326'))
+        if self._geographic_extent is None:
+            self._geographic_extent = self.extent.to_crs(CRS('EPSG:4326'))
+        return self._geographic_extent
 
     coords = coordinates
     dims = dimensions
@@ -1189,7 +1400,7 @@ class GeoBox:
             width=self.width,
             height=self.height,
             affine=self.affine,
-            crs=self.extent.crs
+            crs=self._crs
         )
 
     def __eq__(self, other):
@@ -2,12 +2,18 @@
 #
 # Copyright (c) 2015-2020 ODC Contributors
 # SPDX-License-Identifier: Apache-2.0
-from typing import Union, Optional
+import itertools
+import threading
+from collections import namedtuple
+from typing import Dict, Union, Optional, Tuple
+import cachetools
 import rasterio.warp  # type: ignore[import]
 import rasterio.crs   # type: ignore[import]
 import numpy as np
 from affine import Affine
 from . import GeoBox
+from . import gbox as gbx
+from .tools import compute_reproject_roi, roi_pad
 
 Resampling = Union[str, int, rasterio.warp.Resampling]  # pylint: disable=invalid-name
 Nodata = Optional[Union[int, float]]  # pylint: disable=invalid-name
@@ -89,6 +95,150 @@ def warp_affine_rio(src: np.ndarray,
     return dst
 
 
+def is_warp_affine_np_supported(src: np.ndarray,
+                                dst: np.ndarray,
+                                A: Affine,
+                                resampling: Resampling,
+                                src_nodata: Nodata = None,
+                                dst_nodata: Nodata = None) -> bool:
+    """
+    Check if :py:func:`warp_affine_np` can perform this warp.
+
+    Supported are 2D images of the same dtype other than int64 and uint64, with a positive, axis aligned scale,
+    that are either
+
+    - nearest resampling with scale a multiple of 0.5, every destination pixel centre inside the source image
+      (except with ``dst_nodata`` for int32, uint32, and int16 with nodata values above 255,
+      where GDAL changes valid pixels equal to ``dst_nodata``)
+    - average down-sampling by whole pixels, every destination pixel fully inside the source image
+      (except for int8)
+
+    GDAL output is hard to match exactly for other cases, mostly at the image edges.
+    """
+    if src.ndim != 2 or dst.ndim != 2 or src.dtype != dst.dtype:
+        return False
+    if src.dtype.name in ('int64', 'uint64'):
+        # GDAL clamps 64 bit integers to the int64 range and rounds them to float64 precision
+        return False
+    if not (A.b == 0 and A.d == 0 and A.a > 0 and A.e > 0):
+        return False
+
+    if isinstance(resampling, str):
+        try:
+            resampling = resampling_s2rio(resampling)
+        except ValueError:
+            return False
+
+    (h, w), (src_h, src_w) = dst.shape, src.shape
+    if resampling == rasterio.warp.Resampling.nearest:
+        return (_nearest_keeps_nodata(dst.dtype, src_nodata, dst_nodata)
+                and (2 * A.a).is_integer() and (2 * A.e).is_integer()
+                and 0 <= A.c + 0.5 * A.a and A.c + (w - 0.5) * A.a < src_w
+                and 0 <= A.f + 0.5 * A.e and A.f + (h - 0.5) * A.e < src_h)
+
+    if resampling == rasterio.warp.Resampling.average:
+        # GDAL works on int8 as int16, which changes how valid pixels equal to nodata are handled
+        return (all(float(v).is_integer() for v in (A.a, A.e, A.c, A.f))
+                and A.a * A.e > 1
+                and 0 <= A.c and A.c + w * A.a <= src_w
+                and 0 <= A.f and A.f + h * A.e <= src_h
+                and src.dtype.name != 'int8')
+
+    return False
+
+
+def _nearest_keeps_nodata(dtype: np.dtype, src_nodata: Nodata, dst_nodata: Nodata) -> bool:
+    """
+    Check if GDAL nearest resampling copies valid pixels equal to ``dst_nodata`` unchanged.
+
+    GDAL changes them to ``dst_nodata - 1`` (``+ 1`` at the dtype minimum) for int32, uint32
+    and uint64, and for int16 when either nodata value is above 255.
+    """
+    if dst_nodata is None or not np.issubdtype(dtype, np.integer):
+        return True
+    if dtype.itemsize == 1 or dtype.name == 'uint16':
+        return True
+    return dtype.name == 'int16' and all(v < 256 for v in (src_nodata, dst_nodata) if v is not None)
+
+
+def warp_affine_np(src: np.ndarray,
+                   dst: np.ndarray,
+                   A: Affine,
+                   resampling: Resampling,
+                   src_nodata: Nodata = None,
+                   dst_nodata: Nodata = None) -> np.ndarray:
+    """
+    Perform Affine warp using numpy, with the same output as :py:func:`warp_affine_rio`.
+
+    Only for simple cases, see :py:func:`is_warp_affine_np_supported`.
+
+    :param        src: image as ndarray
+    :param        dst: image as ndarray
+    :param          A: Affine transform, maps from dst_coords to src_coords
+    :param resampling: str|rasterio.warp.Resampling resampling strategy
+    :param src_nodata: Value representing "no data" in the source image
+    :param dst_nodata: Value to represent "no data" in the destination image
+
+    :returns: dst
+    """
+    if not is_warp_affine_np_supported(src, dst, A, resampling,
+                                       src_nodata=src_nodata, dst_nodata=dst_nodata):
+        raise ValueError('Unsupported warp, use warp_affine_rio')
+    if isinstance(resampling, str):
+        resampling = resampling_s2rio(resampling)
+
+    # Same as GDAL: destination pixels without valid source pixels
+    nodata = dst_nodata if dst_nodata is not None else src_nodata
+    invalid = _nodata_mask(src, src_nodata)
+    h, w = dst.shape
+
+    if resampling == rasterio.warp.Resampling.nearest:
+        # source pixel containing the centre of each destination pixel
+        iy = np.floor(A.f + (np.arange(h) + 0.5) * A.e).astype('int64')[:, None]
+        ix = np.floor(A.c + (np.arange(w) + 0.5) * A.a).astype('int64')[None, :]
+        dst[...] = src[iy, ix]
+        if invalid is not None:
+            dst[invalid[iy, ix]] = nodata
+        return dst
+
+    # each destination pixel is the average of a ky*kx block of source pixels
+    ky, kx, ty, tx = (int(v) for v in (A.e, A.a, A.f, A.c))
+    roi = (slice(ty, ty + h * ky), slice(tx, tx + w * kx))
+    blocks = src[roi].reshape(h, ky, w, kx)
+    valid = None if invalid is None else ~invalid[roi].reshape(h, ky, w, kx)
+
+    # add up block pixels in the same order as GDAL
+    total = np.zeros((h, w), dtype='float64')
+    count = np.zeros((h, w), dtype='int64') if valid is not None else ky * kx
+    for i, j in itertools.product(range(ky), range(kx)):
+        if valid is None:
+            total += blocks[:, i, :, j]
+        else:
+            total += np.where(valid[:, i, :, j], blocks[:, i, :, j], 0)
+            count += valid[:, i, :, j]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = total / count
+
+    if np.issubdtype(dst.dtype, np.integer):
+        # GDAL rounds half up, and changes valid pixels that would be equal to nodata
+        out = np.floor(out + 0.5)
+        if nodata is not None:
+            out[out == nodata] = nodata + (1 if nodata == np.iinfo(dst.dtype).min else -1)
+
+    np.copyto(dst, out, casting='unsafe')
+    if valid is not None:
+        dst[count == 0] = nodata
+    return dst
+
+
+def _nodata_mask(src: np.ndarray, nodata: Nodata) -> Optional[np.ndarray]:
+    if nodata is None:
+        return None
+    if np.isnan(nodata):
+        return np.isnan(src)
+    return src == nodata
+
+
 def warp_affine(src: np.ndarray,
                 dst: np.ndarray,
                 A: Affine,
@@ -97,7 +247,11 @@ def warp_affine(src: np.ndarray,
                 dst_nodata: Nodata = None,
                 **kwargs) -> np.ndarray:
     """
-    Perform Affine warp using best available backend (GDAL via rasterio is the only one so far).
+    Perform Affine warp using best available backend.
+
+    Simple nearest neighbour and whole pixel down-sampling warps are done with numpy
+    (see :py:func:`warp_affine_np`), everything else, or when any ``kwargs`` are given,
+    with GDAL via rasterio.
 
     :param        src: image as ndarray
     :param        dst: image as ndarray
@@ -110,6 +264,12 @@ def warp_affine(src: np.ndarray,
 
     :returns: dst
     """
+    if not kwargs and is_warp_affine_np_supported(src, dst, A, resampling,
+                                                  src_nodata=src_nodata, dst_nodata=dst_nodata):
+        return warp_affine_np(src, dst, A, resampling,
+                              src_nodata=src_nodata,
+                              dst_nodata=dst_nodata)
+
     return warp_affine_rio(src, dst, A, resampling,
                            src_nodata=src_nodata,
                            dst_nodata=dst_nodata,
@@ -167,3 +327,171 @@ def rio_reproject(src: np.ndarray,
         np.copyto(dst, _dst, casting='unsafe')
 
     return dst
+
+
+# Upper bounds on the number of cached warp plans, and on the total size of their nearest pixel maps
+WARP_PLAN_CACHE_SIZE = 64
+WARP_INDEX_CACHE_BYTES = 256 * 1024 * 1024
+
+WarpRegion = namedtuple('WarpRegion', ('roi_src', 'roi_dst', 'src_gbox', 'dst_gbox'))
+
+
+class WarpPlan:
+    """
+    Reprojection from one GeoBox to another, worked out once and reused for every image
+    on the same pair of pixel grids, for example all time slices of a tile.
+
+    Holds the result of :py:func:`compute_reproject_roi` and, for every read scale, the
+    regions of source and destination to warp between. For nearest resampling it also
+    remembers which source pixel ends up in every destination pixel, warping another image
+    is then a single lookup. Use :py:func:`warp_plan` to get a cached instance.
+    """
+
+    def __init__(self, src_gbox: GeoBox, dst_gbox: GeoBox, resampling: Resampling):
+        if isinstance(resampling, str):
+            resampling = resampling_s2rio(resampling)
+        self.src_gbox = src_gbox
+        self.dst_gbox = dst_gbox
+        self.resampling = resampling
+        # shared between users of the plan, do not modify
+        self.rr = compute_reproject_roi(src_gbox, dst_gbox)
+        self._regions: Dict[int, WarpRegion] = {}
+
+    def region(self, scale: int = 1) -> WarpRegion:
+        """
+        Regions to warp between when reading the source at a shrink factor of ``scale``.
+
+        :returns: ``(roi_src, roi_dst, src_gbox, dst_gbox)``, with ``roi_src`` to read
+                  from the source image at full resolution, ``roi_dst`` of the destination
+                  image to write to, and GeoBoxes of these regions (``src_gbox`` at ``scale``)
+        """
+        region = self._regions.get(scale)
+        if region is None:
+            rr = self.rr
+            roi_src, roi_dst = rr.roi_src, rr.roi_dst
+            if rr.is_st:
+                # add padding on src/dst ROIs, it was set to tight bounds
+                roi_dst = roi_pad(roi_dst, 1, self.dst_gbox.shape)
+                roi_src = roi_pad(roi_src, 1, self.src_gbox.shape)
+
+            src_gbox = self.src_gbox[roi_src]
+            if scale > 1:
+                src_gbox = gbx.zoom_out(src_gbox, scale)
+
+            region = WarpRegion(roi_src, roi_dst, src_gbox, self.dst_gbox[roi_dst])
+            self._regions[scale] = region
+        return region
+
+    def warp(self,
+             src: np.ndarray,
+             dst: np.ndarray,
+             scale: int = 1,
+             src_nodata: Nodata = None,
+             dst_nodata: Nodata = None) -> np.ndarray:
+        """
+        Warp pixels of ``region(scale).src_gbox`` into ``region(scale).dst_gbox``.
+
+        :param        src: 2D image as ndarray
+        :param        dst: 2D image as ndarray
+        :param      scale: Shrink factor the source was read at
+        :param src_nodata: Value representing "no data" in the source image
+        :param dst_nodata: Value to represent "no data" in the destination image
+
+        :returns: dst
+        """
+        region = self.region(scale)
+        assert src.shape == region.src_gbox.shape and dst.shape == region.dst_gbox.shape
+
+        A = None
+        if self.rr.transform.linear is not None:
+            A = (~region.src_gbox.transform)*region.dst_gbox.transform
+            if is_warp_affine_np_supported(src, dst, A, self.resampling,
+                                           src_nodata=src_nodata, dst_nodata=dst_nodata):
+                return warp_affine_np(src, dst, A, self.resampling,
+                                      src_nodata=src_nodata, dst_nodata=dst_nodata)
+
+        if (self.resampling == rasterio.warp.Resampling.nearest
+                and src.dtype == dst.dtype
+                and src.dtype.name not in ('int64', 'uint64')
+                and src.size < 2**31
+                and dst.size * 5 <= WARP_INDEX_CACHE_BYTES):
+            index, outside = _nearest_index(self, scale)
+            return _warp_index(src, dst, index, outside, src_nodata, dst_nodata)
+
+        return self._warp(region, A, src, dst, src_nodata, dst_nodata)
+
+    def _warp(self, region: WarpRegion, A: Optional[Affine],
+              src: np.ndarray, dst: np.ndarray,
+              src_nodata: Nodata, dst_nodata: Nodata) -> np.ndarray:
+        if A is not None:
+            return warp_affine(src, dst, A, self.resampling,
+                               src_nodata=src_nodata, dst_nodata=dst_nodata)
+        return rio_reproject(src, dst, region.src_gbox, region.dst_gbox, self.resampling,
+                             src_nodata=src_nodata, dst_nodata=dst_nodata)
+
+
+def _warp_plan_key(src_gbox: GeoBox, dst_gbox: GeoBox, resampling: Resampling):
+    if isinstance(resampling, str):
+        resampling = resampling_s2rio(resampling)
+    return (src_gbox, dst_gbox, resampling)
+
+
+_warp_plan_cache = cachetools.LRUCache(WARP_PLAN_CACHE_SIZE)
+_warp_index_cache = cachetools.LRUCache(WARP_INDEX_CACHE_BYTES,
+                                        getsizeof=lambda index: index[0].nbytes + index[1].nbytes)
+_warp_cache_lock = threading.Lock()
+
+
+@cachetools.cached(_warp_plan_cache, key=_warp_plan_key, lock=_warp_cache_lock)  # type: ignore[misc]
+def warp_plan(src_gbox: GeoBox, dst_gbox: GeoBox, resampling: Resampling) -> WarpPlan:
+    """
+    Get :py:class:`WarpPlan` for reprojecting from ``src_gbox`` to ``dst_gbox``.
+
+    Plans are kept in a process wide LRU cache, so reprojecting many images between the same
+    GeoBoxes only pays the setup cost once.
+    """
+    return WarpPlan(src_gbox, dst_gbox, resampling)
+
+
+@cachetools.cached(_warp_index_cache,
+                   key=lambda plan, scale: (plan.src_gbox, plan.dst_gbox, scale),
+                   lock=_warp_cache_lock)  # type: ignore[misc]
+def _nearest_index(plan: WarpPlan, scale: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flat index of the source pixel used for every destination pixel, and a mask of
+    destination pixels outside of the source.
+
+    Found by warping an image of pixel indexes with the same code as any other image,
+    so the result is exactly what GDAL would pick.
+    """
+    region = plan.region(scale)
+    A = None
+    if plan.rr.transform.linear is not None:
+        A = (~region.src_gbox.transform)*region.dst_gbox.transform
+
+    src = np.arange(np.prod(region.src_gbox.shape), dtype='int32').reshape(region.src_gbox.shape)
+    index = np.full(region.dst_gbox.shape, -1, dtype='int32')
+    plan._warp(region, A, src, index, None, -1)  # pylint: disable=protected-access
+
+    outside = index < 0
+    index[outside] = 0
+    return index, outside
+
+
+def _warp_index(src: np.ndarray,
+                dst: np.ndarray,
+                index: np.ndarray,
+                outside: np.ndarray,
+                src_nodata: Nodata,
+                dst_nodata: Nodata) -> np.ndarray:
+    # Same as GDAL: pixels without a valid source pixel are set to nodata, or 0 if there is none
+    nodata = dst_nodata if dst_nodata is not None else src_nodata
+    np.take(src, index, out=dst)
+
+    invalid = _nodata_mask(dst, src_nodata)
+    invalid = outside if invalid is None else (invalid | outside)
+    if not _nearest_keeps_nodata(dst.dtype, src_nodata, dst_nodata):
+        # also same as GDAL: valid pixels equal to nodata are changed
+        dst[dst == dst_nodata] = dst_nodata + (1 if dst_nodata == np.iinfo(dst.dtype).min else -1)
+    dst[invalid] = 0 if nodata is None else nodata
+    return dst
@@ -10,8 +10,8 @@ import itertools
 import math
 from affine import Affine
 
-from . import Geometry, GeoBox, BoundingBox
-from .tools import align_up
+from . import Geometry, GeoBox, BoundingBox, box
+from .tools import align_up, is_affine_st
 from datacube.utils.math import clamp
 
 # pylint: disable=invalid-name
@@ -232,7 +232,13 @@ class GeoboxTiles():
             poly = polygon
         else:
             poly = polygon.to_crs(self._gbox.crs)
-        yy, xx = self.range_from_bbox(poly.boundingbox)
+        bbox = poly.boundingbox
+        yy, xx = self.range_from_bbox(bbox)
+        if is_affine_st(self._gbox.transform) and poly.contains(box(*bbox, crs=poly.crs)):
+            # Axis aligned rectangle: every tile within the bounding box overlaps
+            yield from itertools.product(yy, xx)
+            return
+
         for idx in itertools.product(yy, xx):
             gbox = self[idx]
             if gbox.extent.intersects(poly):
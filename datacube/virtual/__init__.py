@@ -13,6 +13,7 @@ from .catalog import Catalog
 from .utils import reject_keys
 
 from datacube.model import Measurement
+from datacube.storage._fusers import FUSERS
 from datacube.utils import import_function
 from datacube.utils.documents import parse_yaml
 
@@ -48,7 +49,7 @@ class NameResolver:
             else:
                 try:
                     result = import_function(name)
-                except (ImportError, AttributeError):
+                except (ImportError, AttributeError, ValueError):
                     msg = "could not resolve {} {} in {}".format(kind, name, recipe)
                     raise VirtualProductException(msg)
 
@@ -58,9 +59,15 @@ class NameResolver:
 
         kind = virtual_product_kind(recipe)
 
+        def lookup_func(key, value):
+            if key == 'fuse_func' and isinstance(value, str) and value in FUSERS:
+                # built-in fusers are referred to by name
+                return value
+            return lookup(value, kind='function')
+
         if kind == 'product':
             func_keys = ['fuse_func', 'dataset_predicate']
-            return from_validated_recipe({key: value if key not in func_keys else lookup(value, kind='function')
+            return from_validated_recipe({key: value if key not in func_keys else lookup_func(key, value)
                                           for key, value in recipe.items()})
 
         if kind == 'transform':
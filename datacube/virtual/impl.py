@@ -319,7 +319,8 @@ class Product(VirtualProduct):
         return self['product']
 
     def _reconstruct(self):
-        return {key: value if key not in ['fuse_func', 'dataset_predicate'] else qualified_name(value)
+        return {key: value if key not in ['fuse_func', 'dataset_predicate'] or isinstance(value, str)
+                else qualified_name(value)
                 for key, value in self.items()}
 
     def output_measurements(self, product_definitions: TypeMapping[str, DatasetType],  # type: ignore[override]
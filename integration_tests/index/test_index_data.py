@@ -343,6 +343,35 @@ def test_index_dataset_with_sources(index, default_metadata_type):
     index.datasets.add(child, with_lineage=False)
 
 
+def test_index_many_datasets_with_sources(index, default_metadata_type):
+    type_ = index.products.add_document(_pseudo_telemetry_dataset_type)
+
+    parent = Dataset(type_, _telemetry_dataset.copy(), None, sources={})
+    children = []
+    for id_ in ('051a003f-5bba-43c7-b5f1-7f1da3ae9cfb', 'f226a278-e422-11e6-b501-185e0f80a5c0'):
+        child_doc = _telemetry_dataset.copy()
+        child_doc['lineage'] = {'source_datasets': {'source': _telemetry_dataset}}
+        child_doc['id'] = id_
+        children.append(Dataset(type_, child_doc, uris=['file:///tmp/{}/a.yaml'.format(id_),
+                                                        'file:///tmp/{}/b.yaml'.format(id_)],
+                                sources={'source': parent}))
+
+    with pytest.raises(MissingRecordError):
+        index.datasets.add_many(children, with_lineage=False)
+    assert not any(index.datasets.bulk_has([ds.id for ds in children]))
+
+    status = index.datasets.add_many(iter(children), batch_size=1)
+    assert (status.completed, status.skipped) == (2, 0)
+    assert index.datasets.has(parent.id)
+    for child in children:
+        assert index.datasets.get_locations(child.id) == child.uris
+        stored = index.datasets.get(child.id, include_sources=True)
+        assert stored.sources['source'].id == parent.id
+
+    status = index.datasets.add_many(children + [parent])
+    assert (status.completed, status.skipped) == (0, 3)
+
+
 def test_index_dataset_with_location(index: Index, default_metadata_type: MetadataType):
     first_file = Path('/tmp/first/something.yaml').absolute()
     second_file = Path('/tmp/second/something.yaml').absolute()
@@ -175,6 +175,25 @@ def test_mem_dataset_add_eo3(mem_index_eo3,
     assert list(dc.index.datasets.bulk_has((doc_ls8["id"], doc_wo["id"]))) == [True, True]
 
 
+def test_mem_dataset_add_many(mem_index_eo3, datasets_with_unembedded_lineage_doc):
+    dc = mem_index_eo3
+    from datacube.index.hl import Doc2Dataset
+    resolver = Doc2Dataset(dc.index)
+    (doc_ls8, loc_ls8), (doc_wo, loc_wo) = datasets_with_unembedded_lineage_doc
+
+    ls8_ds, _ = resolver(doc_ls8, loc_ls8)
+    status = dc.index.datasets.add_many(iter([ls8_ds]))
+    assert (status.completed, status.skipped) == (1, 0)
+    assert list(dc.index.datasets.get_locations(ls8_ds.id)) == ls8_ds.uris
+
+    # Source of wo is already indexed
+    wo_ds, _ = resolver(doc_wo, loc_wo)
+    status = dc.index.datasets.add_many([wo_ds, ls8_ds], batch_size=1)
+    assert (status.completed, status.skipped) == (1, 1)
+    assert list(dc.index.datasets.bulk_has((ls8_ds.id, wo_ds.id))) == [True, True]
+    assert dc.index.datasets.get(wo_ds.id, include_sources=True).sources["ard"].id == ls8_ds.id
+
+
 def test_mem_ds_lineage(mem_eo3_data):
     dc, ls8_id, wo_id = mem_eo3_data
     wo_ds = dc.index.datasets.get(wo_id, include_sources=True)
@@ -186,6 +205,10 @@ def test_mem_ds_lineage(mem_eo3_data):
     derived = list(dc.index.datasets.get_derived(ls8_id))
     assert len(derived) == 1
     assert derived[0].id == wo_id
+    graph = dc.index.datasets.get_derived_graph(ls8_id)
+    assert [ds.id for ds in graph[ls8_id]] == [wo_id]
+    assert dc.index.datasets.get_derived_graph(ls8_id, max_depth=0) == {}
+    assert dc.index.datasets.get(wo_id, include_sources=True, max_depth=0).sources is None
     assert "cloud_cover" in dc.index.datasets.get_field_names(ls8_ds.type.name)
 
 
@@ -365,6 +388,9 @@ def test_mem_prod_time_bounds(mem_eo3_data):
     for prod in dc.index.products.get_all():
         tmin, tmax = dc.index.datasets.get_product_time_bounds(prod.name)
         assert (tmin is None and tmax is None) or tmin < tmax
+        summary = dc.index.datasets.get_product_summary(prod.name)
+        assert tuple(summary.time) == (tmin, tmax)
+        assert summary.dataset_count == dc.index.datasets.count(product=prod.name)
 
 
 def test_mem_ds_archive_purge(mem_eo3_data):
@@ -436,6 +462,32 @@ def test_mem_ds_search_and_count_by_product(mem_eo3_data):
         assert count == 1
 
 
+def test_mem_ds_search_page(mem_eo3_data):
+    dc, ls8_id, wo_id = mem_eo3_data
+    ls8_prod = dc.index.products.get_by_name("ga_ls8c_ard_3")
+    wo_prod = dc.index.products.get_by_name("ga_ls_wo_3")
+    expected_ids = [ls8_id, wo_id] if ls8_prod.id < wo_prod.id else [wo_id, ls8_id]
+    for order_by in ('id', 'time'):
+        page = dc.index.datasets.search_page(page_size=1, order_by=order_by, platform='landsat-8')
+        assert [ds.id for ds in page.datasets] == expected_ids[:1]
+        assert page.continuation is not None
+        page = dc.index.datasets.search_page(page_size=1, continuation=page.continuation,
+                                             order_by=order_by, platform='landsat-8')
+        assert [ds.id for ds in page.datasets] == expected_ids[1:]
+        page = dc.index.datasets.search_page(page_size=1, continuation=page.continuation,
+                                             order_by=order_by, platform='landsat-8')
+        assert page == ([], None)
+        pages = list(dc.index.datasets.search_pages(page_size=5, order_by=order_by, platform='landsat-8'))
+        assert [[ds.id for ds in page.datasets] for page in pages] == [expected_ids]
+    with pytest.raises(ValueError):
+        dc.index.datasets.search_page(order_by='size')
+    first_page = dc.index.datasets.search_page(page_size=1, order_by='time')
+    with pytest.raises(ValueError):
+        dc.index.datasets.search_page(continuation=first_page.continuation, order_by='id')
+    with pytest.raises(ValueError):
+        dc.index.datasets.search_page(continuation='junk')
+
+
 def test_mem_ds_search_returning(mem_eo3_data):
     dc, ls8_id, wo_id = mem_eo3_data
     lds = list(dc.index.datasets.search_returning(
@@ -75,6 +75,7 @@ def test_null_dataset_resource(null_config):
         assert dc.index.datasets.get(test_uuid) is None
         assert dc.index.datasets.bulk_get([test_uuid, "foo"]) == []
         assert dc.index.datasets.get_derived(test_uuid) == []
+        assert dc.index.datasets.get_derived_graph(test_uuid) == {}
         assert not dc.index.datasets.has(test_uuid)
         assert dc.index.datasets.bulk_has([test_uuid, "foo"]) == [False, False]
         with pytest.raises(NotImplementedError) as e:
@@ -107,6 +108,8 @@ def test_null_dataset_resource(null_config):
             dc.index.datasets.restore_location(test_uuid, "http://a.uri/test")
         with pytest.raises(NotImplementedError) as e:
             dc.index.datasets.get_product_time_bounds("product1")
+        with pytest.raises(NotImplementedError) as e:
+            dc.index.datasets.get_product_summary("product1")
 
         assert dc.index.datasets.search_product_duplicates(MagicMock()) == []
         assert dc.index.datasets.search_by_metadata({}) == []
@@ -9,6 +9,7 @@ import copy
 import csv
 import datetime
 import io
+import os
 import uuid
 from decimal import Decimal
 from uuid import UUID
@@ -18,12 +19,14 @@ import pytest
 import yaml
 from dateutil import tz
 from psycopg2._range import NumericRange
+from sqlalchemy import text
 
 import datacube.scripts.cli_app
 import datacube.scripts.search_tool
 from datacube.config import LocalConfig
 from datacube.drivers.postgres import PostgresDb
 from datacube.drivers.postgres._connections import DEFAULT_DB_USER
+from datacube.drivers.postgres.sql import SCHEMA_NAME
 from datacube.index import Index
 from datacube.model import Dataset
 from datacube.model import DatasetType
@@ -102,6 +105,8 @@ def pseudo_ls8_dataset(index, initialised_postgres_db, pseudo_ls8_type):
             pseudo_ls8_type.id
         )
     assert was_inserted
+    # Inserted directly, bypassing the index: bring the product summary up to date
+    index.datasets.rebuild_product_summary(pseudo_ls8_type.name)
     d = index.datasets.get(id_)
     # The dataset should have been matched to the telemetry type.
     assert d.type.id == pseudo_ls8_type.id
@@ -155,6 +160,7 @@ def pseudo_ls8_dataset2(index, initialised_postgres_db, pseudo_ls8_type):
             pseudo_ls8_type.id
         )
     assert was_inserted
+    index.datasets.rebuild_product_summary(pseudo_ls8_type.name)
     d = index.datasets.get(id_)
     # The dataset should have been matched to the telemetry type.
     assert d.type.id == pseudo_ls8_type.id
@@ -184,6 +190,7 @@ def pseudo_ls8_dataset3(index: Index,
             pseudo_ls8_type.id
         )
     assert was_inserted
+    index.datasets.rebuild_product_summary(pseudo_ls8_type.name)
     d = index.datasets.get(id_)
     # The dataset should have been matched to the telemetry type.
     assert d.type.id == pseudo_ls8_type.id
@@ -211,6 +218,7 @@ def pseudo_ls8_dataset4(index: Index,
             pseudo_ls8_type.id
         )
         assert was_inserted
+        index.datasets.rebuild_product_summary(pseudo_ls8_type.name)
         d = index.datasets.get(id_)
         # The dataset should have been matched to the telemetry type.
         assert d.type.id == pseudo_ls8_type.id
@@ -256,6 +264,33 @@ def test_search_dataset_equals(index: Index, pseudo_ls8_dataset: Dataset):
         )
 
 
+def test_search_async(index: Index, pseudo_ls8_type: DatasetType, pseudo_ls8_dataset: Dataset) -> None:
+    pytest.importorskip('asyncpg')
+    import asyncio
+    from datacube.index import AsyncIndex
+
+    async def run():
+        async_index = AsyncIndex(index)
+        try:
+            assert (await async_index.products.get_by_name(pseudo_ls8_type.name)).id == pseudo_ls8_type.id
+            dataset = await async_index.datasets.get(pseudo_ls8_dataset.id)
+            assert dataset.metadata_doc == pseudo_ls8_dataset.metadata_doc
+            assert [d.id for d in await async_index.datasets.bulk_get([pseudo_ls8_dataset.id])] == [dataset.id]
+
+            async def search():
+                return [d.id async for d in async_index.datasets.search(platform='LANDSAT_8', instrument='OLI_TIRS')]
+
+            # Concurrent searches, each on its own connection
+            assert await asyncio.gather(*(search() for _ in range(10))) == [[dataset.id]] * 10
+            assert await async_index.datasets.count(platform='LANDSAT_8', lat=Range(-40, -20)) == 1
+            results = [r async for r in async_index.datasets.search_returning(('id', 'lat'), platform='LANDSAT_8')]
+            assert results == list(index.datasets.search_returning(('id', 'lat'), platform='LANDSAT_8'))
+        finally:
+            await async_index.close()
+
+    asyncio.run(run())
+
+
 def test_search_dataset_by_metadata(index: Index, pseudo_ls8_dataset: Dataset) -> None:
     datasets = index.datasets.search_by_metadata(
         {"platform": {"code": "LANDSAT_8"}, "instrument": {"name": "OLI_TIRS"}}
@@ -429,6 +464,37 @@ def test_search_limit(index, pseudo_ls8_dataset, pseudo_ls8_dataset2):
     assert len(datasets) == 2
 
 
+def test_search_page(index: Index,
+                     pseudo_ls8_type: DatasetType,
+                     pseudo_ls8_dataset: Dataset,
+                     pseudo_ls8_dataset2: Dataset,
+                     pseudo_ls8_dataset3: Dataset,
+                     pseudo_ls8_dataset4: Dataset) -> None:
+    all_datasets = [pseudo_ls8_dataset, pseudo_ls8_dataset2, pseudo_ls8_dataset3, pseudo_ls8_dataset4]
+    by_time = sorted(all_datasets, key=lambda ds: (ds.time.begin, ds.id))
+    for order_by, expected in (('id', sorted(ds.id for ds in all_datasets)), ('time', [ds.id for ds in by_time])):
+        pages = list(index.datasets.search_pages(page_size=3, order_by=order_by, product=pseudo_ls8_type.name))
+        assert [len(page.datasets) for page in pages] == [3, 1]
+        assert [ds.id for page in pages for ds in page.datasets] == expected
+        assert pages[-1].continuation is None
+
+        # Resuming from a page isn't affected by datasets archived since
+        page = index.datasets.search_page(page_size=2, order_by=order_by, product=pseudo_ls8_type.name)
+        index.datasets.archive([expected[0]])
+        page = index.datasets.search_page(page_size=2, continuation=page.continuation,
+                                          order_by=order_by, product=pseudo_ls8_type.name)
+        assert [ds.id for ds in page.datasets] == expected[2:]
+        index.datasets.restore([expected[0]])
+
+    # Other search terms still apply
+    page = index.datasets.search_page(product=pseudo_ls8_type.name, time=Range(
+        datetime.datetime(2014, 7, 26, 23, 0, tzinfo=tz.tzutc()),
+        datetime.datetime(2014, 7, 27, 0, 0, tzinfo=tz.tzutc())
+    ))
+    assert {ds.id for ds in page.datasets} == {pseudo_ls8_dataset.id, pseudo_ls8_dataset3.id}
+    assert page.continuation is None
+
+
 # Current formulation of this test relies on non-EO3 test data
 @pytest.mark.parametrize('datacube_env_name', ('datacube', ))
 def test_search_or_expressions(index: Index,
@@ -498,6 +564,95 @@ def test_search_or_expressions(index: Index,
 
 # Current formulation of this test relies on non-EO3 test data
 @pytest.mark.parametrize('datacube_env_name', ('datacube', ))
+def test_search_streams_results(index: Index,
+                                pseudo_ls8_dataset: Dataset,
+                                ls5_dataset_w_children) -> None:
+    expected_ids = set(index.datasets.get_all_dataset_ids(archived=False))
+    assert len(expected_ids) == 4
+
+    # Results come from a named (server-side) cursor
+    with index._db.stream() as connection:
+        results = connection.all_dataset_ids(archived=False)
+        assert results.cursor.name
+        assert {r[0] for r in results} == expected_ids
+
+    # Fetching a row at a time gives the same results
+    index._db._fetch_size = 1
+    # Dataset ids are read in pages, with nothing held open between them
+    all_ids = index.datasets.get_all_dataset_ids(archived=False)
+    first = next(all_ids)
+    index.datasets.archive([first])
+    assert {first, *all_ids} == expected_ids
+    index.datasets.restore([first])
+    assert {ds.id for ds in index.datasets.search()} == expected_ids
+    assert {r.id for r in index.datasets.search_returning(('id',))} == expected_ids
+    assert {r.id for r in index.datasets.search_returning_datasets_light(('id',))} == expected_ids
+
+    # Stopping early leaves no transaction open
+    it = index.datasets.search()
+    next(it)
+    it.close()
+    assert index.datasets.count() == 4
+
+
+def _peak_rss_increase(func) -> int:
+    """
+    Increase in peak resident memory (kB) of this process while running func.
+    """
+    def read_status(field):
+        with open('/proc/self/status') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith(field + ':'))
+
+    # Writing 5 resets the peak RSS (VmHWM) to the current RSS
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    start = read_status('VmRSS')
+    func()
+    return read_status('VmHWM') - start
+
+
+@pytest.mark.skipif(not os.access('/proc/self/clear_refs', os.W_OK),
+                    reason='Resetting peak RSS needs Linux procfs')
+@pytest.mark.parametrize('datacube_env_name', ('datacube', ))
+def test_search_streaming_peak_rss(index: Index, pseudo_ls8_dataset: Dataset) -> None:
+    """
+    Benchmark: peak client memory of reading many large datasets, buffered vs streamed.
+    """
+    num_datasets = 2000
+    # ~50kB of metadata each, ~100MB in total
+    with index._db.connect() as connection:
+        connection._connection.execute(
+            text(f"""
+            insert into {SCHEMA_NAME}.dataset (id, metadata_type_ref, dataset_type_ref, metadata, added_by)
+            select md5(random()::text || g)::uuid, metadata_type_ref, dataset_type_ref,
+                   jsonb_set(metadata, '{{padding}}', to_jsonb(repeat(md5(g::text), 1600))), added_by
+            from {SCHEMA_NAME}.dataset, generate_series(1, :num_datasets) g
+            where id = :id
+            """),
+            num_datasets=num_datasets, id=pseudo_ls8_dataset.id
+        )
+    assert index.datasets.count() == num_datasets + 1
+
+    def read_buffered():
+        with index._db.connect() as connection:
+            assert sum(1 for _ in connection.search_datasets(())) == num_datasets + 1
+
+    def read_streamed():
+        with index._db.stream() as connection:
+            assert sum(1 for _ in connection.search_datasets(())) == num_datasets + 1
+
+    def read_ids():
+        assert sum(1 for _ in index.datasets.get_all_dataset_ids(archived=False)) == num_datasets + 1
+
+    buffered = _peak_rss_increase(read_buffered)
+    streamed = _peak_rss_increase(read_streamed)
+    ids = _peak_rss_increase(read_ids)
+    print(f"Peak client RSS increase: buffered {buffered} kB, streamed {streamed} kB, ids {ids} kB")
+    assert buffered > 50_000
+    assert streamed < buffered / 4
+    assert ids < buffered / 4
+
+
 def test_search_returning(index: Index,
                           local_config: LocalConfig,
                           pseudo_ls8_type: DatasetType,
@@ -795,6 +950,24 @@ def test_get_dataset_with_children(index: Index, ls5_dataset_w_children: Dataset
     assert list(level1.sources.keys()) == ['satellite_telemetry_data']
     assert list(level1.sources['satellite_telemetry_data'].sources) == []
 
+    # Only the first generation of sources
+    d = index.datasets.get(id_, include_sources=True, max_depth=1)
+    level1 = d.sources['level1']
+    assert level1.sources is None
+
+    # Everything derived from the telemetry, in one go
+    level1_id = level1.id
+    d = index.datasets.get(id_, include_sources=True)
+    telemetry_id = d.sources['level1'].sources['satellite_telemetry_data'].id
+    graph = index.datasets.get_derived_graph(telemetry_id)
+    assert {source_id: [ds.id for ds in derived] for source_id, derived in graph.items()} == {
+        telemetry_id: [level1_id],
+        level1_id: [id_],
+    }
+    graph = index.datasets.get_derived_graph(str(telemetry_id), max_depth=1)
+    assert list(graph) == [telemetry_id]
+    assert index.datasets.get_derived_graph(id_) == {}
+
 
 def test_count_by_product_searches(index: Index,
                                    pseudo_ls8_type: DatasetType,
@@ -875,6 +1048,39 @@ def test_count_time_groups(index: Index,
     ]
 
 
+def test_product_summary(index: Index,
+                         pseudo_ls8_type: DatasetType,
+                         pseudo_ls8_dataset: Dataset,
+                         pseudo_ls8_dataset2: Dataset) -> None:
+    summary = index.datasets.get_product_summary(pseudo_ls8_type.name)
+    assert summary.dataset_count == 2
+    assert summary.time == (pseudo_ls8_dataset.time.begin, pseudo_ls8_dataset2.time.end)
+    assert summary.bbox == pytest.approx((149.78434, -31.37116, 152.21782, -29.23394))
+    assert index.datasets.get_product_time_bounds(pseudo_ls8_type.name) == tuple(summary.time)
+
+    # Archiving the last dataset leaves the stored bounds stale, they're rebuilt on next use
+    index.datasets.archive([pseudo_ls8_dataset2.id])
+    with index._db.connect() as connection:
+        assert connection.get_product_summary(pseudo_ls8_type.id).bounds_stale
+    summary = index.datasets.get_product_summary(pseudo_ls8_type.name)
+    assert summary.dataset_count == 1
+    assert summary.time == (pseudo_ls8_dataset.time.begin, pseudo_ls8_dataset.time.end)
+    with index._db.connect() as connection:
+        assert not connection.get_product_summary(pseudo_ls8_type.id).bounds_stale
+    assert list(index.datasets.count_by_product(product=pseudo_ls8_type.name)) == [(pseudo_ls8_type, 1)]
+
+    index.datasets.rebuild_product_summary(pseudo_ls8_type.name)
+    assert index.datasets.get_product_summary(pseudo_ls8_type.name) == summary
+
+    index.datasets.restore([pseudo_ls8_dataset2.id])
+    summary = index.datasets.get_product_summary(pseudo_ls8_type.name)
+    assert summary.dataset_count == 2
+    assert summary.time.end == pseudo_ls8_dataset2.time.end
+
+    with pytest.raises(ValueError):
+        index.datasets.get_product_summary('no_such_product')
+
+
 # Current formulation of this test relies on non-EO3 test data
 @pytest.mark.parametrize('datacube_env_name', ('datacube', ))
 @pytest.mark.usefixtures('ga_metadata_type',
@@ -1237,3 +1443,60 @@ def _csv_search_raw(args, clirunner):
     output = result.output
     output_lines = output.split("\n")
     return "\n".join(line for line in output_lines if "WARNING:" not in line)
+
+
+@pytest.mark.parametrize('datacube_env_name', ('experimental', ))
+def test_search_by_geopolygon(index: Index,
+                              extended_eo3_metadata_type_doc,
+                              extended_eo3_product_doc,
+                              datasets_with_unembedded_lineage_doc) -> None:
+    from datacube.index.hl import Doc2Dataset
+    from datacube.utils.geometry import box
+
+    index.metadata_types.add(index.metadata_types.from_doc(extended_eo3_metadata_type_doc))
+    index.products.add_document(extended_eo3_product_doc)
+    doc, location = datasets_with_unembedded_lineage_doc[0]
+    ds, err = Doc2Dataset(index)(doc, location)
+    assert err is None
+    index.datasets.add(ds)
+
+    # Small polygons inside and next to the dataset, in a different CRS than the dataset
+    lonlat = ds.extent.to_crs('EPSG:4326')
+    x, y = lonlat.centroid.coords[0]
+    inside = box(x - 0.01, y - 0.01, x + 0.01, y + 0.01, 'EPSG:4326').to_crs('EPSG:3577')
+    outside = box(x + 5, y + 5, x + 5.01, y + 5.01, 'EPSG:4326').to_crs('EPSG:3577')
+
+    product = ds.type.name
+    assert [d.id for d in index.datasets.search(product=product, geopolygon=inside)] == [ds.id]
+    assert list(index.datasets.search(product=product, geopolygon=outside)) == []
+    assert index.datasets.count(product=product, geopolygon=inside) == 1
+    assert index.datasets.count(product=product, geopolygon=outside) == 0
+
+    dc = Datacube(index=index)
+    assert [d.id for d in dc.find_datasets(product=product, geopolygon=inside)] == [ds.id]
+    assert dc.find_datasets(product=product, geopolygon=outside) == []
+
+    # Datasets indexed before extents were stored are found after init
+    from datacube.drivers.postgis._schema import DATASET
+    with index._db.connect() as connection:
+        connection.execute(DATASET.update().where(DATASET.c.id == ds.id).values(extent=None))
+    assert list(index.datasets.search(product=product, geopolygon=inside)) == []
+    index.init_db()
+    assert [d.id for d in index.datasets.search(product=product, geopolygon=inside)] == [ds.id]
+    with index._db.connect() as connection:
+        assert connection.get_datasets_without_extent() == []
+
+    # Databases from before the extent column still work, polygons are checked by Datacube instead
+    from datacube.drivers.postgis import _core
+    from datacube.index.exceptions import IndexSetupError
+    with index._db.connect() as connection:
+        connection.execute('alter table odc.dataset drop column extent')
+    _core._SCHEMA_CHECKS.clear()
+    assert not index.supports_spatial_indexes
+    assert [d.id for d in dc.find_datasets(product=product, geopolygon=inside)] == [ds.id]
+    assert dc.find_datasets(product=product, geopolygon=outside) == []
+    with pytest.raises(IndexSetupError):
+        list(index.datasets.search(product=product, geopolygon=inside))
+    index.init_db()
+    assert index.supports_spatial_indexes
+    assert [d.id for d in index.datasets.search(product=product, geopolygon=inside)] == [ds.id]
@@ -8,8 +8,10 @@ Test creation of added/updated columns during
 """
 import pytest
 
+from datacube.drivers.postgres import PostgresDb
 from datacube.drivers.postgres.sql import SCHEMA_NAME
 from datacube.drivers.postgres import _schema
+from datacube.index.exceptions import IndexSetupError
 
 
 COLUMN_PRESENCE = """
@@ -93,6 +95,15 @@ def test_readd_column(clirunner, uninitialised_postgres_db):
         assert not check_column(connection, _schema.DATASET.name, "updated")
         assert not check_column(connection, _schema.DATASET_LOCATION.name, "added")
 
+    # Catalogue version still works without the columns
+    db = PostgresDb.create(uninitialised_postgres_db.url.host, uninitialised_postgres_db.url.database,
+                           uninitialised_postgres_db.url.username, uninitialised_postgres_db.url.password,
+                           uninitialised_postgres_db.url.port, validate=True)
+    with db.connect() as connection:
+        version = connection.get_catalogue_version()
+        assert [row[0] for row in version] == [_schema.PRODUCT.name, _schema.METADATA_TYPE.name]
+        assert all(len(row) == 3 for row in version)
+
     result = clirunner(["system", "init"])
 
     with uninitialised_postgres_db.connect() as connection:
@@ -100,3 +111,27 @@ def test_readd_column(clirunner, uninitialised_postgres_db):
         assert check_column(connection, _schema.PRODUCT.name, "updated")
         assert check_column(connection, _schema.DATASET.name, "updated")
         assert check_column(connection, _schema.DATASET_LOCATION.name, "added")
+
+
+@pytest.mark.parametrize('datacube_env_name', ('datacube', ))
+def test_missing_product_summary(clirunner, uninitialised_postgres_db):
+    # Databases from before product summaries still work, until `system init` adds them
+    result = clirunner(["system", "init"])
+    assert "Created." in result.output
+
+    with uninitialised_postgres_db.connect() as connection:
+        connection.execute(f'drop table {_schema.PRODUCT_SUMMARY_DAY.fullname}, {_schema.PRODUCT_SUMMARY.fullname}')
+
+    db = PostgresDb.create(uninitialised_postgres_db.url.host, uninitialised_postgres_db.url.database,
+                           uninitialised_postgres_db.url.username, uninitialised_postgres_db.url.password,
+                           uninitialised_postgres_db.url.port, validate=True)
+    with db.connect() as connection:
+        assert not connection.has_product_summaries
+        assert connection.get_product_summary(1) is None
+        with pytest.raises(IndexSetupError):
+            with db.begin() as transaction:
+                transaction.rebuild_product_summary(1, {})
+
+    result = clirunner(["system", "init"])
+    with uninitialised_postgres_db.connect() as connection:
+        assert connection.has_product_summaries
@@ -29,6 +29,7 @@ extras_require = {
     's3': ['boto3', 'botocore'],
     'test': tests_require,
     'cf': ['compliance-checker>=4.0.0'],
+    'async': ['asyncpg', 'sqlalchemy[asyncio]'],
 }
 
 extras_require['dev'] = sorted(set(sum([extras_require[k] for k in [
@@ -37,6 +38,7 @@ extras_require['dev'] = sorted(set(sum([extras_require[k] for k in [
     'performance',
     's3',
     'distributed',
+    'async',
 ]], [])))
 
 # An 'all' option, following ipython naming conventions.
@@ -112,3 +112,105 @@ def test_dask_chunks():
 
     with pytest.raises(KeyError):
         _calculate_chunk_sizes(sources, geobox, {'zz': 1})
+
+
+def test_dask_load_graph():
+    from uuid import uuid4
+    from datacube.model import Measurement
+    from datacube.utils.geometry import GeoBox
+
+    geobox = AlbersGS.tile_geobox((0, 0))[:100, :200]
+    # datasets cover left half of the geobox only
+    dss = [SimpleNamespace(id=uuid4(), extent=geobox[:, :100].extent) for _ in range(3)]
+    # last time slice has no datasets
+    srcs = np.empty(4, dtype=object)
+    srcs[:] = [(ds,) for ds in dss] + [()]
+    sources = xr.DataArray(srcs, dims=('time',), coords={'time': np.arange(4)})
+    mm = [Measurement(name='a', dtype='int16', nodata=-1, units='1')]
+
+    xx = Datacube._dask_load(sources, geobox, mm, {'x': 50, 'y': 50})
+    data = xx.a.data
+    assert data.shape == (4, 100, 200)
+    assert data.numblocks == (4, 2, 4)
+
+    layer = data.dask.layers[data.name]
+    assert not layer.is_materialized()
+    assert len(layer) == 4*2*4
+    assert (data.name, 0, 1, 1) in layer
+    assert (data.name, 0, 2, 1) not in layer
+    assert (data.name, 4, 0, 0) not in layer
+    assert 'some-key' not in layer
+
+    # computing a subset of the array only generates tasks it needs
+    assert (data[3].compute() == -1).all()
+    assert (data[0, :, 100:].compute() == -1).all()
+    assert not layer.is_materialized()
+
+    key = (data.name, 1, 1, 0)
+    culled, deps = layer.cull({key}, [])
+    assert set(culled) == {key}
+    assert not layer.is_materialized()
+
+    # tasks reference datasets, measurement and tiles by key, these are stored once
+    fn, ds_keys, gbt_key, idx, measurement_key, *_ = culled[key]
+    assert idx == (1, 0)
+    assert deps[key] == {*ds_keys, gbt_key, measurement_key}
+    assert data.dask[ds_keys[0]] is dss[1]
+    assert data.dask[measurement_key] is mm[0]
+    assert isinstance(data.dask[gbt_key][idx], GeoBox)
+
+    # tiles with no data are aliases to a shared empty chunk
+    empty = [layer[(data.name, t, iy, ix)] for t in range(3) for iy in (0, 1) for ix in (2, 3)]
+    empty.extend(layer[(data.name, 3, iy, ix)] for iy in (0, 1) for ix in range(4))
+    assert len(set(empty)) == 1
+    assert isinstance(empty[0], str)
+    assert layer.is_materialized()
+    assert len(layer) == 4*2*4
+
+
+def test_find_datasets_spatial_index():
+    from unittest.mock import MagicMock
+    from datacube.utils.geometry import GeoBox
+    from datacube.utils.geometry.gbox import translate_pix
+    from affine import Affine
+
+    bands = [dict(name='a')]
+    gbox = GeoBox(10, 10, Affine(10, 0, 1500000, 0, -10, -3900000), 'EPSG:3577')
+    inside = mk_sample_dataset(bands, geobox=gbox, id='3a1df9e0-8484-44fc-8102-79184eab85dd')
+    outside = mk_sample_dataset(bands, geobox=translate_pix(gbox, 1000, 0),
+                                id='3a1df9e0-8484-44fc-8102-79184eab85de')
+
+    index = MagicMock()
+    index.datasets.get_field_names.return_value = {'product', 'lat', 'lon', 'time'}
+    index.datasets.search.return_value = [inside, outside]
+    dc = Datacube(index=index)
+    query = dict(product='sample', x=(1500010, 1500050), y=(-3900050, -3900010), crs='EPSG:3577')
+
+    # Filtered after search
+    index.supports_spatial_indexes = False
+    assert list(dc.find_datasets_lazy(**query)) == [inside]
+    search_terms = index.datasets.search.call_args[1]
+    assert 'lat' in search_terms and 'geopolygon' not in search_terms
+
+    # Index does it
+    index.supports_spatial_indexes = True
+    assert list(dc.find_datasets_lazy(**query)) == [inside, outside]
+    search_terms = index.datasets.search.call_args[1]
+    assert 'lat' not in search_terms
+    assert search_terms['geopolygon'].crs == 'EPSG:3577'
+
+
+def test_find_datasets_parallel():
+    from unittest.mock import MagicMock
+
+    index = MagicMock()
+    index.supports_spatial_indexes = False
+    index.datasets.get_field_names.return_value = {'product', 'time'}
+    index.datasets.search_parallel.return_value = []
+    dc = Datacube(index=index)
+
+    assert dc.find_datasets(product='sample', time=('2020-01', '2020-12'), parallel=4) == []
+    assert not index.datasets.search.called
+    args = index.datasets.search_parallel.call_args[1]
+    assert args['shards'] == 4
+    assert args['time'].begin.year == 2020
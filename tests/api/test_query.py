@@ -96,6 +96,21 @@ def test_query_kwargs(mock_index):
     assert query_group_by(group_by=gb) is gb
 
 
+def test_query_search_terms_with_geopolygon(mock_index):
+    mock_index.datasets.get_field_names = lambda: {'product', 'lat', 'lon', 'time'}
+
+    query = Query(index=mock_index, product='ls5_nbar_albers', time='2001',
+                  y=(-4174726, -4180011), x=(1515184, 1523263), crs='EPSG:3577')
+    terms = query.search_terms_with_geopolygon
+    assert terms['geopolygon'] is query.geopolygon
+    assert 'lat' not in terms and 'lon' not in terms
+    assert {k: v for k, v in terms.items() if k != 'geopolygon'} == {
+        k: v for k, v in query.search_terms.items() if k not in ('lat', 'lon')}
+
+    query = Query(index=mock_index, product='ls5_nbar_albers')
+    assert query.search_terms_with_geopolygon == query.search_terms
+
+
 def format_test(start_out, end_out):
     return Range(pandas.to_datetime(start_out, utc=True).to_pydatetime(),
                  pandas.to_datetime(end_out, utc=True).to_pydatetime())
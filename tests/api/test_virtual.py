@@ -290,6 +290,21 @@ def test_group_datasets(cloud_free_nbar, dc, query):
     assert time == 2
 
 
+def test_named_fuser():
+    product = construct_from_yaml("""
+        product: ls8_nbar_albers
+        fuse_func: max
+    """)
+    assert product['fuse_func'] == 'max'
+    assert 'fuse_func: max' in str(product)
+
+    with pytest.raises(VirtualProductException):
+        construct_from_yaml("""
+            product: ls8_nbar_albers
+            fuse_func: no_such_fuser
+        """)
+
+
 def test_explode(dc, query):
     collate = construct_from_yaml("""
         collate:
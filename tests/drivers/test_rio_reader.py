@@ -4,6 +4,7 @@
 # SPDX-License-Identifier: Apache-2.0
 """ Tests for new RIO reader driver
 """
+import gc
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, Future
 import numpy as np
@@ -217,3 +218,64 @@ def test_testutils_iodriver(data_folder):
     assert src.shape == (2000, 4000)
     assert src.nodata == -999
     assert src.dtype == np.dtype(np.int16)
+
+
+def test_rio_driver_file_cache(data_folder):
+    from datacube.drivers.rio._reader import RIOFileCache
+
+    base = "file://" + str(data_folder) + "/metadata.yml"
+    rdr = mk_rio_driver()
+
+    b1 = mk_band('b1', base, path="test.tif", format=GeoTIFF)
+    b2 = mk_band('b2', base, path="test.tif", format=GeoTIFF, band=2)
+    b3 = mk_band('b3', base, path="sample_tile_151_-29.tif", format=GeoTIFF)
+
+    load_ctx = rdr.new_load_context(iter([b1, b2]), None)
+    assert isinstance(load_ctx, RIOFileCache)
+    assert len(load_ctx) == 0
+
+    src1 = rdr.open(b1, load_ctx).result()
+    src2 = rdr.open(b2, load_ctx).result()
+    assert len(load_ctx) == 1
+    assert _rio_uri(b1) in load_ctx
+    assert src1._src is src2._src
+
+    np.testing.assert_array_equal(src1.read().result(),
+                                  rasterio.open(_rio_uri(b1)).read(1))
+    np.testing.assert_array_equal(src2.read().result(),
+                                  rasterio.open(_rio_uri(b1)).read(2))
+
+    # context is recycled along with open files
+    assert rdr.new_load_context(iter([b1]), load_ctx) is load_ctx
+    assert rdr.open(b1, load_ctx).result()._src is src1._src
+
+    # LRU eviction doesn't close files still in use
+    cache = RIOFileCache(max_size=1)
+    src1 = rdr.open(b1, cache).result()
+    src3 = rdr.open(b3, cache).result()
+    assert len(cache) == 1
+    assert _rio_uri(b3) in cache
+    assert not src1._src.closed
+    assert src1.read().result().shape == src1.shape
+
+    # evicted files are closed once the last reader is gone
+    evicted = src1._src
+    del src1
+    gc.collect()
+    assert evicted.closed
+    assert rdr.open(b3, cache).result()._src is src3._src
+
+    # close closes everything that is still cached
+    cache.close()
+    assert len(cache) == 0
+    assert src3._src.closed
+
+    # incompatible context is closed and replaced
+    load_ctx.close()
+    rdr = RDEntry().new_instance({'max_open_files': 2})
+    ctx = rdr.new_load_context(iter([]), cache)
+    assert ctx is not cache
+    assert ctx.max_size == 2
+
+    with pytest.raises(ValueError):
+        RIOFileCache(max_size=0)
@@ -9,6 +9,8 @@ from copy import deepcopy
 
 from uuid import UUID
 
+import pytest
+
 from datacube.index.postgres._datasets import DatasetResource
 from datacube.index.exceptions import DuplicateRecordError
 from datacube.model import DatasetType, MetadataType, Dataset
@@ -153,6 +155,8 @@ _EXAMPLE_NBAR_DATASET = _build_dataset(_EXAMPLE_NBAR)
 
 DatasetRecord = namedtuple('DatasetRecord', ['id', 'metadata', 'dataset_type_ref', 'uris',
                                              'added', 'added_by', 'archived'])
+SummaryRecord = namedtuple('SummaryRecord', ['dataset_count', 'time_min', 'time_max',
+                                             'lon_min', 'lat_min', 'lon_max', 'lat_max', 'bounds_stale'])
 
 
 class MockIndex(object):
@@ -164,6 +168,13 @@ class MockDb(object):
     def __init__(self):
         self.dataset = {}
         self.dataset_source = set()
+        self.locations = []
+        self.n_statements = 0
+        self.changes = []
+        self.fetch_size = 2
+        self.n_open = 0
+        self.has_product_summaries = True
+        self.summaries = {}
 
     @contextmanager
     def begin(self):
@@ -171,7 +182,11 @@ class MockDb(object):
 
     @contextmanager
     def connect(self):
-        yield self
+        self.n_open += 1
+        try:
+            yield self
+        finally:
+            self.n_open -= 1
 
     def get_dataset(self, id):
         return self.dataset.get(id, None)
@@ -197,6 +212,75 @@ class MockDb(object):
     def insert_dataset_source(self, classifier, dataset_id, source_dataset_id):
         self.dataset_source.add((classifier, dataset_id, source_dataset_id))
 
+    def insert_datasets(self, values):
+        self.n_statements += 1
+        inserted = []
+        for metadata_doc, dataset_id, dataset_type_id in values:
+            if dataset_id not in self.dataset:
+                self.insert_dataset(metadata_doc, dataset_id, dataset_type_id)
+                inserted.append(dataset_id)
+        return inserted
+
+    def insert_dataset_sources(self, values):
+        self.n_statements += 1
+        for ee in values:
+            self.insert_dataset_source(*ee)
+
+    def insert_dataset_locations(self, values):
+        self.n_statements += 1
+        self.locations.extend(values)
+
+    def archive_dataset(self, dataset_id):
+        self.changes.append(('archive', dataset_id))
+
+    def restore_dataset(self, dataset_id):
+        self.changes.append(('restore', dataset_id))
+
+    def delete_dataset(self, dataset_id):
+        self.changes.append(('delete', dataset_id))
+
+    def all_dataset_ids(self, archived, page_size=None, after=None):
+        self.n_statements += 1
+        ids = sorted(id_ for id_, ds in self.dataset.items()
+                     if (ds.archived is not None) == archived and (after is None or id_ > after))
+        return [(id_,) for id_ in ids[:page_size]]
+
+    def get_dataset_product_ids(self, dataset_ids):
+        return sorted({self.dataset[id_].dataset_type_ref for id_ in dataset_ids})
+
+    def update_product_summary(self, product_id, dataset_fields, dataset_ids, archived=False, removed=False):
+        self.changes.append(('summary', product_id, set(dataset_ids), archived, removed))
+
+    def get_product_summary(self, product_id):
+        return self.summaries.get(product_id)
+
+    def calculate_product_summary(self, product_id, dataset_fields):
+        self.changes.append(('calculate', product_id))
+        count = sum(1 for ds in self.dataset.values() if ds.dataset_type_ref == product_id)
+        return SummaryRecord(count, None, None, None, None, None, None, False)
+
+    def rebuild_product_summary(self, product_id, dataset_fields):
+        self.changes.append(('rebuild', product_id))
+        self.summaries[product_id] = self.calculate_product_summary(product_id, dataset_fields)
+
+    def get_derived_graph(self, dataset_id, max_depth=None):
+        self.n_statements += 1
+        rows = []
+        generation, depth = [dataset_id], 1
+        while generation and (max_depth is None or depth <= max_depth):
+            next_generation = []
+            for _, derived_id, source_id in sorted(self.dataset_source):
+                if source_id in generation:
+                    rows.append(MockRow(self.dataset[derived_id]._asdict(),
+                                        source_dataset_ref=source_id, depth=depth))
+                    next_generation.append(derived_id)
+            generation, depth = next_generation, depth + 1
+        return rows
+
+
+class MockRow(dict):
+    __getattr__ = dict.__getitem__
+
 
 class MockTypesResource(object):
     def __init__(self, type_):
@@ -261,3 +345,249 @@ def test_index_two_levels_already_ingested():
     dataset = datasets.add(_EXAMPLE_NBAR_DATASET)
     assert len(mock_db.dataset) == 3
     assert len(mock_db.dataset_source) == 2
+
+
+def test_index_many_datasets():
+    mock_db = MockDb()
+    mock_types = MockTypesResource(_EXAMPLE_DATASET_TYPE)
+    datasets = DatasetResource(mock_db, mock_types)
+
+    ortho = _EXAMPLE_NBAR_DATASET.sources['ortho']
+    nbar = _build_dataset(_EXAMPLE_NBAR)
+    nbar.uris = ['file:///a/nbar.yaml', 's3://b/nbar.yaml']
+
+    # Source already indexed, nbar is in the batch twice
+    datasets.add(ortho.sources['satellite_telemetry_data'])
+    status = datasets.add_many(iter([nbar, ortho, nbar]), batch_size=5)
+    assert status.completed == 2
+    assert status.skipped == 1
+    assert status.seconds >= 0
+
+    assert {d.id for d in mock_db.dataset.values()} == {_nbar_uuid, _ortho_uuid, _telemetry_uuid}
+    assert mock_db.dataset_source == {
+        ('ortho', _nbar_uuid, _ortho_uuid),
+        ('satellite_telemetry_data', _ortho_uuid, _telemetry_uuid)
+    }
+    # Only top level locations, reversed so that the first uri is the most recent one
+    assert mock_db.locations == [(_nbar_uuid, 's3://b/nbar.yaml'), (_nbar_uuid, 'file:///a/nbar.yaml'),
+                                 (_ortho_uuid, 'file://test.zzz')]
+    assert mock_db.n_statements == 3
+
+    # Everything is present already, one batch per dataset
+    status = datasets.add_many([nbar, ortho], batch_size=1)
+    assert status.completed == 0
+    assert status.skipped == 2
+    assert len(mock_db.dataset) == 3
+    assert len(mock_db.dataset_source) == 2
+    assert len(mock_db.locations) == 3
+    assert mock_db.n_statements == 9
+
+    assert datasets.add_many([]).completed == 0
+
+    with pytest.raises(ValueError):
+        datasets.add_many([nbar], batch_size=0)
+
+
+def test_get_all_dataset_ids():
+    mock_db = MockDb()
+    datasets = DatasetResource(mock_db, MockTypesResource(_EXAMPLE_DATASET_TYPE))
+    datasets.add(_EXAMPLE_NBAR_DATASET)
+    mock_db.n_statements = 0
+
+    # Read a page at a time, without a connection held open in between
+    ids = []
+    for id_ in datasets.get_all_dataset_ids(archived=False):
+        assert mock_db.n_open == 0
+        ids.append(id_)
+    assert ids == sorted([_nbar_uuid, _ortho_uuid, _telemetry_uuid])
+    assert mock_db.n_statements == 2
+
+    assert list(datasets.get_all_dataset_ids(archived=True)) == []
+
+
+def test_get_derived_graph():
+    mock_db = MockDb()
+    mock_types = MockTypesResource(_EXAMPLE_DATASET_TYPE)
+    datasets = DatasetResource(mock_db, mock_types)
+    datasets.add(_EXAMPLE_NBAR_DATASET)
+    mock_db.n_statements = 0
+
+    graph = datasets.get_derived_graph(str(_telemetry_uuid))
+    assert {source_id: [d.id for d in derived] for source_id, derived in graph.items()} == {
+        _telemetry_uuid: [_ortho_uuid],
+        _ortho_uuid: [_nbar_uuid],
+    }
+    assert mock_db.n_statements == 1
+
+    graph = datasets.get_derived_graph(_telemetry_uuid, max_depth=1)
+    assert {source_id: [d.id for d in derived] for source_id, derived in graph.items()} == {
+        _telemetry_uuid: [_ortho_uuid],
+    }
+    assert datasets.get_derived_graph(_nbar_uuid) == {}
+
+
+def test_product_summary_updates():
+    mock_db = MockDb()
+    mock_types = MockTypesResource(_EXAMPLE_DATASET_TYPE)
+    datasets = DatasetResource(mock_db, mock_types)
+    datasets.add(_EXAMPLE_NBAR_DATASET)
+    datasets.add(_EXAMPLE_NBAR_DATASET)
+    datasets.archive([_nbar_uuid])
+    datasets.restore([_nbar_uuid])
+    datasets.purge([_nbar_uuid])
+
+    # Datasets are added to the summary once they are in the index, and removed while they still are.
+    product_id = _EXAMPLE_DATASET_TYPE.id
+    assert mock_db.changes == [
+        ('summary', product_id, {_nbar_uuid, _ortho_uuid, _telemetry_uuid}, False, False),
+        ('summary', product_id, {_nbar_uuid}, False, True),
+        ('archive', _nbar_uuid),
+        ('summary', product_id, {_nbar_uuid}, True, False),
+        ('restore', _nbar_uuid),
+        ('summary', product_id, {_nbar_uuid}, False, True),
+        ('delete', _nbar_uuid),
+    ]
+
+
+def test_get_product_summary():
+    mock_db = MockDb()
+    datasets = DatasetResource(mock_db, MockTypesResource(_EXAMPLE_DATASET_TYPE))
+    datasets.add(_EXAMPLE_NBAR_DATASET)
+    product_id = _EXAMPLE_DATASET_TYPE.id
+    mock_db.changes.clear()
+
+    # Missing summary is calculated once and stored
+    assert datasets.get_product_summary('eo').dataset_count == 3
+    assert datasets.get_product_summary('eo').dataset_count == 3
+    assert mock_db.changes == [('rebuild', product_id), ('calculate', product_id)]
+
+    # and so are stale bounds
+    mock_db.changes.clear()
+    mock_db.summaries[product_id] = mock_db.summaries[product_id]._replace(dataset_count=2, bounds_stale=True)
+    assert datasets.get_product_summary('eo').dataset_count == 3
+    assert datasets.get_product_summary('eo').dataset_count == 3
+    assert not mock_db.summaries[product_id].bounds_stale
+    assert mock_db.changes == [('rebuild', product_id), ('calculate', product_id)]
+
+    # Without summary tables it's calculated every time
+    mock_db.changes.clear()
+    mock_db.summaries.clear()
+    mock_db.has_product_summaries = False
+    assert datasets.get_product_summary('eo').dataset_count == 3
+    assert datasets.get_product_summary('eo').dataset_count == 3
+    assert mock_db.changes == [('calculate', product_id)] * 2
+
+
+def test_search_parallel():
+    from datacube.index.abstract import ProductSummary
+    from datacube.model import Range
+    from datacube.testutils import mk_sample_dataset
+    from datacube.utils.dates import tz_aware
+    from dateutil import tz
+
+    def dataset(day, id_):
+        return mk_sample_dataset([dict(name='a')], timestamp='2020-01-{:02d}'.format(day),
+                                 id='3a1df9e0-8484-44fc-8102-79184eab85{:02d}'.format(id_))
+
+    # The 16th is the boundary between two time ranges, so it's found in both
+    all_datasets = [dataset(1, 1), dataset(16, 2), dataset(30, 3)]
+    searches = []
+
+    def search(limit=None, **query):
+        searches.append(query.get('time'))
+        time_range = query.get('time', Range(None, None))
+        found = [ds for ds in reversed(all_datasets)
+                 if (time_range.begin is None or tz_aware(ds.time.end) >= tz_aware(time_range.begin))
+                 and (time_range.end is None or tz_aware(ds.time.begin) <= tz_aware(time_range.end))]
+        return found[:limit]
+
+    datasets = DatasetResource(MockDb(), MockTypesResource(_EXAMPLE_DATASET_TYPE))
+    datasets.search = search
+    datasets.get_product_summary = lambda product: ProductSummary(
+        3, Range(datetime.datetime(2020, 1, 1, tzinfo=tz.tzutc()), datetime.datetime(2020, 1, 31, tzinfo=tz.tzutc())),
+        None
+    )
+
+    def found(**query):
+        searches.clear()
+        return [ds.time.begin.day for ds in datasets.search_parallel(shards=2, **query)]
+
+    jan = Range(datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 31))
+    assert found(product='sample', time=jan) == [16, 1, 30]
+    assert [r.begin.day for r in searches] == [1, 16]
+    assert found(product='sample', time=jan, limit=2) == [16, 1]
+
+    # Time bounds of the product fill in an open range
+    assert found(product='sample') == [16, 1, 30]
+    assert found(product='sample', time=Range(datetime.datetime(2020, 1, 15), None)) == [16, 30]
+    assert [(r.begin.day, r.end.day) for r in searches] == [(15, 23), (23, 31)]
+
+    # Nothing to split: an ordinary search
+    assert found(platform='LANDSAT_8') == [30, 16, 1]
+    assert searches == [None]
+
+
+def test_search_parallel_streams():
+    import time
+    from datacube.index.abstract import ProductSummary
+    from datacube.model import Range
+    from datacube.testutils import mk_sample_dataset
+    from dateutil import tz
+
+    # 20 datasets a day, days 1 to 10, each found by one of two time ranges
+    all_datasets = [mk_sample_dataset([dict(name='a')], timestamp='2020-01-{:02d}T12:00'.format(day))
+                    for day in range(1, 11) for _ in range(20)]
+    produced = []
+    closed = []
+
+    def search(limit=None, **query):
+        time_range = query['time']
+        try:
+            for ds in all_datasets:
+                if time_range.begin <= ds.time.begin.replace(tzinfo=tz.tzutc()) < time_range.end:
+                    if ds.time.begin.day == 10 and query.get('platform') == 'broken':
+                        raise ValueError("Failed search")
+                    produced.append(ds)
+                    yield ds
+        finally:
+            closed.append(time_range)
+
+    datasets = DatasetResource(MockDb(), MockTypesResource(_EXAMPLE_DATASET_TYPE))
+    datasets.search = search
+    datasets.get_product_summary = lambda product: ProductSummary(
+        len(all_datasets),
+        Range(datetime.datetime(2020, 1, 1, tzinfo=tz.tzutc()), datetime.datetime(2020, 1, 11, tzinfo=tz.tzutc())),
+        None
+    )
+
+    def wait_for(condition):
+        for _ in range(100):
+            if condition():
+                return True
+            time.sleep(0.05)
+        return False
+
+    # Each time range only reads a few datasets ahead
+    it = datasets.search_parallel(shards=2, read_ahead=3, product='sample')
+    assert next(it) is all_datasets[0]
+    time.sleep(0.3)
+    assert len(produced) <= 2 * 5
+    it.close()
+    assert wait_for(lambda: len(closed) == 2)
+
+    # All results, in order
+    produced.clear()
+    closed.clear()
+    assert list(datasets.search_parallel(shards=2, read_ahead=3, product='sample')) == all_datasets
+    assert len(closed) == 2
+
+    # Searches stop once the limit is reached
+    produced.clear()
+    closed.clear()
+    assert list(datasets.search_parallel(shards=2, read_ahead=3, limit=5, product='sample')) == all_datasets[:5]
+    assert wait_for(lambda: len(closed) == 2)
+    assert len(produced) <= 5 + 2 * 5
+
+    # A failed search fails the whole search
+    with pytest.raises(ValueError):
+        list(datasets.search_parallel(shards=2, read_ahead=3, product='sample', platform='broken'))
@@ -0,0 +1,195 @@
+# This file is part of the Open Data Cube, see https://opendatacube.org for more information
+#
+# Copyright (c) 2015-2020 ODC Contributors
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+from collections import namedtuple
+from contextlib import asynccontextmanager, contextmanager
+from uuid import UUID
+
+import pytest
+
+from datacube.drivers._async import AsyncDbAPI
+from datacube.drivers.postgres._api import get_dataset_fields
+from datacube.index import AsyncIndex
+from datacube.index.abstract import default_metadata_type_docs
+from datacube.index.postgres.index import Index
+
+DatasetRecord = namedtuple('DatasetRecord', ['id', 'metadata', 'dataset_type_ref', 'uris',
+                                             'added', 'added_by', 'archived'])
+
+
+class SourceRecord(dict):
+    """
+    Result row of ``get_dataset_sources``, columns can be accessed by name or as attributes
+    """
+
+    def __init__(self, record, **columns):
+        super().__init__(record, **columns)
+        self.__dict__ = self
+
+
+_ls8_id = UUID('f2f12372-8366-11e5-817e-1040f381a756')
+_wofs_id = UUID('5cf41d98-eda9-11e4-8a8e-1040f381a756')
+
+
+class MockConnection:
+    """
+    Synchronous db api
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def get_catalogue_version(self):
+        self.db.n_checks += 1
+        return self.db.version
+
+    def get_all_metadata_types(self):
+        return list(self.db.metadata_types.values())
+
+    def get_all_products(self):
+        return list(self.db.products.values())
+
+    def get_metadata_type(self, id_):
+        return self.db.metadata_types[id_]
+
+    def get_dataset(self, id_):
+        return self.db.datasets.get(id_)
+
+    def get_datasets(self, ids):
+        return [self.db.datasets[id_] for id_ in ids if id_ in self.db.datasets]
+
+    def get_dataset_sources(self, id_, max_depth=None):
+        # wofs dataset derived from the ls8 one
+        records = [(_wofs_id, 0, [_ls8_id], ['ls8']), (_ls8_id, 1, [None], [None])]
+        return [SourceRecord(self.db.datasets[ds_id]._asdict(), depth=depth, sources=sources, classes=classes)
+                for ds_id, depth, sources, classes in records if id_ == _wofs_id or ds_id == id_]
+
+    def _find(self, expressions):
+        product_id, = (expr.value for expr in expressions if expr.field.name == 'dataset_type_id')
+        return [ds for ds in self.db.datasets.values() if ds.dataset_type_ref == product_id]
+
+    def search_datasets(self, expressions, source_exprs=None, select_fields=None, limit=None):
+        found = self._find(expressions)[:limit]
+        if select_fields:
+            return [tuple(getattr(ds, f.name) for f in select_fields) for ds in found]
+        return found
+
+    def count_datasets(self, expressions):
+        return len(self._find(expressions))
+
+
+class MockAsyncConnection:
+    """
+    Stand-in for an :class:`sqlalchemy.ext.asyncio.AsyncConnection`
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    async def run_sync(self, fn):
+        self.db.n_async += 1
+        await asyncio.sleep(0)
+        return fn(self.db)
+
+
+class MockDb:
+    catalogue_ttl = 60.0
+
+    def __init__(self):
+        self.metadata_types = {id_: {'id': id_, 'definition': doc}
+                               for id_, doc in enumerate(default_metadata_type_docs(), 1)}
+        eo = [id_ for id_, mdt in self.metadata_types.items() if mdt['definition']['name'] == 'eo'][0]
+        self.products = {id_: {'id': id_, 'metadata_type_ref': eo,
+                               'definition': {'name': name, 'metadata_type': 'eo',
+                                              'metadata': {'product_type': name}, 'measurements': []}}
+                         for id_, name in enumerate(['ls8', 'wofs'], 1)}
+        self.datasets = {id_: DatasetRecord(id_, {'id': str(id_), 'product_type': name,
+                                                  'lineage': {'source_datasets': {}}}, product_id,
+                                            ['file:///{}.yaml'.format(name)], None, None, None)
+                         for id_, name, product_id in [(_ls8_id, 'ls8', 1), (_wofs_id, 'wofs', 2)]}
+        self.version = 0
+        self.n_checks = 0
+        self.n_async = 0
+
+    @contextmanager
+    def connect(self):
+        raise AssertionError('Synchronous database access')
+
+    @asynccontextmanager
+    async def connect_async(self):
+        yield AsyncDbAPI(MockAsyncConnection(self), MockConnection)
+
+    async def close_async(self):
+        pass
+
+    @staticmethod
+    def get_dataset_fields(definition):
+        return get_dataset_fields(definition)
+
+
+def test_async_index():
+    db = MockDb()
+    index = AsyncIndex(Index(db))
+
+    async def run():
+        ls8, wofs = await asyncio.gather(index.datasets.get(_ls8_id), index.datasets.get(str(_wofs_id)))
+        assert (ls8.id, ls8.type.name) == (_ls8_id, 'ls8')
+        assert (wofs.id, wofs.type.name) == (_wofs_id, 'wofs')
+        assert await index.datasets.get(UUID(int=0)) is None
+        assert [ds.id for ds in await index.datasets.bulk_get([_wofs_id, _ls8_id])] == [_wofs_id, _ls8_id]
+
+        assert [ds.id async for ds in index.datasets.search(product='ls8')] == [_ls8_id]
+        results = [r async for r in index.datasets.search_returning(('id',), product='wofs')]
+        assert [r.id for r in results] == [_wofs_id]
+        assert await index.datasets.count(product='wofs') == 1
+
+        assert (await index.products.get_by_name('wofs')).name == 'wofs'
+        assert await index.products.get_by_name('s2') is None
+        with pytest.raises(KeyError):
+            await index.products.get_by_name_unsafe('s2')
+
+        await index.close()
+
+    asyncio.run(run())
+    # Catalogue is checked on first use (by both concurrent lookups), and for each missing product lookup
+    assert db.n_checks == 4
+
+
+def test_async_index_expired_catalogue():
+    db = MockDb()
+    # Catalogue is checked on every dataset lookup, without blocking
+    db.catalogue_ttl = 0.0
+    index = AsyncIndex(Index(db))
+
+    async def run():
+        assert (await index.datasets.get(_ls8_id)).type.name == 'ls8'
+        assert [ds.type.name for ds in await index.datasets.bulk_get([_wofs_id, _ls8_id])] == ['wofs', 'ls8']
+
+        wofs = await index.datasets.get(_wofs_id, include_sources=True)
+        assert wofs.type.name == 'wofs'
+        assert wofs.sources['ls8'].type.name == 'ls8'
+
+    asyncio.run(run())
+    assert db.n_checks == 3
+
+
+def test_async_index_unsupported():
+    from datacube.index.null.index import Index as NullIndex
+    assert not NullIndex.supports_async
+    with pytest.raises(NotImplementedError):
+        AsyncIndex(NullIndex())
+
+
+def test_asyncpg_ranges():
+    asyncpg = pytest.importorskip('asyncpg')
+    from psycopg2.extras import NumericRange
+    from datacube.drivers._async import _to_asyncpg_value, from_asyncpg_value
+
+    value = NumericRange(1, 2, bounds='[]')
+    converted = _to_asyncpg_value(value)
+    assert isinstance(converted, asyncpg.Range)
+    assert (converted.lower, converted.upper, converted.upper_inc) == (1, 2, True)
+    assert from_asyncpg_value(converted) == value
+    assert from_asyncpg_value('ls8') == 'ls8'
@@ -0,0 +1,161 @@
+# This file is part of the Open Data Cube, see https://opendatacube.org for more information
+#
+# Copyright (c) 2015-2020 ODC Contributors
+# SPDX-License-Identifier: Apache-2.0
+import pickle
+from contextlib import contextmanager
+
+import pytest
+
+from datacube.drivers.postgres._api import get_dataset_fields
+from datacube.index._catalogue import CatalogueCache
+from datacube.index.abstract import default_metadata_type_docs
+from datacube.index.postgres._metadata_types import MetadataTypeResource
+from datacube.index.postgres._products import ProductResource
+
+
+class MockClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class MockConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def get_catalogue_version(self):
+        self.db.n_checks += 1
+        return self.db.version
+
+    def get_all_metadata_types(self):
+        self.db.n_loads += 1
+        return list(self.db.metadata_types.values())
+
+    def get_all_products(self):
+        return list(self.db.products.values())
+
+    def get_metadata_type(self, id_):
+        return self.db.metadata_types[id_]
+
+
+class MockDb:
+    catalogue_ttl = 60.0
+
+    def __init__(self):
+        self.metadata_types = {id_: {'id': id_, 'definition': doc}
+                               for id_, doc in enumerate(default_metadata_type_docs(), 1)}
+        self.products = {}
+        self.version = 0
+        self.n_checks = 0
+        self.n_loads = 0
+
+    def add_product(self, name, metadata_type_ref=1):
+        id_ = len(self.products) + 1
+        self.products[id_] = {
+            'id': id_,
+            'metadata_type_ref': metadata_type_ref,
+            'definition': {'name': name,
+                           'metadata_type': self.metadata_types[metadata_type_ref]['definition']['name'],
+                           'metadata': {'product': {'name': name}},
+                           'measurements': []},
+        }
+        self.version += 1
+
+    @contextmanager
+    def connect(self):
+        yield MockConnection(self)
+
+    @staticmethod
+    def get_dataset_fields(definition):
+        return get_dataset_fields(definition)
+
+
+@pytest.fixture
+def mock_db():
+    db = MockDb()
+    db.add_product('ls8')
+    db.add_product('wofs', metadata_type_ref=2)
+    return db
+
+
+def _resources(db, clock=None):
+    metadata_types = MetadataTypeResource(db)
+    if clock is not None:
+        metadata_types.catalogue = CatalogueCache(db, db.catalogue_ttl, clock=clock)
+    return metadata_types, ProductResource(db, metadata_types)
+
+
+def test_catalogue_loads_once(mock_db):
+    metadata_types, products = _resources(mock_db)
+    assert products.catalogue is metadata_types.catalogue
+
+    assert [p.name for p in products.get_all()] == ['ls8', 'wofs']
+    ls8 = products.get_by_name('ls8')
+    assert products.get(ls8.id) is ls8
+    assert ls8.metadata_type is metadata_types.get(1)
+    assert metadata_types.get_by_name(ls8.metadata_type.name) is ls8.metadata_type
+    assert [p.name for p in products.get_with_fields(['time'])] == ['ls8', 'wofs']
+    assert [p.name for p, _ in products.search_robust(product='wofs')] == ['wofs']
+
+    assert mock_db.n_loads == 1
+    assert mock_db.n_checks == 1
+
+
+def test_catalogue_ttl(mock_db):
+    clock = MockClock()
+    metadata_types, products = _resources(mock_db, clock)
+
+    ls8 = products.get_by_name('ls8')
+    clock.now += mock_db.catalogue_ttl / 2
+    assert products.get_by_name('ls8') is ls8
+    assert mock_db.n_checks == 1
+
+    # Nothing changed: checked, but not reloaded
+    clock.now += mock_db.catalogue_ttl
+    assert products.get_by_name('ls8') is ls8
+    assert (mock_db.n_checks, mock_db.n_loads) == (2, 1)
+
+    # Changed by someone else, only noticed after ttl expires
+    mock_db.version += 1
+    assert products.get_by_name('ls8') is ls8
+    clock.now += mock_db.catalogue_ttl
+    assert products.get_by_name('ls8') is not ls8
+    assert (mock_db.n_checks, mock_db.n_loads) == (3, 2)
+
+
+def test_catalogue_missing_forces_check(mock_db):
+    clock = MockClock()
+    metadata_types, products = _resources(mock_db, clock)
+
+    assert products.get_by_name('s2') is None
+    assert mock_db.n_loads == 1
+
+    mock_db.add_product('s2')
+    assert products.get_by_name('s2').name == 's2'
+    assert mock_db.n_loads == 2
+    assert products.get(3).name == 's2'
+    assert mock_db.n_loads == 2
+
+    with pytest.raises(KeyError):
+        metadata_types.get_unsafe(100)
+
+
+def test_catalogue_invalidate(mock_db):
+    metadata_types, products = _resources(mock_db)
+
+    ls8 = products.get_by_name('ls8')
+    products.catalogue.invalidate()
+    assert products.get_by_name('ls8') is not ls8
+    assert mock_db.n_loads == 2
+
+
+def test_catalogue_pickle(mock_db):
+    metadata_types, products = _resources(mock_db)
+    products.get_all()
+
+    metadata_types, products = pickle.loads(pickle.dumps((metadata_types, products)))
+    assert products.catalogue is metadata_types.catalogue
+    assert products.get_by_name('wofs').metadata_type.name == 'eo'
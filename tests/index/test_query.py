@@ -6,6 +6,7 @@
 Module
 """
 
+import pytest
 from psycopg2.extras import NumericRange
 
 from datacube.drivers.postgres._fields import SimpleDocField, RangeBetweenExpression, EqualsExpression, \
@@ -28,3 +29,143 @@ def test_build_query_expressions():
     assert [RangeBetweenExpression(
         _lat_field, 4, 23.0, _range_class=NumericRange
     )] == to_expressions(_fields.get, lat=Range(4, 23))
+
+
+def test_postgis_extent_intersects():
+    from sqlalchemy.dialects import postgresql
+    from datacube.drivers.postgis._api import PostgisDbAPI, extent_intersects
+    from datacube.utils.geometry import box
+
+    polygon = box(1500000, -4000000, 1600000, -3900000, 'EPSG:3577')
+    query = PostgisDbAPI.search_datasets_query([extent_intersects(polygon)])
+    compiled = query.compile(dialect=postgresql.dialect())
+
+    assert 'ST_Intersects(odc.dataset.extent, ST_GeomFromText(' in str(compiled)
+    # Extent column is only searched, never selected
+    assert 'odc.dataset.extent,' not in str(compiled).split('FROM')[0]
+
+    # Polygon is sent in lon/lat
+    bind = compiled.binds['param_1']
+    assert bind.value is polygon
+    wkt = bind.type.bind_processor(postgresql.dialect())(polygon)
+    assert wkt == polygon.to_crs('EPSG:4326', wrapdateline=True).wkt
+
+
+@pytest.mark.parametrize('driver', ['postgres', 'postgis'])
+def test_search_query_is_cacheable(driver):
+    import datetime
+    import pickle
+    from importlib import import_module
+    from datacube.index.abstract import default_metadata_type_docs
+
+    api = import_module('datacube.drivers.{}._api'.format(driver))
+    db_api = api.PostgisDbAPI if driver == 'postgis' else api.PostgresDbAPI
+    eo3 = [doc for doc in default_metadata_type_docs() if doc['name'] == 'eo3'][0]
+    fields = api.get_dataset_fields(eo3)
+
+    def query(day, lat, select_fields=None):
+        expressions = to_expressions(fields.get, product='ls8', platform='landsat-8',
+                                     time=Range(datetime.datetime(2020, 1, day), datetime.datetime(2020, 2, 1)),
+                                     lat=Range(lat, lat + 1))
+        return db_api.search_datasets_query(expressions, select_fields=select_fields, limit=10)
+
+    # Same query shape with different values: same compiled query
+    key = query(1, -30)._generate_cache_key()
+    assert key is not None
+    assert query(2, -20)._generate_cache_key() == key
+    assert query(2, -20, select_fields=[fields['id']])._generate_cache_key() != key
+
+    # Field expressions are built once, but not pickled
+    assert fields['lat'].alchemy_expression is fields['lat'].alchemy_expression
+    assert 'alchemy_expression' not in pickle.loads(pickle.dumps(fields['lat'])).__dict__
+
+
+@pytest.mark.parametrize('driver', ['postgres', 'postgis'])
+def test_count_through_time_from_summary(driver):
+    import datetime
+    from importlib import import_module
+    from sqlalchemy.dialects import postgresql
+    from datacube.index.abstract import default_metadata_type_docs
+
+    api = import_module('datacube.drivers.{}._api'.format(driver))
+    db_api = api.PostgisDbAPI if driver == 'postgis' else api.PostgresDbAPI
+    eo3 = [doc for doc in default_metadata_type_docs() if doc['name'] == 'eo3'][0]
+    fields = api.get_dataset_fields(eo3)
+
+    def query_sql(**kwargs):
+        query = db_api(None).count_datasets_through_time_query(
+            datetime.datetime(2020, 1, 1), datetime.datetime(2020, 2, 1), '1 day',
+            fields['time'], to_expressions(fields.get, product='ls8'), **kwargs
+        )
+        return str(query.compile(dialect=postgresql.dialect()))
+
+    assert 'product_summary' not in query_sql()
+    # Whole days are counted from the summary, anything else from the datasets
+    sql = query_sql(summary_product_id=1)
+    assert 'product_summary_day' in sql
+    assert 'count(' in sql
+
+
+@pytest.mark.parametrize('driver', ['postgres', 'postgis'])
+def test_search_page_query(driver):
+    import datetime
+    import uuid
+    from importlib import import_module
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy import Index
+    from sqlalchemy.schema import CreateIndex
+    from datacube.index.abstract import default_metadata_type_docs
+
+    api = import_module('datacube.drivers.{}._api'.format(driver))
+    dynamic = import_module('datacube.drivers.{}._dynamic'.format(driver))
+    db_api = api.PostgisDbAPI if driver == 'postgis' else api.PostgresDbAPI
+    eo3 = [doc for doc in default_metadata_type_docs() if doc['name'] == 'eo3'][0]
+    fields = api.get_dataset_fields(eo3)
+    expressions = to_expressions(fields.get, product='ls8', platform='landsat-8')
+
+    def query(after=None, time_field=None):
+        return db_api.search_datasets_page_query(expressions, 10, after=after, time_field=time_field)
+
+    def sql(q):
+        return str(q.compile(dialect=postgresql.dialect()))
+
+    assert sql(query()).rsplit('ORDER BY ', 1)[1].split()[0].endswith('.dataset.id')
+    assert '.dataset.id > ' in sql(query(after=uuid.uuid4()))
+
+    # Sorted and compared by the same (time, id) expression as the index, with missing times last
+    time_key = sql(dynamic.keyset_time_expression(fields['time']))
+    assert "'infinity'::timestamptz" in time_key
+    page_sql = sql(query(after=(datetime.datetime(2020, 1, 1), uuid.uuid4()), time_field=fields['time']))
+    assert 'keyset_time' in page_sql
+    assert page_sql.rsplit('ORDER BY ', 1)[1].startswith(time_key + ', ')
+    assert ") > (%(" in page_sql
+    assert "> ('infinity'::timestamptz, " in sql(query(after=(None, uuid.uuid4()), time_field=fields['time']))
+
+    # Every page is the same compiled query
+    key = query(after=(datetime.datetime(2020, 1, 1), uuid.uuid4()), time_field=fields['time'])._generate_cache_key()
+    assert query(after=(datetime.datetime(2021, 1, 1), uuid.uuid4()),
+                 time_field=fields['time'])._generate_cache_key() == key
+
+    index = Index('dix_ls8_time_keyset', dynamic.keyset_time_expression(fields['time']), dynamic.DATASET.c.id)
+    assert sql(CreateIndex(index)).endswith("'infinity'::timestamptz), id)")
+
+
+def test_search_page_continuation():
+    import datetime
+    import uuid
+    from dateutil import tz
+    from datacube.index.abstract import make_continuation, parse_continuation
+
+    id_ = uuid.uuid4()
+    token = make_continuation('id', 3, id_)
+    assert parse_continuation(token, 'id') == (3, id_)
+    with pytest.raises(ValueError):
+        parse_continuation(token, 'time')
+
+    time_ = datetime.datetime(2020, 1, 1, 10, 30, tzinfo=tz.tzutc())
+    assert parse_continuation(make_continuation('time', 3, (time_, id_)), 'time') == (3, (time_, id_))
+    assert parse_continuation(make_continuation('time', 3, (None, id_)), 'time') == (3, (None, id_))
+
+    for bad in ('', 'junk', make_continuation('id', 3, id_)[:-4]):
+        with pytest.raises(ValueError):
+            parse_continuation(bad, 'id')
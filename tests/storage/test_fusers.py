@@ -0,0 +1,122 @@
+# This file is part of the Open Data Cube, see https://opendatacube.org for more information
+#
+# Copyright (c) 2015-2020 ODC Contributors
+# SPDX-License-Identifier: Apache-2.0
+""" Test built-in fusers
+"""
+import numpy as np
+import pytest
+
+from datacube.storage import Fuser, available_fusers, register_fuser
+from datacube.storage._fusers import (
+    FUSERS,
+    CopyFuser,
+    MeanFuser,
+    check_fuser,
+    resolve_fuser,
+)
+
+
+def _fuse_all(name, nodata, *srcs):
+    fuser = resolve_fuser(name, nodata)
+    dst = np.full_like(srcs[0], -1 if nodata is None else nodata)
+    for src in srcs:
+        fuser(dst, np.asarray(src, dtype=dst.dtype))
+    return dst
+
+
+def test_registry():
+    assert {'copy', 'first', 'last', 'max', 'min', 'mean', 'or'} <= set(available_fusers())
+    assert resolve_fuser(None, 0) is None
+
+    def fn(dst, src):
+        pass
+
+    assert resolve_fuser(fn, 0) is fn
+    assert isinstance(resolve_fuser('copy', 0), CopyFuser)
+    # new instance every time
+    assert resolve_fuser('mean', 0) is not resolve_fuser('mean', 0)
+
+    check_fuser(None)
+    check_fuser(fn)
+    check_fuser('max')
+    with pytest.raises(ValueError):
+        check_fuser('no-such-fuser')
+    with pytest.raises(ValueError):
+        resolve_fuser('no-such-fuser', 0)
+
+    class SumFuser(Fuser):
+        def __call__(self, dst, src):
+            dst += src
+
+    register_fuser('test-sum', SumFuser)
+    try:
+        assert 'test-sum' in available_fusers()
+        np.testing.assert_array_equal(_fuse_all('test-sum', 0, np.array([1, 2]), [3, 4]), [4, 6])
+    finally:
+        FUSERS.pop('test-sum')
+
+
+@pytest.mark.parametrize("nodata", [-1, None])
+def test_int_fusers(nodata):
+    a = np.array([[1, -1], [5, -1]], dtype='int16')
+    b = np.array([[3, 2], [-1, -1]], dtype='int16')
+
+    if nodata is None:
+        np.testing.assert_array_equal(_fuse_all('max', nodata, a, b), [[3, 2], [5, -1]])
+        np.testing.assert_array_equal(_fuse_all('last', nodata, a, b), b)
+        return
+
+    np.testing.assert_array_equal(_fuse_all('copy', nodata, a, b), [[1, 2], [5, -1]])
+    np.testing.assert_array_equal(_fuse_all('last', nodata, a, b), [[3, 2], [5, -1]])
+    np.testing.assert_array_equal(_fuse_all('max', nodata, a, b), [[3, 2], [5, -1]])
+    np.testing.assert_array_equal(_fuse_all('min', nodata, a, b), [[1, 2], [5, -1]])
+    np.testing.assert_array_equal(_fuse_all('mean', nodata, a, b), [[2, 2], [5, -1]])
+    np.testing.assert_array_equal(_fuse_all('mean', nodata, a, b, a), [[2, 2], [5, -1]])
+
+
+def test_float_fusers():
+    nan = np.nan
+    a = np.array([1.0, nan, 5.0, nan])
+    b = np.array([3.0, 2.0, nan, nan])
+    c = np.array([8.0, 1.0, nan, nan])
+
+    np.testing.assert_array_equal(_fuse_all('copy', nan, a, b), [1, 2, 5, nan])
+    np.testing.assert_array_equal(_fuse_all('last', nan, a, b), [3, 2, 5, nan])
+    np.testing.assert_array_equal(_fuse_all('max', nan, a, b, c), [8, 2, 5, nan])
+    np.testing.assert_array_equal(_fuse_all('min', nan, a, b, c), [1, 1, 5, nan])
+    np.testing.assert_allclose(_fuse_all('mean', nan, a, b, c), [4, 1.5, 5, nan])
+
+    # float data with explicit nodata value
+    a[1] = -999
+    np.testing.assert_array_equal(_fuse_all('max', -999, a, b), [3, 2, 5, nan])
+
+
+def test_or_fuser():
+    nodata = 1
+    a = np.array([0b0100, 1, 0b0010, 1], dtype='uint8')
+    b = np.array([0b1000, 0b1000, 1, 1], dtype='uint8')
+    np.testing.assert_array_equal(_fuse_all('or', nodata, a, b), [0b1100, 0b1000, 0b0010, 1])
+    dst = a.copy()
+    resolve_fuser('or', None)(dst, b)
+    np.testing.assert_array_equal(dst, a | b)
+
+
+def test_mean_fuser_roi():
+    out = np.full((4, 4), -1, dtype='int16')
+    out[:2, :2] = 10  # already contains first observation
+
+    fuser = MeanFuser(-1)
+    fuser.fuse(out, np.s_[1:3, 1:3], np.full((2, 2), 20, dtype='int16'))
+    fuser.fuse(out, np.s_[2:4, 2:4], np.full((2, 2), 30, dtype='int16'))
+
+    expect = np.full((4, 4), -1, dtype='int16')
+    expect[:2, :2] = 10
+    expect[1:3, 1:3] = 20
+    expect[1, 1] = 15
+    expect[2:4, 2:4] = 30
+    expect[2, 2] = 25
+    np.testing.assert_array_equal(out, expect)
+
+    with pytest.raises(ValueError):
+        fuser.fuse(np.zeros((2, 2), dtype='int16'), np.s_[:, :], np.zeros((2, 2), dtype='int16'))
@@ -20,6 +20,7 @@ from datacube.storage import reproject_and_fuse
 from datacube.storage._rio import RasterDatasetDataSource, _url2rasterio
 from datacube.storage._read import read_time_slice
 from datacube.utils.geometry import GeoBox
+from datacube.utils.geometry._warp import _warp_plan_cache
 
 from datacube.testutils.geom import epsg4326, epsg3577
 
@@ -705,3 +706,110 @@ def test_rio_driver_specifics():
 
     with pytest.raises(ValueError):
         _url2rasterio('/some/path/', 'NetCDF', 'aa')
+
+
+class ArrayReader(object):
+    def __init__(self, data, transform, nodata=-999):
+        self.data = data
+        self.crs = epsg3577
+        self.transform = transform
+        self.nodata = nodata
+        self.dtype = data.dtype
+        self.shape = data.shape
+
+    def read(self, window=None, out_shape=None):
+        if window is None:
+            return self.data
+        return self.data[slice(*window[0]), slice(*window[1])]
+
+
+class ArrayDataSource(DataSource):
+    def __init__(self, data, transform, nodata=-999):
+        self._rdr = ArrayReader(data, transform, nodata=nodata)
+
+    @contextmanager
+    def open(self):
+        yield self._rdr
+
+
+def test_reproject_and_fuse_mosaic():
+    import tracemalloc
+
+    nodata = -999
+    N = 100
+    gbox = GeoBox(4*N, 3*N, Affine(10, 0, 0, 0, -10, 0), epsg3577)
+
+    def mk_src(iy, ix, value, shape=(N, N)):
+        return ArrayDataSource(np.full(shape, value, dtype='int16'),
+                               Affine(10, 0, ix*10, 0, -10, -iy*10))
+
+    # 12 non-overlapping tiles
+    sources = [mk_src(iy*N, ix*N, iy*4 + ix) for iy in range(3) for ix in range(4)]
+    expect = np.arange(12, dtype='int16').reshape(3, 4).repeat(N, axis=0).repeat(N, axis=1)
+
+    dst = np.full(gbox.shape, nodata, dtype='int16')
+    tracemalloc.start()
+    reproject_and_fuse(sources, dst, gbox, dst_nodata=nodata, prefill=False)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    np.testing.assert_array_equal(dst, expect)
+    # no full size scratch buffer
+    assert peak < dst.nbytes
+
+    # overlapping sources: first one wins, gaps are filled from later sources
+    hole = mk_src(0, 0, 100, shape=(2*N, 2*N))
+    hole._rdr.data[:N, :N] = nodata
+    sources = [hole, mk_src(N//2, N//2, 200, shape=(2*N, 2*N)), mk_src(0, 0, 300, shape=(3*N, 4*N))]
+
+    expect = np.full(gbox.shape, 300, dtype='int16')
+    expect[:2*N, :2*N] = 100
+    expect[:N, :N] = 300
+    expect[N//2:N, N//2:N] = 200
+    expect[2*N:5*N//2, N//2:5*N//2] = 200
+    expect[N//2:5*N//2, 2*N:5*N//2] = 200
+
+    dst = np.full(gbox.shape, 7, dtype='int16')
+    reproject_and_fuse(sources, dst, gbox, dst_nodata=nodata)
+    np.testing.assert_array_equal(dst, expect)
+
+    # custom fuser sees every source
+    def sum_fuser(dst, src):
+        np.add(dst, src, out=dst, where=src != nodata)
+
+    dst = np.zeros(gbox.shape, dtype='int16')
+    reproject_and_fuse(sources[1:], dst, gbox, dst_nodata=0, fuse_func=sum_fuser, prefill=False)
+    expect = np.full(gbox.shape, 300, dtype='int16')
+    expect[N//2:5*N//2, N//2:5*N//2] += 200
+    np.testing.assert_array_equal(dst, expect)
+
+
+@pytest.mark.parametrize('resampling', ['nearest', 'bilinear', 'average'])
+def test_reproject_and_fuse_overlap_reprojected(resampling):
+    nodata = -999
+    rng = np.random.default_rng(3)
+
+    def mk_src(x0, y0):
+        return ArrayDataSource(rng.integers(0, 1000, size=(300, 300)).astype('int16'),
+                               Affine(25, 0, x0, 0, -25, y0))
+
+    # overlapping Albers tiles loaded in lat/lon: the first goes straight into
+    # the destination, the second through a buffer the size of its region
+    sources = [mk_src(1500000, -3900000), mk_src(1503000, -3902000)]
+    gbox = GeoBox(600, 500, Affine(0.0002, 0, 148.5, 0, -0.0002, -34.82), epsg4326)
+
+    # Full size buffer for every source, as it used to be done
+    expect = np.full(gbox.shape, nodata, dtype='int16')
+    for src in sources:
+        buffer_ = np.full(gbox.shape, nodata, dtype='int16')
+        with src.open() as rdr:
+            roi = read_time_slice(rdr, buffer_, gbox, resampling, nodata)
+        np.copyto(expect[roi], buffer_[roi], where=expect[roi] == nodata)
+
+    # every source is warped with a plan for the whole destination, not for a part of it
+    _warp_plan_cache.clear()
+    dst = np.full(gbox.shape, 7, dtype='int16')
+    reproject_and_fuse(sources, dst, gbox, dst_nodata=nodata, resampling=resampling)
+    assert {dst_gbox for _, dst_gbox, _ in _warp_plan_cache} == {gbox}
+    assert (dst != nodata).sum() > gbox.shape[0] * gbox.shape[1] // 4
+    np.testing.assert_array_equal(dst, expect)
@@ -6,6 +6,7 @@
 """
 
 import numpy as np
+import pytest
 
 from datacube.storage._load import (
     xr_load, _default_fuser
@@ -81,3 +82,59 @@ def test_new_xr_load(data_folder):
 
     np.testing.assert_array_equal(im[0], xx.a.values[0])
     np.testing.assert_array_equal(im[1], xx.b.values[0])
+
+
+def test_new_xr_load_concurrent(data_folder):
+    base = "file://" + str(data_folder) + "/metadata.yml"
+    band_a = dict(name='a', path='test.tif')
+    band_b = dict(name='b', band=2, path='test.tif')
+
+    dss = [mk_sample_dataset([band_a, band_b], base, timestamp=ts)
+           for ts in ('2020-01-01', '2020-01-01', '2020-01-01', '2020-02-01')]
+    sources = Datacube.group_datasets(dss, 'time')
+    assert sources.shape == (2,)
+
+    im, meta = rio_slurp(str(data_folder) + '/test.tif')
+    measurements = [dss[0].type.measurements[n] for n in ('a', 'b')]
+
+    fuse_order = []
+
+    def fuser(dst, src):
+        fuse_order.append(len(fuse_order))
+        _default_fuser(dst, src, measurements[0].nodata)
+
+    measurements[0]['fuser'] = fuser
+
+    rdr = mk_rio_driver()
+    xx, ctx = xr_load(sources, meta.gbox, measurements, rdr, max_in_flight=3)
+    assert len(fuse_order) == 4
+
+    for t in range(2):
+        np.testing.assert_array_equal(im[0], xx.a.values[t])
+        np.testing.assert_array_equal(im[1], xx.b.values[t])
+
+    # context is recycled
+    yy, ctx2 = xr_load(sources, meta.gbox, measurements, rdr, driver_ctx_prev=ctx, max_in_flight=1)
+    assert ctx2 is ctx
+    np.testing.assert_array_equal(xx.a.values, yy.a.values)
+    np.testing.assert_array_equal(xx.b.values, yy.b.values)
+
+
+def test_new_xr_load_broken(data_folder):
+    base = "file://" + str(data_folder) + "/metadata.yml"
+    good = mk_sample_dataset([dict(name='a', path='test.tif')], base)
+    bad = mk_sample_dataset([dict(name='a', path='no-such-file.tif')], base)
+
+    sources = Datacube.group_datasets([good, bad], 'time')
+    im, meta = rio_slurp(str(data_folder) + '/test.tif')
+    measurements = [good.type.measurements['a']]
+
+    rdr = mk_rio_driver()
+    with pytest.raises(IOError):
+        xr_load(sources, meta.gbox, measurements, rdr)
+
+    xx, _ = xr_load(sources, meta.gbox, measurements, rdr, skip_broken_datasets=True)
+    np.testing.assert_array_equal(im[0], xx.a.values[0])
+
+    with pytest.raises(ValueError):
+        xr_load(sources, meta.gbox, measurements, rdr, max_in_flight=0)
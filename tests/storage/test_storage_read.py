@@ -38,6 +38,26 @@ def test_pick_read_scale():
     assert pick_read_scale(2.3) == 2
     assert pick_read_scale(1.99999) == 2
 
+    class FakeRdr:
+        def __init__(self, overviews):
+            self.overviews = overviews
+
+    # nearest neighbour decimated read, GDAL picks overview level
+    assert pick_read_scale(6.3, FakeRdr([2, 4, 8])) == 6
+    # otherwise read from the coarsest overview that is not coarser than destination
+    assert pick_read_scale(6.3, FakeRdr([2, 4, 8]), resampling='average') == 4
+    assert pick_read_scale(7.9999, FakeRdr([2, 4, 8]), resampling='average') == 8
+    assert pick_read_scale(7.9, FakeRdr([2, 4, 8]), tol=0.1, resampling='average') == 8
+    # no overview fine enough, no overviews or unknown overviews: full resolution
+    assert pick_read_scale(1.5, FakeRdr([2, 4, 8]), resampling='average') == 1
+    assert pick_read_scale(6.3, FakeRdr([8, 16]), resampling='average') == 1
+    assert pick_read_scale(6.3, FakeRdr([]), resampling='average') == 1
+    assert pick_read_scale(6.3, FakeRdr(None), resampling='average') == 1
+    assert pick_read_scale(6.3, resampling='average') == 1
+    # forced full resolution reads
+    assert pick_read_scale(6.3, FakeRdr([2, 4, 8]), use_overviews=False) == 1
+    assert pick_read_scale(6.3, use_overviews=False) == 1
+
 
 def test_can_paste():
     src = AlbersGS.tile_geobox((17, -40))
@@ -157,6 +177,51 @@ def test_read_paste(tmpdir):
     np.testing.assert_array_equal(xx[1::2, 1::2], yy)
 
 
+def test_read_overviews(tmpdir):
+    import rasterio
+    from rasterio.enums import Resampling
+    from datacube.testutils import mk_test_image
+    from datacube.testutils.io import write_gtiff
+    from datacube.testutils.iodriver import open_reader
+    from pathlib import Path
+
+    pp = Path(str(tmpdir))
+
+    xx = mk_test_image(128, 64, nodata=None)
+    mm = write_gtiff(pp/'tst-read-overviews-128x64-int16.tif', xx, nodata=-999)
+
+    # fill overview with a constant, so we can tell where pixels came from
+    with rasterio.open(mm.path, 'r+') as f:
+        f.build_overviews([2], Resampling.nearest)
+    with rasterio.open(mm.path, 'r+', OVERVIEW_LEVEL=0) as f:
+        f.write(np.full((32, 64), 7, dtype='int16'), 1)
+
+    gbox = gbx.zoom_out(mm.gbox, 4)
+
+    with RasterFileDataSource(mm.path, 1).open() as rdr:
+        assert rdr.overviews == [2]
+        assert pick_read_scale(4, rdr, resampling='average') == 2
+
+        yy = np.full(gbox.shape, -999, dtype=rdr.dtype)
+        read_time_slice(rdr, yy, gbox, 'average', -999)
+        assert (yy == 7).all()
+
+        yy = np.full(gbox.shape, -999, dtype=rdr.dtype)
+        read_time_slice(rdr, yy, gbox, 'average', -999, use_overviews=False)
+        assert not (yy == 7).any()
+
+        yy = np.full(gbox.shape, -999, dtype=rdr.dtype)
+        read_time_slice(rdr, yy, gbox, 'nearest', -999, use_overviews=False)
+        assert np.isin(yy, xx).all()
+
+    rdr = open_reader(mm.path)
+    assert rdr.overviews == [2]
+    yy, _ = read_time_slice_v2(rdr, gbox, 'average', -999)
+    assert (yy == 7).all()
+    yy, _ = read_time_slice_v2(rdr, gbox, 'average', -999, use_overviews=False)
+    assert not (yy == 7).any()
+
+
 def test_read_with_reproject(tmpdir):
     from datacube.testutils import mk_test_image
     from datacube.testutils.io import write_gtiff
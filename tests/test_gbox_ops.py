@@ -174,6 +174,11 @@ def test_gbox_tiles():
     np.testing.assert_array_equal(cc, np.ones(tt.shape))
 
     assert list(tt.tiles(gbox[:h, :w].extent)) == [(0, 0)]
+    assert list(tt.tiles(gbox[:h+1, 1:w].extent)) == [(0, 0), (1, 0)]
+
+    # triangle covering top-left half: bounding box overlaps all tiles, triangle doesn't
+    poly = geometry.polygon([(0, 0), (W, 0), (0, H), (0, 0)], epsg3857)
+    assert set(tt.tiles(poly)) == {(0, 0), (0, 1), (0, 2), (1, 0)}
 
     (H, W) = (11, 22)
     (h, w) = (10, 20)
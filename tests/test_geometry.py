@@ -399,6 +399,39 @@ def test_to_crs():
         poly.to_crs(epsg3857)
 
 
+@pytest.mark.parametrize('resolution', [None, 1000, float('+inf')])
+def test_to_crs_many(resolution):
+    geoms = [
+        geometry.polygon([(0, 0), (0, 5), (10, 5)], epsg4326),
+        geometry.box(0, 0, 1, 3, epsg4326) | geometry.box(2, 4, 3, 6, epsg4326),
+        geometry.polygon([(0, 0), (0, 5), (5, 5), (5, 0), (0, 0)], epsg4326,
+                         [(1, 1), (1, 2), (2, 2), (1, 1)]),
+        geometry.line([(148, -35), (149, -36)], epsg4326),
+        geometry.point(148, -35, epsg4326),
+        geometry.multipoint([(148, -35), (149, -36)], epsg4326),
+        geometry.box(1000000, -4000000, 1300000, -3700000, epsg3577),
+        geometry.polygon([(0, 0), (0, 5), (10, 5)], epsg4326).to_crs(epsg3857),
+        geometry.box(0, 0, 1, 1, epsg3857),
+    ]
+    expect = [g.to_crs(epsg3857, resolution) for g in geoms]
+    result = geometry.to_crs_many(geoms, 'EPSG:3857', resolution)
+    assert result == expect
+    assert all(g.crs == epsg3857 for g in result)
+    assert result[-1] is geoms[-1]
+
+    assert geometry.to_crs_many([], epsg4326) == []
+
+
+def test_to_crs_many_wrapdateline():
+    poly = geometry.box(618300, -1876800, 849000, -1642500, 'EPSG:32660')
+    wrapped, = geometry.to_crs_many([poly], epsg4326, wrapdateline=True)
+    assert wrapped == poly.to_crs(epsg4326, wrapdateline=True)
+    assert wrapped.type == 'MultiPolygon'
+
+    with pytest.raises(ValueError):
+        geometry.to_crs_many([poly, geometry.point(0, 0, None)], epsg4326)
+
+
 def test_boundingbox():
     bb = BoundingBox(0, 3, 2, 4)
     assert bb.width == 2
@@ -431,6 +464,17 @@ def test_densify():
     assert densify(s_x10, 4) == [(0, 0), (4, 0), (8, 0), (10, 0)]
 
 
+def test_densify_array():
+    from datacube.utils.geometry._base import densify, _densify_array
+
+    rng = np.random.default_rng(1)
+    for resolution in [0.3, 1, 7.5, 100]:
+        coords = rng.uniform(-50, 50, size=(20, 2))
+        coords[5] = coords[4]
+        expect = densify([tuple(pt) for pt in coords], resolution)
+        assert [tuple(pt) for pt in _densify_array(coords, resolution)] == expect
+
+
 def test_bbox_union():
     b1 = BoundingBox(0, 1, 10, 20)
     b2 = BoundingBox(5, 6, 11, 22)
@@ -730,6 +774,28 @@ def test_geobox():
                                      GeoBox(2, 3, mkA(0), epsg3577))
 
 
+def test_geobox_lazy():
+    A = mkA(0, scale=(10, -10), translation=(-48800, -2983006))
+    gbox = GeoBox(512, 256, A, epsg3577)
+    assert gbox.crs is epsg3577
+    assert gbox[:10, :20].crs is epsg3577
+
+    # derived geometry is only computed when needed, and only once
+    assert gbox._extent is None
+    assert gbox.extent is gbox.extent
+    assert gbox.geographic_extent is gbox.geographic_extent
+    assert gbox.coords['x'].values is gbox.coords['x'].values
+    assert not gbox.coords['y'].values.flags.writeable
+
+    with pytest.raises(AttributeError):
+        gbox.extra = 1
+
+    gbox2 = pickle.loads(pickle.dumps(gbox))
+    assert gbox2 == gbox
+    assert gbox2._extent is None
+    assert gbox2.extent == gbox.extent
+
+
 def test_geobox_xr_coords():
     A = mkA(0, scale=(10, -10),
             translation=(-48800, -2983006))
@@ -1473,6 +1539,55 @@ def test_crs_hash():
     assert len(set([crs, crs2])) == 1
 
 
+def test_crs_transform_cache_id_reuse():
+    from datacube.utils.geometry import _base
+
+    wgs84 = CRS('EPSG:4326')
+    for epsg in [32755, 32756] * 10:
+        # Drop cached pyproj CRS objects, so their ids get reused by the next CRS created
+        with _base._crs_cache_lock:
+            _base._crs_cache.clear()
+        lon, lat = CRS(f'EPSG:{epsg}').transformer_to_crs(wgs84)(500000, 6000000)
+        # central meridian of the UTM zone
+        assert lon == approx((epsg - 32700) * 6 - 183)
+
+
+def test_crs_cache_info():
+    from datacube.utils.geometry import crs_cache_info
+
+    crs = CRS('EPSG:3577')
+    before = crs_cache_info()
+    assert set(before) == {'crs', 'transform'}
+    assert before['crs'].currsize <= before['crs'].maxsize
+
+    CRS('epsg:3577').transformer_to_crs(epsg4326)
+    crs.transformer_to_crs(epsg4326)
+    after = crs_cache_info()
+    assert after['crs'].hits > before['crs'].hits
+    assert after['transform'].hits > before['transform'].hits
+    assert after['transform'].hits + after['transform'].misses == before['transform'].hits + \
+        before['transform'].misses + 2
+
+
+def test_crs_cache_info_evictions(monkeypatch):
+    from datacube.utils.geometry import crs_cache_info, _base
+
+    cache = _base._CountingLRUCache(2)
+    for key in 'abcd':
+        assert cache.lookup(key) is None
+        cache.setdefault(key, key.upper())
+    assert cache.lookup('d') == 'D'
+    assert cache.info() == _base.CacheInfo(hits=1, misses=4, maxsize=2, currsize=2)
+
+    # Evicting parsed CRSs from a full cache doesn't count as hits
+    monkeypatch.setattr(_base, '_crs_cache', _base._CountingLRUCache(2))
+    for epsg in [3577, 4326, 3857, 32755, 3577]:
+        CRS(f'EPSG:{epsg}')
+    CRS('EPSG:3577')
+    info = crs_cache_info()['crs']
+    assert info == _base.CacheInfo(hits=1, misses=5, maxsize=2, currsize=2)
+
+
 def test_base_internals():
     assert _make_crs_key("epsg:3577") == "EPSG:3577"
     no_epsg_crs = CRS(SAMPLE_WKT_WITHOUT_AUTHORITY)
@@ -75,6 +75,39 @@ def test_load_data(tmpdir):
     assert progress_call_data == [(1, 2), (2, 2)]
 
 
+def test_load_data_named_fusers(tmpdir):
+    tmpdir = Path(str(tmpdir))
+
+    spatial = dict(resolution=(15, -15),
+                   offset=(11230, 1381110),)
+
+    nodata = -999
+    aa = mk_test_image(96, 64, 'int16', nodata=nodata)
+    bb = aa.copy()
+    bb[aa != nodata] += 10
+
+    ds1, gbox = gen_tiff_dataset([SimpleNamespace(name='aa', values=aa, nodata=nodata)],
+                                 tmpdir, prefix='ds1-', timestamp='2018-07-19', **spatial)
+    ds2, _ = gen_tiff_dataset([SimpleNamespace(name='aa', values=bb, nodata=nodata)],
+                              tmpdir, prefix='ds2-', timestamp='2018-07-19', **spatial)
+
+    sources = Datacube.group_datasets([ds1, ds2], 'time')
+    mm = [ds1.type.measurements['aa']]
+
+    for fuse_func, expect in [('max', bb),
+                              ('min', aa),
+                              ('last', bb),
+                              ({'*': 'copy'}, aa)]:
+        ds_data = Datacube.load_data(sources, gbox, mm, fuse_func=fuse_func)
+        np.testing.assert_array_equal(expect, ds_data.aa.values[0])
+
+    ds_data = Datacube.load_data(sources, gbox, mm, fuse_func='mean')
+    np.testing.assert_array_equal(np.where(aa != nodata, aa + 5, nodata), ds_data.aa.values[0])
+
+    with pytest.raises(ValueError):
+        Datacube.load_data(sources, gbox, mm, fuse_func='no-such-fuser')
+
+
 def test_load_data_cbk(tmpdir):
     from datacube.api import TerminateCurrentLoad
 
@@ -143,6 +176,69 @@ def test_load_data_cbk(tmpdir):
     assert progress_call_data == [(1, 4), (2, 4)]
 
 
+def test_load_data_io_threads(tmpdir):
+    from datacube.api import TerminateCurrentLoad
+
+    tmpdir = Path(str(tmpdir))
+
+    spatial = dict(resolution=(15, -15),
+                   offset=(11230, 1381110),)
+
+    nodata = -999
+    aa = mk_test_image(96, 64, 'int16', nodata=nodata)
+
+    bands = [SimpleNamespace(name=name, values=aa, nodata=nodata)
+             for name in ['aa', 'bb']]
+
+    dss = [gen_tiff_dataset(bands,
+                            tmpdir,
+                            prefix='ds{}-'.format(i),
+                            timestamp='2018-07-{}'.format(19 + i // 2),
+                            **spatial)[0]
+           for i in range(4)]
+    gbox = gen_tiff_dataset(bands, tmpdir, prefix='gbox-', timestamp='2018-07-19', **spatial)[1]
+
+    sources = Datacube.group_datasets(dss, 'time')
+    assert sources.shape == (2,)
+
+    progress_call_data = []
+
+    def progress_cbk(n, nt):
+        progress_call_data.append((n, nt))
+
+    expect = Datacube.load_data(sources, gbox, dss[0].type.measurements)
+    ds_data = Datacube.load_data(sources, gbox, dss[0].type.measurements,
+                                 progress_cbk=progress_cbk,
+                                 io_threads=3)
+
+    assert progress_call_data == [(n, 8) for n in range(1, 9)]
+    assert 'dc_partial_load' not in ds_data.attrs
+    for name in ['aa', 'bb']:
+        np.testing.assert_array_equal(expect[name].values, ds_data[name].values)
+        np.testing.assert_array_equal(aa, ds_data[name].values[1])
+
+    def progress_cbk_fail_early(n, nt):
+        progress_call_data.append((n, nt))
+        raise TerminateCurrentLoad()
+
+    progress_call_data = []
+    ds_data = Datacube.load_data(sources, gbox, dss[0].type.measurements,
+                                 progress_cbk=progress_cbk_fail_early,
+                                 io_threads=2)
+
+    assert ds_data.dc_partial_load is True
+    assert 1 <= len(progress_call_data) < 8
+
+    with pytest.raises(ValueError):
+        Datacube.load_data(sources, gbox, [dss[0].type.measurements['aa'].copy()],
+                           fuse_func=lambda dst, src: _raise(ValueError()),
+                           io_threads=2)
+
+
+def _raise(e):
+    raise e
+
+
 def test_hdf5_lock_release_on_failure():
     from datacube.storage._rio import RasterDatasetDataSource, HDF5_LOCK
     from datacube.storage import BandInfo
@@ -328,3 +424,296 @@ def test_native_load(tmpdir):
     xx = native_load(ds, ['cc'])
     assert xx.geobox == gbox_cc
     np.testing.assert_array_equal(cc, xx.isel(time=0).cc.values)
+
+
+def test_iter_load(tmpdir):
+    from unittest.mock import MagicMock
+
+    tmpdir = Path(str(tmpdir))
+
+    spatial = dict(resolution=(15, -15),
+                   offset=(11230, 1381110),)
+
+    nodata = -999
+    aa = mk_test_image(96, 64, 'int16', nodata=nodata)
+    bands = [SimpleNamespace(name='aa', values=aa + i, nodata=nodata)
+             for i in range(5)]
+
+    dss, gboxes = zip(*[gen_tiff_dataset(bands[i:i+1],
+                                         tmpdir,
+                                         prefix='ds{}-'.format(i),
+                                         timestamp='2018-07-{}'.format(19 + i),
+                                         **spatial)
+                        for i in range(5)])
+    gbox = gboxes[0]
+
+    dc = Datacube(index=MagicMock())
+    expect = dc.load(datasets=dss, like=gbox)
+    assert expect.aa.shape == (5, *gbox.shape)
+
+    for batch, prefetch in [(1, 0), (2, 1), (3, 5), (10, 1)]:
+        xx = list(dc.iter_load(datasets=dss, like=gbox, batch=batch, prefetch=prefetch))
+        assert [x.time.shape[0] for x in xx] == [min(batch, 5 - i) for i in range(0, 5, batch)]
+        for i, x in enumerate(xx):
+            assert x.geobox == gbox
+            np.testing.assert_array_equal(x.aa.values,
+                                          expect.aa.values[i*batch:(i+1)*batch])
+
+    # Stop early, background reads are cancelled
+    it = dc.iter_load(datasets=dss, like=gbox, batch=1, prefetch=2)
+    x = next(it)
+    np.testing.assert_array_equal(x.aa.values[0], aa)
+    it.close()
+
+    assert list(dc.iter_load(datasets=[], like=gbox)) == []
+
+    for bad_args in [dict(batch=0), dict(prefetch=-1), dict(dask_chunks={})]:
+        with pytest.raises(ValueError):
+            next(dc.iter_load(datasets=dss, like=gbox, **bad_args))
+    with pytest.raises(TypeError):
+        next(dc.iter_load(datasets=dss, like=gbox, progress_cbk=lambda n, total: None))
+
+
+def test_load_overviews(tmpdir):
+    from unittest.mock import MagicMock
+    import rasterio
+    from rasterio.enums import Resampling
+    from datacube.utils.geometry import GeoBox, gbox as gbx
+
+    tmpdir = Path(str(tmpdir))
+
+    nodata = -999
+    aa = mk_test_image(128, 64, 'int16', nodata=nodata)
+    ds, gbox = gen_tiff_dataset(SimpleNamespace(name='aa', values=aa, nodata=nodata),
+                                tmpdir,
+                                prefix='ds1-',
+                                timestamp='2018-07-19',
+                                resolution=(15, -15),
+                                offset=(11230, 1381110))
+
+    # fill overview with a constant, so we can tell where pixels came from
+    path = tmpdir/'ds1-aa.tiff'
+    with rasterio.open(path, 'r+') as f:
+        f.build_overviews([2], Resampling.nearest)
+    with rasterio.open(path, 'r+', OVERVIEW_LEVEL=0) as f:
+        f.write(np.full((32, 64), 7, dtype='int16'), 1)
+
+    dc = Datacube(index=MagicMock())
+
+    gbox4 = gbx.zoom_out(gbox, 4)
+    xx = dc.load(datasets=[ds], like=gbox4, resampling='average')
+    assert (xx.aa.values == 7).all()
+    assert 'use_overviews' not in xx.aa.attrs
+
+    for dask_chunks in (None, {}):
+        xx = dc.load(datasets=[ds], like=gbox4, resampling='average', use_overviews=False,
+                     dask_chunks=dask_chunks)
+        assert not (xx.aa.values == 7).any()
+
+    xx = list(dc.iter_load(datasets=[ds], like=gbox4, resampling='average', use_overviews=False))[0]
+    assert not (xx.aa.values == 7).any()
+
+    # 1.9x shrink factor only reads from the 2x overview with a larger tolerance
+    gbox19 = GeoBox(64, 32, gbox.transform*gbox.transform.scale(1.9), gbox.crs)
+    xx = dc.load(datasets=[ds], like=gbox19, resampling='average')
+    assert not (xx.aa.values == 7).any()
+    xx = dc.load(datasets=[ds], like=gbox19, resampling='average', overview_tol=0.2)
+    assert (xx.aa.values[:, :-1, :-1] == 7).all()
+
+
+def test_load_data_dask_chunks(tmpdir):
+    from datacube.utils.geometry import gbox as gbx
+
+    tmpdir = Path(str(tmpdir))
+
+    spatial = dict(resolution=(15, -15),
+                   offset=(11230, 1381110),)
+    nodata = -999
+    aa = mk_test_image(96, 64, 'int16', nodata=nodata)
+
+    ds, gbox = gen_tiff_dataset([SimpleNamespace(name='aa', values=aa, nodata=nodata)],
+                                tmpdir,
+                                prefix='ds1-',
+                                timestamp='2018-07-19',
+                                **spatial)
+    sources = Datacube.group_datasets([ds], 'time')
+    mm = ds.type.measurements
+
+    # Some tiles have no data, some are partially covered
+    gbox = gbx.pad(gbox, 40)
+
+    expect = Datacube.load_data(sources, gbox, mm)
+    xx = Datacube.load_data(sources, gbox, mm, dask_chunks={'x': 30, 'y': 30})
+
+    assert xx.aa.data.chunksize == (1, 30, 30)
+    # graph is not materialised until needed
+    layer = xx.aa.data.dask.layers[xx.aa.data.name]
+    assert not layer.is_materialized()
+    assert len(layer) == xx.aa.data.npartitions
+
+    np.testing.assert_array_equal(xx.aa.values, expect.aa.values)
+    np.testing.assert_array_equal(xx.aa[:, 45:50, 40:50].values,
+                                  expect.aa[:, 45:50, 40:50].values)
+
+
+def test_load_data_3d(tmpdir):
+    from datacube.model import ExtraDimensions
+
+    tmpdir = Path(str(tmpdir))
+
+    spatial = dict(resolution=(15, -15),
+                   offset=(11230, 1381110),)
+    nodata = -999
+    nz = 5
+    aa = np.stack([mk_test_image(96, 64, 'int16', nodata=nodata) + i for i in range(nz)])
+
+    ds, gbox = gen_tiff_dataset([SimpleNamespace(name='aa', values=aa, nodata=nodata)],
+                                tmpdir,
+                                prefix='ds1-',
+                                timestamp='2018-07-19',
+                                **spatial)
+    # second dataset is offset by 10 pixels and overlaps the first one
+    aa2 = np.where(aa == nodata, aa, aa + 100)
+    ds2, gbox2 = gen_tiff_dataset([SimpleNamespace(name='aa', values=aa2, nodata=nodata)],
+                                  tmpdir,
+                                  prefix='ds2-',
+                                  timestamp='2018-07-19',
+                                  resolution=(15, -15),
+                                  offset=(11230 + 150, 1381110 - 150))
+
+    mm = {'aa': ds.type.measurements['aa'].copy()}
+    mm['aa']['extra_dim'] = 'z'
+
+    def mk_extra_dims():
+        return ExtraDimensions({'z': dict(name='z', values=list(range(nz)), dtype='float64')})
+
+    extra_dims = mk_extra_dims()
+
+    # all of it
+    sources = Datacube.group_datasets([ds], 'time')
+    xx = Datacube.load_data(sources, gbox, mm, extra_dims=extra_dims)
+    assert xx.aa.dims == ('time', 'z', 'y', 'x')
+    assert xx.aa.shape == (1, nz, *gbox.shape)
+    np.testing.assert_array_equal(xx.aa.values[0], aa)
+
+    # subset of extra dimension
+    sub_dims = mk_extra_dims()[{'z': (1, 3)}]
+    xx = Datacube.load_data(sources, gbox, mm, extra_dims=sub_dims)
+    np.testing.assert_array_equal(xx.aa.values[0], aa[1:4])
+
+    # dask: one read task per spatial tile, any z chunking
+    for dask_chunks, chunksize in [({'x': 20, 'y': 30, 'z': -1}, (1, 3, 30, 20)),
+                                   ({'x': 20, 'y': 30}, (1, 1, 30, 20)),
+                                   ({'z': 2}, (1, 2, *gbox.shape))]:
+        yy = Datacube.load_data(sources, gbox, mm, extra_dims=sub_dims, dask_chunks=dask_chunks)
+        assert yy.aa.data.chunksize == chunksize
+        n_tiles = np.prod([len(c) for c in yy.aa.data.chunks[2:]])
+        n_reads = sum(1 for name, layer in yy.aa.data.dask.layers.items()
+                      if name.startswith('dc_load_aa-') for _ in layer)
+        assert n_reads == n_tiles
+        np.testing.assert_array_equal(yy.aa.values, xx.aa.values)
+
+    # reprojected 3D read matches reading one plane at a time
+    from datacube.utils.geometry import gbox as gbx
+    zoomed = gbx.zoom_out(gbox, 1.7)
+    xx = Datacube.load_data(sources, zoomed, mm, extra_dims=mk_extra_dims(), resampling='average')
+    for k in range(nz):
+        mm_k = {'aa': ds.type.measurements['aa'].copy()}
+        mm_k['aa']['extra_dim_index'] = k
+        yy = Datacube.load_data(sources, zoomed, mm_k, resampling='average')
+        np.testing.assert_array_equal(xx.aa.values[:, k], yy.aa.values)
+
+    # fusing of overlapping 3D sources
+    sources = Datacube.group_datasets([ds, ds2], 'time')
+    gbox = gbox | gbox2
+    ov1, ov2 = aa[:, 10:, 10:], aa2[:, :54, :86]
+    for fuse_func, expect_overlap in [(None, np.where(ov1 == nodata, ov2, ov1)),
+                                      ('max', np.where(ov1 == nodata, ov2, np.maximum(ov1, ov2)))]:
+        xx = Datacube.load_data(sources, gbox, mm, extra_dims=extra_dims, fuse_func=fuse_func)
+        assert xx.aa.shape == (1, nz, 74, 106)
+        np.testing.assert_array_equal(xx.aa.values[0, :, 10:64, 10:96], expect_overlap)
+        np.testing.assert_array_equal(xx.aa.values[0, :, 64:, 96:], aa2[:, 54:, 86:])
+
+
+def _load_shared_slice(storage, sources, geobox, measurements, idx):
+    out = storage.dataset.isel(time=slice(idx, idx + 1))
+    Datacube.load_data(sources[idx:idx + 1], geobox, measurements, out=out)
+    return idx
+
+
+@pytest.mark.parametrize('use_directory', [False, True])
+def test_load_data_shared_storage(tmpdir, use_directory):
+    import pickle
+    from datacube.executor import get_executor
+    from datacube.storage import SharedStorage
+
+    tmpdir = Path(str(tmpdir))
+    spatial = dict(resolution=(15, -15),
+                   offset=(11230, 1381110),)
+    nodata = -999
+    aa = mk_test_image(96, 64, 'int16', nodata=nodata)
+
+    dss, gboxes = zip(*[gen_tiff_dataset([SimpleNamespace(name='aa', values=aa + i, nodata=nodata)],
+                                         tmpdir,
+                                         prefix='ds{}-'.format(i),
+                                         timestamp='2018-07-{}'.format(19 + i),
+                                         **spatial)
+                        for i in range(3)])
+    gbox = gboxes[0]
+    sources = Datacube.group_datasets(dss, query_group_by('time'))
+    measurements = [dss[0].type.measurements['aa']]
+    expect = Datacube.load_data(sources, gbox, measurements)
+
+    directory = str(tmpdir / 'shared') if use_directory else None
+    if directory:
+        Path(directory).mkdir()
+
+    storage = SharedStorage(sources.coords, gbox, measurements, directory=directory)
+    assert storage.directory == directory
+    assert storage.dataset.aa.shape == expect.aa.shape
+    assert storage.dataset.aa.dims == expect.aa.dims
+    assert (storage.dataset.aa.values == nodata).all()
+    if directory:
+        assert len(list(Path(directory).iterdir())) == 1
+
+    # Unpickled copy sees the same memory
+    other = pickle.loads(pickle.dumps(storage))
+    other.dataset.aa.values[0, 0, 0] = 7
+    assert storage.dataset.aa.values[0, 0, 0] == 7
+    other.close()
+    storage.dataset.aa.values[0, 0, 0] = nodata
+
+    executor = get_executor(None, 2, use_cloud_pickle=False)
+    futures = [executor.submit(_load_shared_slice, storage, sources, gbox, measurements, idx)
+               for idx in range(3)]
+    assert sorted(executor.results(futures)) == [0, 1, 2]
+
+    xx = storage.dataset
+    np.testing.assert_array_equal(xx.aa.values, expect.aa.values)
+    assert xx.geobox == gbox
+    xx = xx.copy(deep=True)
+    storage.close()
+    storage.close()
+    np.testing.assert_array_equal(xx.aa.values, expect.aa.values)
+
+    with pytest.raises(ValueError):
+        storage.dataset
+    with pytest.raises(ValueError):
+        pickle.dumps(storage)
+    if directory:
+        assert list(Path(directory).iterdir()) == []
+
+    # Loading into a slice overwrites whatever was there before
+    xx.aa.values[:] = 0
+    Datacube.load_data(sources[1:], gbox, measurements, out=xx.isel(time=slice(1, 3)))
+    np.testing.assert_array_equal(xx.aa.values[1:], expect.aa.values[1:])
+    assert (xx.aa.values[0] == 0).all()
+
+    with pytest.raises(ValueError):
+        Datacube.load_data(sources, gbox, measurements, out=xx.isel(time=slice(1, 3)))
+    with pytest.raises(ValueError):
+        Datacube.load_data(sources, gbox, measurements, out=xx.drop_vars('aa'))
+    with pytest.raises(ValueError):
+        Datacube.load_data(sources, gbox, measurements, out=xx.astype('float64'))
+    with pytest.raises(ValueError):
+        Datacube.load_data(sources, gbox, measurements, out=xx, dask_chunks={})
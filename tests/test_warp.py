@@ -3,19 +3,26 @@
 # Copyright (c) 2015-2020 ODC Contributors
 # SPDX-License-Identifier: Apache-2.0
 import numpy as np
+import pytest
 from affine import Affine
 import rasterio
-from datacube.utils.geometry import warp_affine, rio_reproject, gbox as gbx
-from datacube.utils.geometry._warp import resampling_s2rio, is_resampling_nn
+from datacube.utils.geometry import GeoBox, warp_affine, rio_reproject, warp_plan, gbox as gbx
+from datacube.utils.geometry._warp import (
+    WarpPlan,
+    resampling_s2rio,
+    is_resampling_nn,
+    is_warp_affine_np_supported,
+    warp_affine_np,
+    warp_affine_rio,
+)
 
 from datacube.testutils.geom import (
     AlbersGS,
+    epsg4326,
 )
 
 
 def test_rio_resampling_conversion():
-    import pytest
-
     R = rasterio.warp.Resampling
     assert resampling_s2rio('nearest') == R.nearest
     assert resampling_s2rio('bilinear') == R.bilinear
@@ -73,6 +80,84 @@ def test_warp():
     assert (dst[:, 20:] == -3).all()
 
 
+@pytest.mark.parametrize('dtype', ['uint8', 'int16', 'uint16', 'float32'])
+@pytest.mark.parametrize('resampling, A, shape', [
+    ('nearest', Affine.translation(3, 5), (50, 40)),
+    ('nearest', Affine(2, 0, 1, 0, 2, 0.5), (30, 25)),
+    ('nearest', Affine(0.5, 0, 10.25, 0, 0.5, 3), (60, 70)),
+    ('nearest', Affine(1.5, 0, 0.3, 0, 2.5, 7.1), (20, 30)),
+    ('average', Affine(2, 0, 4, 0, 2, 0), (30, 20)),
+    ('average', Affine(3, 0, 0, 0, 1, 5), (50, 20)),
+    ('average', Affine(4, 0, 1, 0, 4, 3), (15, 12)),
+])
+@pytest.mark.parametrize('src_nodata, dst_nodata', [(None, None), (0, None), (3, 1), (None, 2)])
+def test_warp_affine_np(dtype, resampling, A, shape, src_nodata, dst_nodata):
+    rng = np.random.default_rng(42)
+    src = rng.integers(0, 6, size=(64, 80)).astype(dtype)
+    if dtype == 'float32':
+        src = src * 1.3
+        src[rng.random(src.shape) < 0.1] = np.nan
+
+    assert is_warp_affine_np_supported(src, np.zeros(shape, dtype), A, resampling)
+
+    expect = warp_affine_rio(src, np.full(shape, 99, dtype), A, resampling,
+                             src_nodata=src_nodata, dst_nodata=dst_nodata)
+    result = warp_affine_np(src, np.full(shape, 99, dtype), A, resampling,
+                            src_nodata=src_nodata, dst_nodata=dst_nodata)
+    np.testing.assert_array_equal(result, expect)
+
+
+@pytest.mark.parametrize('dtype', ['int16', 'uint16', 'int32', 'uint32', 'int64', 'uint64'])
+@pytest.mark.parametrize('resampling, A, shape', [
+    ('nearest', Affine(2, 0, 1, 0, 2, 0.5), (30, 25)),
+    ('average', Affine(2, 0, 4, 0, 2, 0), (30, 20)),
+])
+@pytest.mark.parametrize('src_nodata, dst_nodata', [(None, 0), (5, 0), (None, 300), (300, 0), (300, None)])
+def test_warp_affine_nodata_valid_pixels(dtype, resampling, A, shape, src_nodata, dst_nodata):
+    # GDAL changes valid pixels equal to dst_nodata for some of these, numpy path has to match or step aside
+    rng = np.random.default_rng(42)
+    src = rng.choice([0, 1, 2, 5, 299, 300, 301, 2**63 + 1], size=(64, 80)).astype(dtype)
+
+    expect = warp_affine_rio(src, np.full(shape, 99, dtype), A, resampling,
+                             src_nodata=src_nodata, dst_nodata=dst_nodata)
+    result = warp_affine(src, np.full(shape, 99, dtype), A, resampling,
+                         src_nodata=src_nodata, dst_nodata=dst_nodata)
+    np.testing.assert_array_equal(result, expect)
+
+
+def test_warp_affine_np_unsupported():
+    src, dst = np.zeros((64, 64), 'int16'), np.zeros((16, 16), 'int16')
+    assert is_warp_affine_np_supported(src, dst, Affine.scale(2), 'nearest')
+    assert is_warp_affine_np_supported(src, dst, Affine.scale(2), rasterio.warp.Resampling.average)
+
+    assert not is_warp_affine_np_supported(src, dst, Affine.scale(2), 'bilinear')
+    assert not is_warp_affine_np_supported(src, dst, Affine.scale(2), 'mode')
+    assert not is_warp_affine_np_supported(src, dst, Affine.scale(2), 'no_such_mode')
+    assert not is_warp_affine_np_supported(src, dst.astype('float32'), Affine.scale(2), 'nearest')
+    assert not is_warp_affine_np_supported(src, dst, Affine.scale(2.1), 'nearest')
+    assert not is_warp_affine_np_supported(src, dst, Affine.scale(2, -2), 'nearest')
+    assert not is_warp_affine_np_supported(src, dst, Affine.rotation(10), 'nearest')
+    # destination pixels outside of the source
+    assert not is_warp_affine_np_supported(src, dst, Affine.translation(60, 0), 'nearest')
+    assert not is_warp_affine_np_supported(src, dst, Affine(2, 0, 0, 0, 2, -1), 'average')
+    assert not is_warp_affine_np_supported(src, dst, Affine.scale(4.5), 'average')
+    assert not is_warp_affine_np_supported(src, dst, Affine.translation(3, 3), 'average')
+    assert not is_warp_affine_np_supported(src.astype('int8'), dst.astype('int8'), Affine.scale(2), 'average')
+    assert not is_warp_affine_np_supported(src.astype('int64'), dst.astype('int64'), Affine.scale(2), 'nearest')
+    assert not is_warp_affine_np_supported(src.astype('uint64'), dst.astype('uint64'), Affine.scale(2), 'nearest')
+    # GDAL changes valid pixels equal to dst_nodata
+    assert is_warp_affine_np_supported(src, dst, Affine.scale(2), 'nearest', src_nodata=-999, dst_nodata=0)
+    assert not is_warp_affine_np_supported(src, dst, Affine.scale(2), 'nearest', dst_nodata=300)
+    assert not is_warp_affine_np_supported(src, dst, Affine.scale(2), 'nearest', src_nodata=300, dst_nodata=0)
+    assert not is_warp_affine_np_supported(src.astype('int32'), dst.astype('int32'), Affine.scale(2), 'nearest',
+                                           dst_nodata=0)
+    assert is_warp_affine_np_supported(src.astype('int32'), dst.astype('int32'), Affine.scale(2), 'average',
+                                       dst_nodata=0)
+
+    with pytest.raises(ValueError):
+        warp_affine_np(src, dst, Affine.scale(2), 'bilinear')
+
+
 def test_rio_reproject():
     src = np.zeros((128, 256),
                    dtype='int16')
@@ -118,3 +203,56 @@ def test_rio_reproject():
     assert (dst[:10, :20] == 33).all()
     assert (dst[10:, :] == -3).all()
     assert (dst[:, 20:] == -3).all()
+
+
+def test_warp_plan():
+    src_gbox = AlbersGS.tile_geobox((15, -40))[:200, :300]
+    dst_gbox = GeoBox(100, 80, Affine(0.0002, 0, 148.57, 0, -0.0002, -34.83), epsg4326)
+
+    plan = warp_plan(src_gbox, dst_gbox, 'nearest')
+    assert isinstance(plan, WarpPlan)
+    assert plan.resampling == rasterio.warp.Resampling.nearest
+    assert warp_plan(src_gbox[:, :], dst_gbox[:, :], rasterio.warp.Resampling.nearest) is plan
+    assert warp_plan(src_gbox, dst_gbox, 'bilinear') is not plan
+
+    region = plan.region(2)
+    assert plan.region(2) is region
+    assert region.src_gbox == gbx.zoom_out(src_gbox[region.roi_src], 2)
+    assert region.dst_gbox == dst_gbox[region.roi_dst]
+
+    # tight ROIs are padded for warping, without changing the shared result of compute_reproject_roi
+    plan = warp_plan(src_gbox, src_gbox[10:50, 20:80], 'nearest')
+    assert plan.rr.roi_src == np.s_[10:50, 20:80]
+    assert plan.region().roi_src == np.s_[9:51, 19:81]
+    assert plan.region().roi_dst == np.s_[0:40, 0:60]
+
+
+@pytest.mark.parametrize('resampling', ['nearest', 'bilinear'])
+@pytest.mark.parametrize('dtype, src_nodata, dst_nodata', [
+    ('int16', None, None),
+    ('int16', 0, -1),
+    ('int8', -3, None),
+    ('float32', np.nan, np.nan),
+    # GDAL changes valid pixels equal to dst_nodata for these
+    ('int32', None, 0),
+    ('uint32', 5, 0),
+    ('int16', 300, 0),
+    ('uint64', None, 0),
+    ('int64', -3, 0),
+])
+def test_warp_plan_warp(resampling, dtype, src_nodata, dst_nodata):
+    src_gbox = AlbersGS.tile_geobox((15, -40))[:200, :300]
+    dst_gbox = GeoBox(100, 80, Affine(0.0002, 0, 148.57, 0, -0.0002, -34.83), epsg4326)
+    plan = WarpPlan(src_gbox, dst_gbox, resampling)
+    region = plan.region()
+
+    rng = np.random.default_rng(0)
+    for _ in range(2):
+        src = rng.integers(-3, 100, region.src_gbox.shape).astype(dtype)
+        dst = np.full(region.dst_gbox.shape, 11, dtype=dtype)
+        expect = dst.copy()
+
+        assert plan.warp(src, dst, src_nodata=src_nodata, dst_nodata=dst_nodata) is dst
+        rio_reproject(src, expect, region.src_gbox, region.dst_gbox, resampling,
+                      src_nodata=src_nodata, dst_nodata=dst_nodata)
+        np.testing.assert_array_equal(dst, expect)